@@ -0,0 +1,87 @@
+"""
+Benchmark for session creation with seat materialization.
+
+Creates sessions with 100, 1,000 and 10,000 seats through `crud.sessions.create_session`
+and through the legacy per-object loop, and prints the wall time of each run.
+
+Usage (from the `api` directory, with the usual API environment variables set):
+    python -m benchmarks.create_session
+
+The database defaults to an in-memory SQLite database and can be pointed at another
+server with the BENCHMARK_DATABASE_URL environment variable.
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from v1.database import Base, get_async_database_url
+from v1.models import Film, FilmStatus, Seat, Session as SessionModel
+from v1.schemas import SessionCreate
+from v1.crud.sessions import create_session
+
+CAPACITIES = (100, 1_000, 10_000)
+BENCHMARK_DATABASE_URL = get_async_database_url(os.getenv("BENCHMARK_DATABASE_URL", "sqlite://"))
+
+
+async def legacy_create_session(db, session: SessionCreate) -> SessionModel:
+    """
+    Reproduce the previous implementation: one ORM object per seat.
+    """
+    db_session = SessionModel(**session.dict())
+    db.add(db_session)
+    await db.commit()
+    await db.refresh(db_session)
+    for _ in range(session.capacity):
+        db.add(Seat(session_id=db_session.id))
+    await db.commit()
+    return db_session
+
+
+async def run(label: str, create, db, film_id: int, capacity: int) -> float:
+    session = SessionCreate(
+        film_id=film_id,
+        datetime=datetime.utcnow() + timedelta(days=1),
+        price=10.0,
+        capacity=capacity,
+        auto_booking=False
+    )
+    started = time.perf_counter()
+    db_session = await create(db, session)
+    elapsed = time.perf_counter() - started
+    result = await db.execute(select(func.count(Seat.id)).where(Seat.session_id == db_session.id))
+    seats = result.scalar_one()
+    assert seats == capacity, f"{label}: expected {capacity} seats, got {seats}"
+    return elapsed
+
+
+async def main():
+    engine = create_async_engine(BENCHMARK_DATABASE_URL)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    db = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)()
+    try:
+        film = Film(title="Benchmark Film", description="", duration=120, status=FilmStatus.AVAILABLE)
+        db.add(film)
+        await db.commit()
+
+        print(f"{'capacity':>10} {'bulk (s)':>10} {'legacy (s)':>11} {'speedup':>8}")
+        for capacity in CAPACITIES:
+            bulk = await run("bulk", create_session, db, film.id, capacity)
+            legacy = await run("legacy", legacy_create_session, db, film.id, capacity)
+            print(f"{capacity:>10} {bulk:>10.3f} {legacy:>11.3f} {legacy / bulk:>7.1f}x")
+    finally:
+        await db.close()
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
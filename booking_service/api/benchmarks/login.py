@@ -0,0 +1,102 @@
+"""
+Login throughput benchmark.
+
+Concurrent clients log in through `POST /api/v1/auth/token`, served in process over
+an ASGI transport, while a heartbeat task measures how late the event loop wakes it
+up. Password verification runs in the password thread pool, so the heartbeat lag does
+not grow with the number of logins in flight. The run prints the logins per second and
+the worst heartbeat lag.
+
+Usage (from the `api` directory, with the usual API environment variables set):
+    python -m benchmarks.login [--logins 200] [--concurrency 20]
+
+The cost factor and the pool size are taken from the BCRYPT_ROUNDS and
+PASSWORD_HASH_WORKERS settings. The database defaults to a temporary SQLite file and
+can be pointed at another server with the BENCHMARK_DATABASE_URL environment variable.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import create_app
+from v1.config import settings
+from v1.database import Base, get_async_database_url, get_db
+from v1.models import User
+from v1.utils.auth import get_password_hash
+
+HEARTBEAT_INTERVAL = 0.01
+
+
+async def heartbeat(lags: list, stop: asyncio.Event):
+    """
+    Sleep in short intervals, recording how late each wake-up is.
+    """
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        lags.append(loop.time() - started - HEARTBEAT_INTERVAL)
+
+
+async def main(logins: int, concurrency: int):
+    database_url = os.getenv("BENCHMARK_DATABASE_URL")
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'login.db')}"
+    engine = create_async_engine(get_async_database_url(database_url))
+    session_factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app = create_app()
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        async with session_factory() as db:
+            db.add(User(email="benchmark@example.com", hashed_password=get_password_hash("password")))
+            await db.commit()
+
+        semaphore = asyncio.Semaphore(concurrency)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            async def login():
+                async with semaphore:
+                    response = await client.post("/api/v1/auth/token",
+                                                 data={"username": "benchmark@example.com", "password": "password"})
+                    assert response.status_code == 200, response.text
+
+            lags: list = []
+            stop = asyncio.Event()
+            ticker = asyncio.create_task(heartbeat(lags, stop))
+            started = time.perf_counter()
+            await asyncio.gather(*(login() for _ in range(logins)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await ticker
+
+        print(f"bcrypt rounds: {settings.BCRYPT_ROUNDS}, hash workers: {settings.PASSWORD_HASH_WORKERS}, "
+              f"concurrency: {concurrency}")
+        print(f"logins: {logins} in {elapsed:.3f}s ({logins / elapsed:.1f} logins/s)")
+        print(f"event loop lag: max {max(lags) * 1000:.1f}ms over {len(lags)} heartbeats")
+    finally:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency))
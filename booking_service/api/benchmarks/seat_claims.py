@@ -0,0 +1,114 @@
+"""
+Concurrency load test for seat claiming.
+
+Concurrent workers race to claim the seats of a single session through
+`crud.seats.claim_seats`, each claim in its own database session and transaction.
+Every worker tries every seat once, in its own random order, so all but one attempt
+per seat collide with a claim made by another worker. The run checks that no seat
+was claimed twice and prints the throughput.
+
+Usage (from the `api` directory, with the usual API environment variables set):
+    python -m benchmarks.seat_claims [--seats 200] [--workers 20]
+
+The database defaults to a temporary SQLite file and can be pointed at another
+server with the BENCHMARK_DATABASE_URL environment variable.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from v1.database import Base, get_async_database_url, use_immediate_transactions
+from v1.models import Film, FilmStatus, Seat, SeatStatus
+from v1.schemas import SessionCreate
+from v1.crud.sessions import create_session
+from v1.crud.seats import claim_seats
+
+
+async def worker(session_factory, seat_ids: list, claimed: list, stats: Counter):
+    """
+    Try to claim every seat of the session, in random order.
+    """
+    for seat_id in random.sample(seat_ids, len(seat_ids)):
+        async with session_factory() as db:
+            try:
+                await claim_seats(db, [seat_id])
+                await db.commit()
+            except HTTPException:
+                stats["conflicts"] += 1
+                continue
+        claimed.append(seat_id)
+        stats["claims"] += 1
+
+
+async def main(seats: int, workers: int):
+    database_url = os.getenv("BENCHMARK_DATABASE_URL")
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'seat_claims.db')}"
+    # SQLite serializes writers; give queued claims enough time to get the lock
+    connect_args = {"timeout": 60} if database_url.startswith("sqlite") else {}
+    engine = create_async_engine(get_async_database_url(database_url), poolclass=AsyncAdaptedQueuePool,
+                                 pool_size=workers, max_overflow=0, connect_args=connect_args)
+    use_immediate_transactions(engine)
+    session_factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    try:
+        async with session_factory() as db:
+            film = Film(title="Benchmark Film", description="", duration=120, status=FilmStatus.AVAILABLE)
+            db.add(film)
+            await db.commit()
+            db_session = await create_session(db, SessionCreate(
+                film_id=film.id,
+                datetime=datetime.utcnow() + timedelta(days=1),
+                price=10.0,
+                capacity=seats,
+                auto_booking=True
+            ))
+            result = await db.execute(select(Seat.id).where(Seat.session_id == db_session.id))
+            seat_ids = result.scalars().all()
+
+        claimed: list = []
+        stats: Counter = Counter()
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session_factory, seat_ids, claimed, stats) for _ in range(workers)))
+        elapsed = time.perf_counter() - started
+
+        async with session_factory() as db:
+            result = await db.execute(
+                select(func.count(Seat.id)).where(Seat.session_id == db_session.id, Seat.status == SeatStatus.RESERVED)
+            )
+            reserved = result.scalar_one()
+
+        double_claims = sum(count - 1 for count in Counter(claimed).values() if count > 1)
+        attempts = stats["claims"] + stats["conflicts"]
+        print(f"seats: {seats}, workers: {workers}, attempts: {attempts}, conflicts: {stats['conflicts']}")
+        print(f"claims: {stats['claims']} in {elapsed:.3f}s ({stats['claims'] / elapsed:.1f} claims/s, "
+              f"{attempts / elapsed:.1f} attempts/s)")
+        print(f"double claims: {double_claims}, reserved seats: {reserved}")
+        assert double_claims == 0, "a seat was claimed more than once"
+        assert reserved == stats["claims"] == seats, "claimed seats do not match reserved seats"
+    finally:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seats", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.seats, args.workers))
@@ -3,7 +3,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 from v1 import router as api_v1_router
-from v1.utils.scheduler import scheduler
+from v1.utils.rabbitmq import publisher
+from v1.utils.scheduler import create_scheduler
 from v1.config import settings
 
 # Configure logging
@@ -34,6 +35,7 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Total-Count", "X-Next-Cursor"],
     )
 
     # Include API v1 router
@@ -43,21 +45,25 @@ def create_app() -> FastAPI:
     async def startup_event():
         """
         Event handler that runs on application startup. 
-        Starts the scheduler if it's not already running.
+        Creates and starts the scheduler on the running event loop and connects
+        the message publisher.
         """
-        if not scheduler.running:
-            scheduler.start()
+        app.state.scheduler = create_scheduler()
+        app.state.scheduler.start()
         logger.info("Scheduler started")
+        await publisher.start()
 
     @app.on_event("shutdown")
     async def shutdown_event():
         """
         Event handler that runs on application shutdown.
-        Shuts down the scheduler if it's running.
+        Shuts down the scheduler if it's running and closes the message publisher.
         """
-        if scheduler.running:
-            scheduler.shutdown()
+        scheduler = getattr(app.state, "scheduler", None)
+        if scheduler is not None and scheduler.running:
+            scheduler.shutdown(wait=False)
         logger.info("Scheduler stopped")
+        await publisher.close()
 
     @app.get("/")
     async def read_root():
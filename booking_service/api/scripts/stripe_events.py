@@ -0,0 +1,92 @@
+"""
+Replay and backfill Stripe events.
+
+`replay` marks stored events as unprocessed again, by default only the ones that failed,
+and `backfill` fetches the events Stripe sent since a given time and stores the ones
+that never reached the webhook. Both then apply the pending events, like the scheduled
+event processor does; events are deduplicated by ID and applying one again is harmless.
+
+Usage (from the `api` directory, with the usual API environment variables set):
+    python -m scripts.stripe_events replay [--all] [--since 2024-06-01T00:00:00]
+    python -m scripts.stripe_events backfill --since 2024-06-01T00:00:00
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+import stripe
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from v1.config import settings
+from v1.crud.stripe_events import process_stripe_events, reset_stripe_events, store_stripe_event
+from v1.database import AsyncSessionLocal
+
+# Types of the events the event processor applies
+EVENT_TYPES = ["checkout.session.completed", "checkout.session.expired"]
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+async def process_all() -> int:
+    processed = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            batch = await process_stripe_events(db, settings.STRIPE_EVENTS_BATCH_SIZE)
+        processed += batch
+        if batch < settings.STRIPE_EVENTS_BATCH_SIZE:
+            return processed
+
+
+async def replay(failed_only: bool, since: Optional[datetime]):
+    async with AsyncSessionLocal() as db:
+        await reset_stripe_events(db, failed_only=failed_only, since=since)
+    logger.info(f"Replayed {await process_all()} Stripe events")
+
+
+async def backfill(since: datetime):
+    stripe.api_key = settings.STRIPE_API_KEY
+    stripe.api_base = settings.STRIPE_API_BASE
+
+    def list_events() -> list:
+        created = int(since.replace(tzinfo=timezone.utc).timestamp())
+        events = stripe.Event.list(types=EVENT_TYPES, created={"gte": created}, limit=100)
+        return list(events.auto_paging_iter())
+
+    events = await asyncio.to_thread(list_events)
+    stored = 0
+    # Stripe lists the newest events first
+    for event in reversed(events):
+        async with AsyncSessionLocal() as db:
+            stored += await store_stripe_event(db, event["id"], event["type"], event["data"]["object"])
+    logger.info(f"Backfilled {stored} of {len(events)} Stripe events, applied {await process_all()}")
+
+
+def parse_datetime(value: str) -> datetime:
+    """
+    Parse an ISO time into naive UTC, as stored in the database; times without an offset are taken as UTC.
+    """
+    parsed = datetime.fromisoformat(value)
+    return parsed.astimezone(timezone.utc).replace(tzinfo=None) if parsed.tzinfo else parsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    replay_parser = subparsers.add_parser("replay", help="Apply stored events again.")
+    replay_parser.add_argument("--all", action="store_true", help="Replay every event, not only the failed ones.")
+    replay_parser.add_argument("--since", type=parse_datetime, default=None,
+                               help="Replay only the events received since this ISO time.")
+    backfill_parser = subparsers.add_parser("backfill", help="Fetch and apply the events missed by the webhook.")
+    backfill_parser.add_argument("--since", type=parse_datetime, required=True,
+                                 help="Fetch the events created since this ISO time.")
+    args = parser.parse_args()
+    if args.command == "replay":
+        asyncio.run(replay(not args.all, args.since))
+    else:
+        asyncio.run(backfill(args.since))
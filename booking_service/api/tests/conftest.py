@@ -1,9 +1,14 @@
 import os
 import sys
+from contextlib import contextmanager
+from datetime import datetime
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from alembic.config import Config
 from alembic import command
 
@@ -12,8 +17,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from main import create_app 
 from v1.utils.auth import get_password_hash
-from v1.database import Base, get_db
+from v1.database import Base, get_db, get_async_database_url, use_immediate_transactions
 from v1.models import User
+from v1.utils.cache import catalog_cache, user_cache
 
 # Alembic configuration
 alembic_cfg = Config("alembic.ini")
@@ -24,6 +30,12 @@ SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 engine = create_engine(SQLALCHEMY_DATABASE_URL)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# The API itself runs on the async driver; connections are not pooled since
+# every TestClient runs the application on its own event loop
+async_engine = create_async_engine(get_async_database_url(SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+use_immediate_transactions(async_engine)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 
 @pytest.fixture(scope="session")
 def apply_migrations():
@@ -43,18 +55,86 @@ def db_session(apply_migrations):
         db.close()
         Base.metadata.drop_all(bind=engine)
 
+@pytest.fixture(scope="function")
+def async_session_factory(db_session):
+    """
+    Provide the async session factory used by the API, for calling crud coroutines directly.
+    """
+    return TestingAsyncSessionLocal
+
+@pytest.fixture(scope="function")
+def query_counter():
+    """
+    Record the SQL statements the API sends to the database during a test.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+@pytest.fixture(scope="function", autouse=True)
+def naive_datetimes():
+    """
+    Fail a test that binds a timezone aware datetime through the API's engine.
+
+    DateTime columns hold naive UTC and asyncpg rejects aware values for them,
+    while SQLite stores either, so the check stands in for the production driver.
+    """
+    aware = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        # The values before the dialect converts them, SQLite turning datetimes into strings
+        for params in getattr(context, "compiled_parameters", None) or ():
+            aware.extend(
+                (statement, value) for value in params.values()
+                if isinstance(value, datetime) and value.tzinfo is not None
+            )
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    assert not aware, "Timezone aware datetimes bound:\n" + "\n".join(f"{v!r} in {s}" for s, v in aware)
+
+@pytest.fixture(scope="function")
+def max_queries(query_counter):
+    """
+    Assert an upper bound on the SQL statements sent to the database within a block.
+
+    Usage:
+        with max_queries(5):
+            client.get("/api/v1/films/")
+    """
+    @contextmanager
+    def assert_max_queries(limit: int):
+        query_counter.clear()
+        yield query_counter
+        assert len(query_counter) <= limit, (
+            f"{len(query_counter)} statements executed, expected at most {limit}:\n" + "\n".join(query_counter)
+        )
+
+    return assert_max_queries
+
 @pytest.fixture(scope="function")
 def client(db_session):
     """
     Create a new FastAPI TestClient for a test.
     """
 
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            db_session.close()
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
 
+    # The database is recreated for every test, so responses and users cached by a previous one are stale
+    catalog_cache.clear()
+    user_cache.clear()
     app = create_app()
     app.dependency_overrides[get_db] = override_get_db
     with TestClient(app) as client:
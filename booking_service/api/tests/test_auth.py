@@ -1,5 +1,9 @@
 import pytest
 
+from v1.config import settings
+from v1.models import User
+from v1.utils.auth import pwd_context
+
 def test_register_user(client):
     response = client.post("/api/v1/auth/register", json={"email": "user@example.com", "password": "password"})
     assert response.status_code == 201, response.text
@@ -27,3 +31,21 @@ def test_login_user_with_unregistered_email(client):
     response = client.post("/api/v1/auth/token", data={"username": "nonexistent@example.com", "password": "password"})
     assert response.status_code == 400, response.text
     assert response.json()["detail"] == "Incorrect email or password"
+
+def test_login_rehashes_outdated_password(client, db_session):
+    outdated_rounds = 4 if settings.BCRYPT_ROUNDS != 4 else 5
+    user = User(email="user@example.com", hashed_password=pwd_context.hash("password", rounds=outdated_rounds))
+    db_session.add(user)
+    db_session.commit()
+
+    response = client.post("/api/v1/auth/token", data={"username": "user@example.com", "password": "password"})
+    assert response.status_code == 200, response.text
+
+    db_session.expire_all()
+    hashed_password = db_session.get(User, user.id).hashed_password
+    assert hashed_password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+    assert pwd_context.verify("password", hashed_password)
+
+    # The new hash still logs in
+    response = client.post("/api/v1/auth/token", data={"username": "user@example.com", "password": "password"})
+    assert response.status_code == 200, response.text
@@ -106,3 +106,111 @@ def test_delete_nonexistent_booking(client, admin_token):
     response = client.delete("/api/v1/bookings/9999/delete", headers=headers)
     assert response.status_code == 404, response.text
     assert response.json()["detail"] == "Booking not found"
+
+def test_confirm_booking_cancels_conflicting_bookings(client, admin_token, query_counter):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    film_id = film_response.json()["id"]
+
+    session_data = {
+        "film_id": film_id,
+        "datetime": (datetime.now() + timedelta(days=1)).isoformat(),
+        "price": 10.0,
+        "capacity": 10,
+        "auto_booking": False
+    }
+    session_response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+    assert session_response.status_code == 201, session_response.text
+    session_id = session_response.json()["id"]
+    seat_ids = [seat["id"] for seat in session_response.json()["seats"]]
+
+    # Several bookings hold pending reservations overlapping the seats of the first one
+    held_seats = [seat_ids[0:2], seat_ids[1:3], seat_ids[0:1], seat_ids[5:6]]
+    booking_ids = []
+    for seats in held_seats:
+        booking_response = client.post("/api/v1/bookings/", json={"session_id": session_id}, headers=headers)
+        assert booking_response.status_code == 201, booking_response.text
+        booking_ids.append(booking_response.json()["id"])
+        for seat_id in seats:
+            reservation_data = {"booking_id": booking_ids[-1], "seat_id": seat_id}
+            reservation_response = client.post("/api/v1/reservations/", json=reservation_data, headers=headers)
+            assert reservation_response.status_code == 201, reservation_response.text
+
+    query_counter.clear()
+    response = client.post(f"/api/v1/bookings/{booking_ids[0]}/confirmed", headers=headers)
+    assert response.status_code == 200, response.text
+    assert len(query_counter) <= 16, query_counter
+    assert response.json()["status"] == "confirmed"
+    assert all(reservation["status"] == "confirmed" for reservation in response.json()["reservations"])
+
+    expected = ["confirmed", "canceled", "canceled", "pending"]
+    for booking_id, booking_status in zip(booking_ids, expected):
+        booking = client.get(f"/api/v1/bookings/{booking_id}").json()
+        assert booking["status"] == booking_status
+        if booking_status == "canceled":
+            assert all(reservation["status"] == "canceled" for reservation in booking["reservations"])
+
+    seats = {seat["id"]: seat["status"] for seat in client.get(f"/api/v1/sessions/{session_id}").json()["seats"]}
+    assert seats[seat_ids[0]] == seats[seat_ids[1]] == "reserved"
+    assert seats[seat_ids[2]] == seats[seat_ids[5]] == "available"
+
+def test_create_booking_with_seats(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    film_id = film_response.json()["id"]
+
+    sessions = []
+    for auto_booking in (False, True):
+        session_data = {
+            "film_id": film_id,
+            "datetime": (datetime.now() + timedelta(days=1)).isoformat(),
+            "price": 10.0,
+            "capacity": 8,
+            "auto_booking": auto_booking
+        }
+        session_response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+        assert session_response.status_code == 201, session_response.text
+        sessions.append(session_response.json())
+    seat_ids = [seat["id"] for seat in sessions[0]["seats"]]
+
+    # All seats are reserved with the booking in one request
+    booking_data = {"session_id": sessions[0]["id"], "seat_ids": seat_ids[:3]}
+    response = client.post("/api/v1/bookings/", json=booking_data, headers=headers)
+    assert response.status_code == 201, response.text
+    assert sorted(r["seat_id"] for r in response.json()["reservations"]) == seat_ids[:3]
+    assert all(r["status"] == "pending" for r in response.json()["reservations"])
+
+    # A seat of another session is rejected and nothing is created
+    booking_data = {"session_id": sessions[0]["id"], "seat_ids": [seat_ids[3], sessions[1]["seats"][0]["id"]]}
+    response = client.post("/api/v1/bookings/", json=booking_data, headers=headers)
+    assert response.status_code == 404, response.text
+    bookings = client.get("/api/v1/bookings/", params={"session_id": sessions[0]["id"]}).json()
+    assert len(bookings) == 1
+
+    # With auto booking the reservations are confirmed and the seats taken
+    auto_seat_ids = [seat["id"] for seat in sessions[1]["seats"]][:2]
+    booking_data = {"session_id": sessions[1]["id"], "seat_ids": auto_seat_ids}
+    response = client.post("/api/v1/bookings/", json=booking_data, headers=headers)
+    assert response.status_code == 201, response.text
+    assert response.json()["status"] == "confirmed"
+    assert all(r["status"] == "confirmed" for r in response.json()["reservations"])
+
+    response = client.post("/api/v1/bookings/", json=booking_data, headers=headers)
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Seat is already reserved"
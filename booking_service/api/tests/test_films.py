@@ -5,6 +5,9 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import io
 
+from v1.routers import films as films_router
+from v1.utils.cache import catalog_cache
+
 def test_create_film(client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
     
@@ -19,7 +22,9 @@ def test_create_film(client, admin_token):
     assert response.status_code == 201, response.text
     assert "id" in response.json()
 
-def test_upload_film_image(client, admin_token):
+def test_upload_film_image(client, admin_token, tmp_path, monkeypatch):
+    # Keep the uploaded file out of the real static directory
+    monkeypatch.setattr(films_router, "STATIC_DIR", tmp_path)
     headers = {"Authorization": f"Bearer {admin_token}"}
     
     # Create a film first
@@ -42,6 +47,7 @@ def test_upload_film_image(client, admin_token):
     
     assert upload_response.status_code == 200, upload_response.text
     assert "image_url" in upload_response.json()
+    assert (tmp_path / upload_response.json()["image_url"]).read_bytes() == b"fake image data"
 
 def test_upload_film_image_not_found(client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
@@ -82,3 +88,279 @@ def test_delete_film_not_found(client, admin_token):
     delete_response = client.delete(f"/api/v1/films/9999/delete", headers=headers)
     assert delete_response.status_code == 404, delete_response.text
     assert delete_response.json()["detail"] == "Film not found"
+
+def test_read_films_total_count(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    for i in range(3):
+        film_data = {
+            "title": f"Test Film {i}",
+            "description": "A test film",
+            "duration": 120,
+            "status": "available"
+        }
+        response = client.post("/api/v1/films/", json=film_data, headers=headers)
+        assert response.status_code == 201, response.text
+
+    # The page is limited, while the header carries the total number of films
+    response = client.get("/api/v1/films/?skip=0&limit=2")
+    assert response.status_code == 200, response.text
+    assert len(response.json()) == 2
+    assert response.headers["X-Total-Count"] == "3"
+
+def test_set_film_not_available(client, admin_token, max_queries):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    film_id = film_response.json()["id"]
+    for _ in range(4):
+        session_data = {
+            "film_id": film_id,
+            "datetime": (datetime.now() + timedelta(days=1)).isoformat(),
+            "price": 10.0,
+            "capacity": 5,
+            "auto_booking": False
+        }
+        session_response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+        assert session_response.status_code == 201, session_response.text
+        session = session_response.json()
+        booking_data = {"session_id": session["id"], "seat_ids": [session["seats"][0]["id"]]}
+        booking_response = client.post("/api/v1/bookings/", json=booking_data, headers=headers)
+        assert booking_response.status_code == 201, booking_response.text
+
+    # The sessions are canceled with their bookings and seats in one transaction,
+    # whatever the number of sessions
+    with max_queries(21):
+        response = client.post(f"/api/v1/films/{film_id}/status/not_available", headers=headers)
+    assert response.status_code == 200, response.text
+    film = response.json()
+    assert film["status"] == "not_available"
+    assert [session["status"] for session in film["sessions"]] == ["canceled"] * 4
+    for session in film["sessions"]:
+        assert all(seat["status"] == "canceled" for seat in session["seats"])
+        assert [booking["status"] for booking in session["bookings"]] == ["canceled"]
+
+    response = client.get(f"/api/v1/sessions/?film_id={film_id}")
+    assert [session["status"] for session in response.json()] == ["canceled"] * 4
+
+def test_read_film_summaries(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    film_id = film_response.json()["id"]
+
+    session_data = {
+        "film_id": film_id,
+        "datetime": (datetime.now() + timedelta(days=1)).isoformat(),
+        "price": 10.0,
+        "capacity": 5,
+        "auto_booking": True
+    }
+    session_response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+    assert session_response.status_code == 201, session_response.text
+    session = session_response.json()
+    seat_ids = [seat["id"] for seat in session["seats"]][:2]
+    booking_response = client.post("/api/v1/bookings/", json={"session_id": session["id"], "seat_ids": seat_ids},
+                                   headers=headers)
+    assert booking_response.status_code == 201, booking_response.text
+
+    # Film cards carry no sessions by default
+    response = client.get("/api/v1/films/")
+    assert response.status_code == 200, response.text
+    assert "sessions" not in response.json()[0]
+
+    # A film lists its sessions with seat counts instead of seats and bookings
+    response = client.get(f"/api/v1/films/{film_id}")
+    assert response.status_code == 200, response.text
+    session_summary = response.json()["sessions"][0]
+    assert session_summary["free_seats"] == 3
+    assert session_summary["reserved_seats"] == 2
+    assert "seats" not in session_summary and "bookings" not in session_summary
+
+    # The nested representation is still available on request
+    response = client.get("/api/v1/films/?expand=full")
+    assert response.status_code == 200, response.text
+    assert len(response.json()[0]["sessions"][0]["seats"]) == 5
+    response = client.get(f"/api/v1/sessions/?film_id={film_id}")
+    assert response.status_code == 200, response.text
+    assert response.json() == [session_summary]
+
+def test_catalog_query_count(client, admin_token, max_queries):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    for i in range(3):
+        film_data = {
+            "title": f"Test Film {i}",
+            "description": "A test film",
+            "duration": 120,
+            "status": "available"
+        }
+        film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+        assert film_response.status_code == 201, film_response.text
+        film_id = film_response.json()["id"]
+        for _ in range(2):
+            session_data = {
+                "film_id": film_id,
+                "datetime": (datetime.now() + timedelta(days=1)).isoformat(),
+                "price": 10.0,
+                "capacity": 5,
+                "auto_booking": False
+            }
+            session_response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+            assert session_response.status_code == 201, session_response.text
+            session = session_response.json()
+            for seat in session["seats"][:2]:
+                booking_data = {"session_id": session["id"], "seat_ids": [seat["id"]]}
+                booking_response = client.post("/api/v1/bookings/", json=booking_data, headers=headers)
+                assert booking_response.status_code == 201, booking_response.text
+
+    # Each level of the nested schemas is loaded with one query, whatever the number of rows;
+    # detail reads also look up the row versions their ETag is derived from
+    for url, limit in [
+        ("/api/v1/films/", 3),
+        ("/api/v1/films/?expand=full", 8),
+        (f"/api/v1/films/{film_id}", 4),
+        (f"/api/v1/films/{film_id}?expand=full", 8),
+        ("/api/v1/sessions/", 3),
+        ("/api/v1/sessions/?expand=full", 7),
+        (f"/api/v1/sessions/{session['id']}", 7),
+        ("/api/v1/bookings/", 5),
+    ]:
+        with max_queries(limit):
+            response = client.get(url)
+        assert response.status_code == 200, response.text
+
+def test_catalog_cache(client, admin_token, max_queries):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    film_id = film_response.json()["id"]
+
+    session_data = {
+        "film_id": film_id,
+        "datetime": (datetime.now() + timedelta(days=1)).isoformat(),
+        "price": 10.0,
+        "capacity": 5,
+        "auto_booking": True
+    }
+    session_response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+    assert session_response.status_code == 201, session_response.text
+    session = session_response.json()
+    initial_stats = client.get("/api/v1/admin/cache", headers=headers).json()
+
+    response = client.get(f"/api/v1/films/{film_id}")
+    assert response.json()["sessions"][0]["reserved_seats"] == 0
+
+    # Repeated reads are served without touching the database
+    with max_queries(0):
+        cached_response = client.get(f"/api/v1/films/{film_id}")
+    assert cached_response.json() == response.json()
+
+    # A booking reserving a seat invalidates the film including the session
+    booking_data = {"session_id": session["id"], "seat_ids": [session["seats"][0]["id"]]}
+    booking_response = client.post("/api/v1/bookings/", json=booking_data, headers=headers)
+    assert booking_response.status_code == 201, booking_response.text
+    response = client.get(f"/api/v1/films/{film_id}")
+    assert response.json()["sessions"][0]["reserved_seats"] == 1
+
+    # So does a price change, for the session itself
+    response = client.get(f"/api/v1/sessions/{session['id']}")
+    assert response.json()["price"] == 10.0
+    price_response = client.post(f"/api/v1/sessions/{session['id']}/price/12.5", headers=headers)
+    assert price_response.status_code == 200, price_response.text
+    response = client.get(f"/api/v1/sessions/{session['id']}")
+    assert response.json()["price"] == 12.5
+
+    stats_response = client.get("/api/v1/admin/cache", headers=headers)
+    assert stats_response.status_code == 200, stats_response.text
+    stats = stats_response.json()
+    assert stats["hits"] - initial_stats["hits"] == 1
+    assert stats["misses"] - initial_stats["misses"] == 4
+
+
+def test_conditional_requests(client, admin_token, max_queries):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    film_id = film_response.json()["id"]
+
+    session_data = {
+        "film_id": film_id,
+        "datetime": (datetime.now() + timedelta(days=1)).isoformat(),
+        "price": 10.0,
+        "capacity": 5,
+        "auto_booking": True
+    }
+    session_response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+    assert session_response.status_code == 201, session_response.text
+    session = session_response.json()
+
+    response = client.get(f"/api/v1/films/{film_id}")
+    etag = response.headers["ETag"]
+    with max_queries(0):
+        response = client.get(f"/api/v1/films/{film_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+    # Without a cached copy, the version lookup alone answers the conditional request
+    catalog_cache.clear()
+    with max_queries(2):
+        response = client.get(f"/api/v1/films/{film_id}", headers={"If-None-Match": f'W/{etag}, "other"'})
+    assert response.status_code == 304
+
+    # The full representation has its own ETag
+    response = client.get(f"/api/v1/films/{film_id}?expand=full", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+    # Booking a seat changes the session, and with it the film
+    session_etag = client.get(f"/api/v1/sessions/{session['id']}").headers["ETag"]
+    list_etag = client.get(f"/api/v1/sessions/?film_id={film_id}").headers["ETag"]
+    booking_data = {"session_id": session["id"], "seat_ids": [session["seats"][0]["id"]]}
+    booking_response = client.post("/api/v1/bookings/", json=booking_data, headers=headers)
+    assert booking_response.status_code == 201, booking_response.text
+
+    response = client.get(f"/api/v1/films/{film_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["sessions"][0]["reserved_seats"] == 1
+    response = client.get(f"/api/v1/sessions/{session['id']}", headers={"If-None-Match": session_etag})
+    assert response.status_code == 200
+    session_etag = response.headers["ETag"]
+    response = client.get(f"/api/v1/sessions/?film_id={film_id}", headers={"If-None-Match": list_etag})
+    assert response.status_code == 200
+
+    # So does a price change
+    price_response = client.post(f"/api/v1/sessions/{session['id']}/price/12.5", headers=headers)
+    assert price_response.status_code == 200, price_response.text
+    response = client.get(f"/api/v1/sessions/{session['id']}", headers={"If-None-Match": session_etag})
+    assert response.status_code == 200
+    assert response.json()["price"] == 12.5
@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+import stripe
+from sqlalchemy import select, update
+
+from v1.config import settings
+from v1.crud.stripe_events import process_stripe_events, reset_stripe_events
+from v1.models import OutboxMessage, Payment, PaymentStatus, Seat, SeatStatus, StripeEvent, User
+from v1.utils.tasks import update_payments
+
+
+class StripeStub(ThreadingHTTPServer):
+    """
+    Local HTTP server standing in for the Stripe API, creating Checkout Sessions like
+    Stripe does: a repeated idempotency key gets the Checkout Session of the first request.
+    """
+
+    def __init__(self, delay: float = 0):
+        super().__init__(("127.0.0.1", 0), StripeStubHandler)
+        self.delay = delay
+        self.requests = []
+        self.sessions = {}
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StripeStubHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        idempotency_key = self.headers.get("Idempotency-Key")
+        self.server.requests.append((self.path, idempotency_key, parse_qs(body)))
+        time.sleep(self.server.delay)
+        if idempotency_key not in self.server.sessions:
+            session_id = f"cs_test_{len(self.server.sessions) + 1}"
+            self.server.sessions[idempotency_key] = {
+                "id": session_id,
+                "object": "checkout.session",
+                "url": f"https://checkout.stripe.com/c/pay/{session_id}",
+            }
+        payload = json.dumps(self.server.sessions[idempotency_key]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="function")
+def stripe_stub(monkeypatch):
+    """
+    Point the Stripe client at a local stub server.
+    """
+    server = StripeStub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(stripe, "api_key", "sk_test_stub")
+    monkeypatch.setattr(stripe, "api_base", server.url)
+    monkeypatch.setattr(stripe, "max_network_retries", 0)
+    try:
+        yield server
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def create_booking(client, headers, seats: int) -> int:
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    session_data = {
+        "film_id": film_response.json()["id"],
+        "datetime": (datetime.now() + timedelta(days=1)).isoformat(),
+        "price": 10.0,
+        "capacity": 8,
+        "auto_booking": False
+    }
+    session_response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+    assert session_response.status_code == 201, session_response.text
+    seat_ids = [seat["id"] for seat in session_response.json()["seats"]][:seats]
+    booking_data = {"session_id": session_response.json()["id"], "seat_ids": seat_ids}
+    booking_response = client.post("/api/v1/bookings/", json=booking_data, headers=headers)
+    assert booking_response.status_code == 201, booking_response.text
+    return booking_response.json()["id"]
+
+
+def test_checkout_session_reuse(client, admin_token, stripe_stub):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    booking_id = create_booking(client, headers, seats=2)
+
+    response = client.post("/api/v1/payments/create-checkout-session", json={"id": "", "booking_id": booking_id},
+                           headers=headers)
+    assert response.status_code == 201, response.text
+    checkout_url = response.json()["checkout_url"]
+    assert checkout_url == "https://checkout.stripe.com/c/pay/cs_test_1"
+
+    # The Checkout Session is created with an idempotency key, for the price of the booked seats
+    path, idempotency_key, params = stripe_stub.requests[0]
+    assert path == "/v1/checkout/sessions"
+    assert idempotency_key == f"checkout-{booking_id}-2000-0"
+    assert params["line_items[0][price_data][unit_amount]"] == ["2000"]
+
+    # Paying again while the checkout is pending reuses it without calling Stripe
+    response = client.post("/api/v1/payments/create-checkout-session", json={"id": "", "booking_id": booking_id},
+                           headers=headers)
+    assert response.status_code == 201, response.text
+    assert response.json()["checkout_url"] == checkout_url
+    assert len(stripe_stub.requests) == 1
+
+    payments = client.get(f"/api/v1/bookings/{booking_id}", headers=headers).json()["payments"]
+    assert [(p["id"], p["status"]) for p in payments] == [("cs_test_1", "pending")]
+
+
+def test_checkout_session_timeout(client, admin_token, stripe_stub, monkeypatch):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    booking_id = create_booking(client, headers, seats=1)
+    monkeypatch.setattr(settings, "STRIPE_TIMEOUT", 0.2)
+    stripe_stub.delay = 1
+
+    # A slow Stripe answer fails the request without blocking the event loop, and nothing is saved
+    response = client.post("/api/v1/payments/create-checkout-session", json={"id": "", "booking_id": booking_id},
+                           headers=headers)
+    assert response.status_code == 504, response.text
+    assert client.get(f"/api/v1/bookings/{booking_id}", headers=headers).json()["payments"] == []
+
+
+def signed_webhook(client, event: dict, secret: str):
+    payload = json.dumps(event)
+    timestamp = int(time.time())
+    signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+    return client.post("/api/v1/payments/webhook", content=payload,
+                       headers={"Stripe-Signature": f"t={timestamp},v1={signature}"})
+
+
+def test_webhook_events(client, admin_token, stripe_stub, async_session_factory, monkeypatch):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    monkeypatch.setattr(settings, "STRIPE_WEBHOOK_SECRET", "whsec_test")
+    booking_id = create_booking(client, headers, seats=2)
+    response = client.post("/api/v1/payments/create-checkout-session", json={"id": "", "booking_id": booking_id},
+                           headers=headers)
+    assert response.status_code == 201, response.text
+
+    event = {
+        "id": "evt_1",
+        "object": "event",
+        "type": "checkout.session.completed",
+        "data": {"object": {"id": "cs_test_1", "object": "checkout.session"}},
+    }
+    response = signed_webhook(client, event, "wrong_secret")
+    assert response.status_code == 400, response.text
+
+    # The event is stored once however often Stripe delivers it, and applied later
+    for _ in range(2):
+        response = signed_webhook(client, event, "whsec_test")
+        assert response.status_code == 200, response.text
+    booking = client.get(f"/api/v1/bookings/{booking_id}", headers=headers).json()
+    assert booking["status"] == "pending"
+    assert booking["payments"][0]["status"] == "pending"
+
+    async def process():
+        async with async_session_factory() as db:
+            processed = await process_stripe_events(db, batch_size=10)
+        async with async_session_factory() as db:
+            result = await db.execute(select(StripeEvent))
+            return processed, [(e.id, e.processed_at is not None, e.error) for e in result.scalars().all()]
+
+    assert asyncio.run(process()) == (1, [("evt_1", True, None)])
+    assert asyncio.run(process()) == (0, [("evt_1", True, None)])
+
+    # The processor completes the payment and confirms the booking
+    booking = client.get(f"/api/v1/bookings/{booking_id}", headers=headers).json()
+    assert booking["status"] == "confirmed"
+    assert booking["payments"][0]["status"] == "completed"
+    assert all(reservation["status"] == "confirmed" for reservation in booking["reservations"])
+
+    # An event that cannot be applied is recorded with its error and can be replayed
+    signed_webhook(client, {**event, "id": "evt_2", "data": {"object": {"id": "cs_unknown"}}}, "whsec_test")
+    processed, events = asyncio.run(process())
+    assert processed == 1
+    assert events[1] == ("evt_2", True, "Payment cs_unknown not found")
+
+    async def replay():
+        async with async_session_factory() as db:
+            return await reset_stripe_events(db)
+
+    assert asyncio.run(replay()) == 1
+    assert asyncio.run(process())[0] == 1
+
+
+def test_failed_event_in_batch(client, admin_token, stripe_stub, db_session, async_session_factory, monkeypatch):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    monkeypatch.setattr(settings, "STRIPE_WEBHOOK_SECRET", "whsec_test")
+    booking_ids = [create_booking(client, headers, seats=1) for _ in range(2)]
+    for booking_id in booking_ids:
+        response = client.post("/api/v1/payments/create-checkout-session", json={"id": "", "booking_id": booking_id},
+                               headers=headers)
+        assert response.status_code == 201, response.text
+
+    # The seat of the second booking is taken meanwhile, so its booking cannot be confirmed
+    seat_id = client.get(f"/api/v1/bookings/{booking_ids[1]}", headers=headers).json()["reservations"][0]["seat_id"]
+    db_session.execute(update(Seat).where(Seat.id == seat_id).values(status=SeatStatus.RESERVED))
+    db_session.commit()
+    for event_id, session_id in [("evt_a", "cs_test_1"), ("evt_b", "cs_test_2")]:
+        event = {
+            "id": event_id,
+            "object": "event",
+            "type": "checkout.session.completed",
+            "data": {"object": {"id": session_id, "object": "checkout.session"}},
+        }
+        assert signed_webhook(client, event, "whsec_test").status_code == 200
+
+    async def process():
+        async with async_session_factory() as db:
+            processed = await process_stripe_events(db, batch_size=10)
+        async with async_session_factory() as db:
+            result = await db.execute(select(StripeEvent).order_by(StripeEvent.id))
+            return processed, [(e.id, e.processed_at is not None, e.error) for e in result.scalars().all()]
+
+    # Only the confirmation of the second booking is rolled back; the customer has paid,
+    # so its payment is completed and the event is recorded with the error for manual handling
+    processed, events = asyncio.run(process())
+    assert processed == 2
+    assert events[0] == ("evt_a", True, None)
+    assert events[1] == ("evt_b", True, f"Payment cs_test_2 completed but booking {booking_ids[1]} not confirmed: "
+                                        "Seat is already reserved")
+    booking = client.get(f"/api/v1/bookings/{booking_ids[0]}", headers=headers).json()
+    assert booking["status"] == "confirmed"
+    assert booking["payments"][0]["status"] == "completed"
+    booking = client.get(f"/api/v1/bookings/{booking_ids[1]}", headers=headers).json()
+    assert booking["status"] == "pending"
+    assert booking["payments"][0]["status"] == "completed"
+
+
+def test_expire_pending_payments(client, admin_token, db_session, async_session_factory, max_queries):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    booking_ids = [create_booking(client, headers, seats=1) for _ in range(3)]
+    stale = datetime.utcnow() - timedelta(minutes=30)
+    db_session.add_all([
+        Payment(id="cs_stale_1", booking_id=booking_ids[0], amount=1000, status=PaymentStatus.PENDING, timestamp=stale),
+        Payment(id="cs_stale_2", booking_id=booking_ids[0], amount=1000, status=PaymentStatus.PENDING, timestamp=stale),
+        Payment(id="cs_stale_3", booking_id=booking_ids[1], amount=1000, status=PaymentStatus.PENDING, timestamp=stale),
+        Payment(id="cs_paid", booking_id=booking_ids[2], amount=1000, status=PaymentStatus.COMPLETED, timestamp=stale),
+        Payment(id="cs_fresh", booking_id=booking_ids[2], amount=1000, status=PaymentStatus.PENDING),
+    ])
+    db_session.execute(update(User).values(notifications=True))
+    db_session.commit()
+
+    async def expire():
+        async with async_session_factory() as db:
+            return await update_payments(db)
+
+    # The stale pending payments are failed by one statement, returning their bookings,
+    # and the users of the bookings are told to pay again, SQLite inserting one message at a time
+    with max_queries(6):
+        assert asyncio.run(expire()) == booking_ids[:2]
+    messages = db_session.execute(select(OutboxMessage.payload)).scalars().all()
+    assert [(message["subject"], message["body"].split()[4]) for message in messages] == [
+        ("Payment Expired", str(booking_ids[0])), ("Payment Expired", str(booking_ids[1])),
+    ]
+    statuses = {payment["id"]: payment["status"]
+                for booking_id in booking_ids
+                for payment in client.get(f"/api/v1/bookings/{booking_id}", headers=headers).json()["payments"]}
+    assert statuses == {"cs_stale_1": "failed", "cs_stale_2": "failed", "cs_stale_3": "failed",
+                        "cs_paid": "completed", "cs_fresh": "pending"}
+    assert asyncio.run(expire()) == []
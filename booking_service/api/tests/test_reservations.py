@@ -1,6 +1,11 @@
+import asyncio
 import pytest
 from datetime import datetime, timedelta
 
+from fastapi import HTTPException
+
+from v1.crud.seats import claim_seats
+
 def test_create_reservation(client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
 
@@ -231,3 +236,64 @@ def test_cancel_reservation(client, admin_token):
     cancel_response = client.delete(f"/api/v1/reservations/{reservation_id}/cancel", headers=user_headers)
     assert cancel_response.status_code == 200, cancel_response.text
     assert cancel_response.json()["status"] == "canceled"
+
+def test_concurrent_seat_claims(client, admin_token, async_session_factory):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    film_id = film_response.json()["id"]
+
+    session_data = {
+        "film_id": film_id,
+        "datetime": (datetime.now() + timedelta(days=1)).isoformat(),
+        "price": 10.0,
+        "capacity": 4,
+        "auto_booking": True
+    }
+    session_response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+    assert session_response.status_code == 201, session_response.text
+    session_id = session_response.json()["id"]
+    seat_ids = [seat["id"] for seat in session_response.json()["seats"]]
+
+    async def claim(seats):
+        async with async_session_factory() as db:
+            try:
+                await claim_seats(db, seats)
+                await db.commit()
+                return True
+            except HTTPException:
+                return False
+
+    async def rush():
+        # Overlapping claims on the first seat race with each other
+        claims = [[seat_ids[0]]] * 10 + [[seat_ids[0], seat_ids[1]]] * 5 + [[seat_ids[2]]]
+        return await asyncio.gather(*(claim(seats) for seats in claims))
+
+    results = asyncio.run(rush())
+    assert sum(results[:15]) == 1
+    assert results[15]
+
+    seats = {seat["id"]: seat["status"] for seat in client.get(f"/api/v1/sessions/{session_id}").json()["seats"]}
+    assert seats[seat_ids[0]] == seats[seat_ids[2]] == "reserved"
+    assert seats[seat_ids[3]] == "available"
+    # A multi-seat claim either takes every seat or none
+    assert seats[seat_ids[1]] == ("reserved" if any(results[10:15]) else "available")
+
+    async def claim_missing():
+        async with async_session_factory() as db:
+            with pytest.raises(HTTPException) as excinfo:
+                await claim_seats(db, [seat_ids[3], 999999])
+            # The failed claim leaves the transaction to the caller
+            assert db.in_transaction()
+            await db.rollback()
+        return excinfo.value
+
+    error = asyncio.run(claim_missing())
+    assert (error.status_code, error.detail) == (404, "Seat not found")
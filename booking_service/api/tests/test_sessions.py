@@ -1,6 +1,11 @@
+import asyncio
 import pytest
 from datetime import datetime, timedelta
 
+from v1.crud.sessions import sweep_session_statuses
+from v1.models import SeatStatus, SessionStatus
+from v1.utils.seatmap import decode_seat_map
+
 def test_create_session(client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
 
@@ -27,6 +32,29 @@ def test_create_session(client, admin_token):
     assert response.status_code == 201, response.text
     assert "id" in response.json()
 
+def test_create_session_with_offset(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+
+    # A time with an offset is stored as naive UTC
+    session_data = {
+        "film_id": film_response.json()["id"],
+        "datetime": "2030-01-01T20:00:00+02:00",
+        "price": 10.0,
+        "capacity": 10,
+        "auto_booking": True
+    }
+    response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+    assert response.status_code == 201, response.text
+    assert response.json()["datetime"] == "2030-01-01T18:00:00"
+
 def test_delete_session(client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
 
@@ -129,3 +157,251 @@ def test_set_session_price(client, admin_token):
     price_response = client.post(f"/api/v1/sessions/{session_id}/price/{new_price}", headers=headers)
     assert price_response.status_code == 200, price_response.text
     assert price_response.json()["price"] == new_price
+
+def test_create_session_materializes_seats(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    # Create a film first
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    film_id = film_response.json()["id"]
+
+    # Create a large session
+    session_data = {
+        "film_id": film_id,
+        "datetime": (datetime.now() + timedelta(days=1)).isoformat(),
+        "price": 10.0,
+        "capacity": 2000,
+        "auto_booking": False
+    }
+    response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+    assert response.status_code == 201, response.text
+    seats = response.json()["seats"]
+    assert len(seats) == 2000
+    assert all(seat["status"] == "available" for seat in seats)
+    assert len({seat["id"] for seat in seats}) == 2000
+
+def test_read_session_seat_map(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    # Create a film first
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    film_id = film_response.json()["id"]
+
+    # Create an auto-booking session
+    session_data = {
+        "film_id": film_id,
+        "datetime": (datetime.now() + timedelta(days=1)).isoformat(),
+        "price": 10.0,
+        "capacity": 50,
+        "auto_booking": True
+    }
+    session_response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+    assert session_response.status_code == 201, session_response.text
+    session = session_response.json()
+    seat_ids = sorted(seat["id"] for seat in session["seats"])
+
+    seatmap_response = client.get(f"/api/v1/sessions/{session['id']}/seatmap")
+    assert seatmap_response.status_code == 200, seatmap_response.text
+    seat_map = seatmap_response.json()
+    assert seat_map["capacity"] == 50
+    assert decode_seat_map(seat_map["states"], seat_map["seat_id_runs"]) == [
+        (seat_id, SeatStatus.AVAILABLE) for seat_id in seat_ids
+    ]
+
+    # Reserve a seat, which must be reflected in a new seat map version
+    booking_response = client.post("/api/v1/bookings/", json={"session_id": session["id"]}, headers=headers)
+    assert booking_response.status_code == 201, booking_response.text
+    reservation_data = {"booking_id": booking_response.json()["id"], "seat_id": seat_ids[0]}
+    reservation_response = client.post("/api/v1/reservations/", json=reservation_data, headers=headers)
+    assert reservation_response.status_code == 201, reservation_response.text
+
+    seatmap_response = client.get(f"/api/v1/sessions/{session['id']}/seatmap")
+    assert seatmap_response.status_code == 200, seatmap_response.text
+    updated_seat_map = seatmap_response.json()
+    assert updated_seat_map["version"] > seat_map["version"]
+    seats = decode_seat_map(updated_seat_map["states"], updated_seat_map["seat_id_runs"])
+    assert seats[0] == (seat_ids[0], SeatStatus.RESERVED)
+    assert all(seat_status == SeatStatus.AVAILABLE for _, seat_status in seats[1:])
+
+    # An unchanged seat map is revalidated with its ETag
+    seatmap_response = client.get(f"/api/v1/sessions/{session['id']}/seatmap",
+                                  headers={"If-None-Match": seatmap_response.headers["ETag"]})
+    assert seatmap_response.status_code == 304, seatmap_response.text
+
+    # The summary of the session counts the seats instead of listing them
+    summary_response = client.get(f"/api/v1/sessions/{session['id']}/summary")
+    assert summary_response.status_code == 200, summary_response.text
+    summary = summary_response.json()
+    assert "seats" not in summary and "bookings" not in summary
+    assert (summary["free_seats"], summary["reserved_seats"]) == (49, 1)
+
+def test_read_nonexistent_session_seat_map(client):
+    response = client.get("/api/v1/sessions/9999/seatmap")
+    assert response.status_code == 404, response.text
+    assert response.json()["detail"] == "Session not found"
+    response = client.get("/api/v1/sessions/9999/summary")
+    assert response.status_code == 404, response.text
+
+def test_sweep_session_statuses(client, admin_token, async_session_factory):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    film_id = film_response.json()["id"]
+
+    now = datetime.utcnow()
+    session_ids = {}
+    for name, start in (("upcoming", now + timedelta(days=1)),
+                        ("started", now - timedelta(minutes=10)),
+                        ("ended", now - timedelta(hours=3))):
+        session_data = {
+            "film_id": film_id,
+            "datetime": start.isoformat(),
+            "price": 10.0,
+            "capacity": 3,
+            "auto_booking": False
+        }
+        response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+        assert response.status_code == 201, response.text
+        session_ids[name] = response.json()["id"]
+
+    async def sweep():
+        async with async_session_factory() as db:
+            return await sweep_session_statuses(db, now)
+
+    swept = asyncio.run(sweep())
+    assert swept[SessionStatus.NOW_PLAYING] == [session_ids["started"]]
+    assert swept[SessionStatus.COMPLETED] == [session_ids["ended"]]
+
+    expected = {"upcoming": "upcoming", "started": "now_playing", "ended": "completed"}
+    for name, session_id in session_ids.items():
+        response = client.get(f"/api/v1/sessions/{session_id}")
+        assert response.status_code == 200, response.text
+        assert response.json()["status"] == expected[name]
+    ended = client.get(f"/api/v1/sessions/{session_ids['ended']}").json()
+    assert all(seat["status"] == SeatStatus.RESERVED.value for seat in ended["seats"])
+
+    # A second run finds nothing left to move
+    swept = asyncio.run(sweep())
+    assert swept == {SessionStatus.NOW_PLAYING: [], SessionStatus.COMPLETED: []}
+
+def test_cancel_session_cascade_query_count(client, admin_token, max_queries):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    film_id = film_response.json()["id"]
+
+    session_data = {
+        "film_id": film_id,
+        "datetime": (datetime.now() + timedelta(days=1)).isoformat(),
+        "price": 10.0,
+        "capacity": 200,
+        "auto_booking": False
+    }
+    session_response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+    assert session_response.status_code == 201, session_response.text
+    session_id = session_response.json()["id"]
+    seat_ids = [seat["id"] for seat in session_response.json()["seats"]]
+
+    booking_ids = []
+    for seats in (seat_ids[:2], seat_ids[2:5]):
+        booking_response = client.post("/api/v1/bookings/", json={"session_id": session_id}, headers=headers)
+        assert booking_response.status_code == 201, booking_response.text
+        booking_id = booking_response.json()["id"]
+        booking_ids.append(booking_id)
+        for seat_id in seats:
+            reservation_data = {"booking_id": booking_id, "seat_id": seat_id}
+            reservation_response = client.post("/api/v1/reservations/", json=reservation_data, headers=headers)
+            assert reservation_response.status_code == 201, reservation_response.text
+
+    # The cascade does not grow with the number of seats, bookings or reservations
+    with max_queries(15):
+        status_response = client.post(f"/api/v1/sessions/{session_id}/status/canceled", headers=headers)
+    assert status_response.status_code == 200, status_response.text
+
+    db_session = status_response.json()
+    assert db_session["status"] == "canceled"
+    assert all(seat["status"] == SeatStatus.CANCELED.value for seat in db_session["seats"])
+    for booking in db_session["bookings"]:
+        assert booking["status"] == "canceled"
+        assert all(reservation["status"] == "canceled" for reservation in booking["reservations"])
+
+    for booking_id in booking_ids:
+        response = client.get(f"/api/v1/bookings/{booking_id}")
+        assert response.json()["status"] == "canceled"
+        assert all(reservation["status"] == "canceled" for reservation in response.json()["reservations"])
+
+def test_read_sessions_cursor_pagination(client, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    film_data = {
+        "title": "Test Film",
+        "description": "A test film",
+        "duration": 120,
+        "status": "available"
+    }
+    film_response = client.post("/api/v1/films/", json=film_data, headers=headers)
+    assert film_response.status_code == 201, film_response.text
+    film_id = film_response.json()["id"]
+
+    # Sessions created out of order, two of them starting at the same time
+    start = datetime.now() + timedelta(days=1)
+    for hours in (3, 1, 2, 1, 0):
+        session_data = {
+            "film_id": film_id,
+            "datetime": (start + timedelta(hours=hours)).isoformat(),
+            "price": 10.0,
+            "capacity": 1,
+            "auto_booking": False
+        }
+        session_response = client.post("/api/v1/sessions/", json=session_data, headers=headers)
+        assert session_response.status_code == 201, session_response.text
+
+    pages = []
+    cursor = None
+    while True:
+        params = {"limit": 2} if cursor is None else {"limit": 2, "cursor": cursor}
+        response = client.get("/api/v1/sessions/", params=params)
+        assert response.status_code == 200, response.text
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    # Every session is returned once, in (start time, id) order
+    sessions = [session for page in pages for session in page]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [(session["datetime"], session["id"]) for session in sessions] == \
+        sorted((session["datetime"], session["id"]) for session in sessions)
+    assert len({session["id"] for session in sessions}) == 5
+
+    response = client.get("/api/v1/sessions/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"] == "Invalid cursor"
@@ -1,4 +1,9 @@
+import asyncio
 import pytest
+from sqlalchemy import select
+
+from v1.crud.outbox import relay_outbox_messages
+from v1.models import OutboxMessage
 
 def test_change_nickname(client, admin_token):
     headers = {"Authorization": f"Bearer {admin_token}"}
@@ -14,3 +19,69 @@ def test_change_nickname(client, admin_token):
     # Negative test case: Change nickname for non-existent user
     response = client.put("/api/v1/user/change_nickname/NonExistentUser/NewNickname", headers=headers)
     assert response.status_code == 404, response.text
+
+
+class RecordingPublisher:
+    """
+    Publisher keeping the published messages instead of sending them to RabbitMQ.
+    """
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.published = []
+
+    async def publish_batch(self, queue, payloads):
+        if self.fail:
+            raise ConnectionError("broker unavailable")
+        self.published.extend((queue, payload) for payload in payloads)
+
+
+def test_notifications_outbox(client, admin_token, async_session_factory):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    # The confirmation is written to the outbox instead of being published inline
+    response = client.post("/api/v1/email/subscribe/", headers=headers)
+    assert response.status_code == 200, response.text
+    response = client.post("/api/v1/email/unsubscribe/", headers=headers)
+    assert response.status_code == 200, response.text
+
+    async def relay(publisher):
+        async with async_session_factory() as db:
+            relayed = await relay_outbox_messages(db, publisher, batch_size=1)
+        async with async_session_factory() as db:
+            result = await db.execute(select(OutboxMessage.id))
+            return relayed, len(result.scalars().all())
+
+    # Messages stay in the outbox while the broker is unavailable
+    with pytest.raises(ConnectionError):
+        asyncio.run(relay(RecordingPublisher(fail=True)))
+
+    publisher = RecordingPublisher()
+    assert asyncio.run(relay(publisher)) == (1, 1)
+    assert asyncio.run(relay(publisher)) == (1, 0)
+    assert asyncio.run(relay(publisher)) == (0, 0)
+    assert [(queue, payload["subject"]) for queue, payload in publisher.published] == [
+        ("booking_notifications", "Subscription to Booking Notifications"),
+        ("booking_notifications", "Unsubscription from Booking Notifications"),
+    ]
+    assert publisher.published[0][1]["recipients"] == ["admin@example.com"]
+
+
+def test_current_user_cache(client, admin_token, query_counter, max_queries):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    response = client.get("/api/v1/admin/cache", headers=headers)
+    assert response.status_code == 200, response.text
+
+    # The authenticated user is served from the cache
+    with max_queries(0):
+        response = client.get("/api/v1/admin/cache", headers=headers)
+    assert response.status_code == 200, response.text
+
+    # Writes through crud.users drop the cached user
+    response = client.put("/api/v1/user/change_nickname/NewNickname", headers=headers)
+    assert response.status_code == 200, response.text
+    query_counter.clear()
+    response = client.get("/api/v1/admin/cache", headers=headers)
+    assert response.status_code == 200, response.text
+    assert any("FROM users" in statement for statement in query_counter)
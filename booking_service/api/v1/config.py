@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 import os
+from typing import Optional
 
 class Settings(BaseSettings):
     """
@@ -22,6 +23,22 @@ class Settings(BaseSettings):
         MAIL_SSL_TLS (bool): Whether to use SSL/TLS for the mail server.
         USE_CREDENTIALS (bool): Whether to use credentials for the mail server.
         MAIN_ADMIN (str): Main administrator's email.
+        CATALOG_CACHE_TTL (float): Seconds a cached catalog response is served for.
+        CATALOG_CACHE_MAXSIZE (int): Maximum number of cached catalog responses.
+        RABBITMQ_CHANNEL_POOL_SIZE (int): Maximum number of channels the message publisher opens.
+        RABBITMQ_CONFIRM_TIMEOUT (float): Seconds to wait for the broker to confirm a published message.
+        OUTBOX_RELAY_INTERVAL (float): Seconds between two runs of the outbox relay.
+        OUTBOX_BATCH_SIZE (int): Maximum number of outbox messages relayed in one batch.
+        BCRYPT_ROUNDS (int): Cost factor of password hashes; hashes with another cost are rehashed on login.
+        PASSWORD_HASH_WORKERS (int): Maximum number of passwords hashed or verified at the same time.
+        USER_CACHE_TTL (float): Seconds an authenticated user is served from the cache, bounding how stale it can be.
+        USER_CACHE_MAXSIZE (int): Maximum number of cached authenticated users.
+        STRIPE_API_KEY (str): Secret key of the Stripe account.
+        STRIPE_API_BASE (str): Base URL of the Stripe API, e.g. a local stripe-mock server in tests.
+        STRIPE_TIMEOUT (float): Seconds a Stripe API call may take before it is abandoned.
+        STRIPE_WEBHOOK_SECRET (str): Secret used to verify the signature of Stripe webhook events.
+        STRIPE_EVENTS_INTERVAL (float): Seconds between two runs of the Stripe event processor.
+        STRIPE_EVENTS_BATCH_SIZE (int): Maximum number of Stripe events applied in one transaction.
     """
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALGORITHM: str = os.getenv("ALGORITHM")
@@ -38,6 +55,22 @@ class Settings(BaseSettings):
     MAIL_SSL_TLS: bool = os.getenv("MAIL_SSL_TLS") == 'true'
     USE_CREDENTIALS: bool = os.getenv("USE_CREDENTIALS") == 'true'
     MAIN_ADMIN: str = os.getenv("MAIN_ADMIN")
+    CATALOG_CACHE_TTL: float = float(os.getenv("CATALOG_CACHE_TTL", "30"))
+    CATALOG_CACHE_MAXSIZE: int = int(os.getenv("CATALOG_CACHE_MAXSIZE", "1024"))
+    RABBITMQ_CHANNEL_POOL_SIZE: int = int(os.getenv("RABBITMQ_CHANNEL_POOL_SIZE", "10"))
+    RABBITMQ_CONFIRM_TIMEOUT: float = float(os.getenv("RABBITMQ_CONFIRM_TIMEOUT", "5"))
+    OUTBOX_RELAY_INTERVAL: float = float(os.getenv("OUTBOX_RELAY_INTERVAL", "2"))
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+    BCRYPT_ROUNDS: int = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    USER_CACHE_TTL: float = float(os.getenv("USER_CACHE_TTL", "10"))
+    USER_CACHE_MAXSIZE: int = int(os.getenv("USER_CACHE_MAXSIZE", "4096"))
+    STRIPE_API_KEY: Optional[str] = os.getenv("STRIPE_API_KEY")
+    STRIPE_API_BASE: str = os.getenv("STRIPE_API_BASE", "https://api.stripe.com")
+    STRIPE_TIMEOUT: float = float(os.getenv("STRIPE_TIMEOUT", "10"))
+    STRIPE_WEBHOOK_SECRET: Optional[str] = os.getenv("STRIPE_WEBHOOK_SECRET")
+    STRIPE_EVENTS_INTERVAL: float = float(os.getenv("STRIPE_EVENTS_INTERVAL", "2"))
+    STRIPE_EVENTS_BATCH_SIZE: int = int(os.getenv("STRIPE_EVENTS_BATCH_SIZE", "100"))
 
 # Create an instance of the Settings class
 settings = Settings()
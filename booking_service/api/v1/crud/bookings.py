@@ -1,24 +1,35 @@
 from typing import Optional, List
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 import logging
 
-from ..models import Session as SessionModel, Booking, Reservation, BookingStatus, ReservationStatus, SessionStatus
+from ..models import (Session as SessionModel, Booking, Reservation, Seat, BookingStatus, ReservationStatus,
+                      SessionStatus, SeatStatus)
 from ..schemas import BookingCreate
 
-from .reservations import update_reservation_status, get_reservations
+from .loaders import BOOKING_LOADERS
+from .seats import bump_seatmap_version, claim_seats
+from .versions import bump_session_versions
+from ..utils.pagination import paginate
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# Unique ordering of booking listings, used for keyset pagination
+BOOKING_ORDER = (Booking.id,)
 
-def create_booking(db: Session, booking: BookingCreate, user_id: int) -> Booking:
+
+async def create_booking(db: AsyncSession, booking: BookingCreate, user_id: int) -> Booking:
     """
     Create a new booking for a session.
 
+    The seats listed in the booking are validated and reserved together with the
+    booking in a single transaction.
+
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         booking (BookingCreate): The booking creation schema.
         user_id (int): The ID of the user creating the booking.
 
@@ -26,10 +37,14 @@ def create_booking(db: Session, booking: BookingCreate, user_id: int) -> Booking
         Booking: The created booking.
 
     Raises:
-        HTTPException: If the session is not found or if the session status is not upcoming.
+        HTTPException: If the session is not found, if the session status is not upcoming
+            or if a seat is not available in the session.
     """
     logger.info(f"Creating booking for session_id: {booking.session_id} and user_id: {user_id}")
-    db_session = db.query(SessionModel).filter(SessionModel.id == booking.session_id).first()
+    result = await db.execute(
+        select(SessionModel.status, SessionModel.auto_booking).where(SessionModel.id == booking.session_id)
+    )
+    db_session = result.first()
     if not db_session:
         logger.error(f"Session with id {booking.session_id} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
@@ -38,42 +53,59 @@ def create_booking(db: Session, booking: BookingCreate, user_id: int) -> Booking
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Cannot create booking for a session that is not upcoming")
 
-    db_booking = Booking(**booking.dict(), user_id=user_id)
+    seat_ids = list(dict.fromkeys(booking.seat_ids))
+    if seat_ids:
+        result = await db.execute(select(Seat.id, Seat.session_id, Seat.status).where(Seat.id.in_(seat_ids)))
+        seats = {seat.id: seat for seat in result}
+        for seat_id in seat_ids:
+            seat = seats.get(seat_id)
+            if not seat or seat.session_id != booking.session_id:
+                logger.error(f"Seat with id {seat_id} not found in session {booking.session_id}")
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Seat not found")
+            if seat.status != SeatStatus.AVAILABLE:
+                logger.error(f"Seat with id {seat_id} is already reserved")
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Seat is already reserved")
+
+    db_booking = Booking(**booking.dict(exclude={"seat_ids"}), user_id=user_id)
+    db_booking.reservations = [Reservation(seat_id=seat_id) for seat_id in seat_ids]
     db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
-    logger.info(f"Booking created with id {db_booking.id}")
+    await db.flush()
+    await bump_session_versions(db, [booking.session_id])
+    logger.info(f"Booking created with id {db_booking.id} and {len(seat_ids)} reservations")
     if db_session.auto_booking:
-        update_booking_status(db, db_booking.id, BookingStatus.CONFIRMED)
-    return db_booking
+        await update_booking_status(db, db_booking.id, BookingStatus.CONFIRMED)
+    else:
+        await db.commit()
+    return await get_booking(db, db_booking.id)
 
 
-def delete_booking(db: Session, booking_id: int) -> Booking:
+async def delete_booking(db: AsyncSession, booking_id: int) -> Booking:
     """
     Delete a booking by its ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         booking_id (int): The ID of the booking to delete.
 
     Returns:
         Booking: The deleted booking.
     """
     logger.info(f"Deleting booking with id {booking_id}")
-    db_booking = get_booking(db, booking_id)
+    db_booking = await get_booking(db, booking_id)
 
-    db.delete(db_booking)
-    db.commit()
+    await db.delete(db_booking)
+    await bump_session_versions(db, [db_booking.session_id])
+    await db.commit()
     logger.info(f"Booking with id {booking_id} deleted")
     return db_booking
 
 
-def update_booking_status(db: Session, booking_id: int, new_status: BookingStatus) -> Booking:
+async def update_booking_status(db: AsyncSession, booking_id: int, new_status: BookingStatus) -> Booking:
     """
     Update the status of a booking.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         booking_id (int): The ID of the booking to update.
         new_status (BookingStatus): The new status of the booking.
 
@@ -84,39 +116,112 @@ def update_booking_status(db: Session, booking_id: int, new_status: BookingStatu
         HTTPException: If the new status is pending or the booking is not found.
     """
     logger.info(f"Updating status of booking id {booking_id} to {new_status}")
-    db_booking = get_booking(db, booking_id)
+    db_booking = await get_booking(db, booking_id)
     if not db_booking:
         logger.error(f"Booking with id {booking_id} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found")
 
+    await apply_booking_status(db, db_booking, new_status)
+    await db.commit()
+    logger.info(f"Status of booking id {booking_id} updated to {new_status}")
+    return db_booking
+
+
+async def apply_booking_status(db: AsyncSession, db_booking: Booking, new_status: BookingStatus) -> None:
+    """
+    Change the status of a loaded booking, cascading to its reservations and seats.
+
+    Confirming a booking claims its seats and cancels the pending bookings holding any of
+    them; canceling it releases its seats. The caller is responsible for committing the
+    transaction.
+
+    Args:
+        db (AsyncSession): The database session.
+        db_booking (Booking): The booking, loaded with its reservations.
+        new_status (BookingStatus): The new status of the booking.
+
+    Raises:
+        HTTPException: If the new status is pending or the booking has canceled reservations.
+    """
+    booking_id = db_booking.id
     if new_status == BookingStatus.PENDING:
         logger.error(f"Cannot change status of confirmed or canceled booking to pending. Booking ID: {booking_id}")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                             detail="Cannot change status of confirmed or canceled booking to pending")
 
-    db_booking.status = new_status
     if new_status == BookingStatus.CONFIRMED:
-        for reservation in db_booking.reservations:
-            update_reservation_status(db, reservation.id, ReservationStatus.CONFIRMED)
-            canceled_reservations = get_reservations(db, seat_id=reservation.seat_id,
-                                                     reservation_status=ReservationStatus.PENDING)
-            for canceled_reservation in canceled_reservations:
-                update_booking_status(db, canceled_reservation.booking_id, BookingStatus.CANCELED)
+        if any(reservation.status == ReservationStatus.CANCELED for reservation in db_booking.reservations):
+            logger.error(f"Cannot confirm booking id {booking_id} with canceled reservations")
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="Cannot change status of canceled reservation")
+
+        # Bookings holding a pending reservation on any seat of this booking lose the seat
+        seat_ids = select(Reservation.seat_id).where(Reservation.booking_id == booking_id)
+        result = await db.execute(
+            select(Reservation.booking_id).distinct()
+            .where(Reservation.seat_id.in_(seat_ids),
+                   Reservation.status == ReservationStatus.PENDING,
+                   Reservation.booking_id != booking_id)
+        )
+        conflicting_booking_ids = result.scalars().all()
+        logger.info(f"Canceling bookings {conflicting_booking_ids} conflicting with booking id {booking_id}")
+        await cancel_bookings(db, conflicting_booking_ids)
+
+        await claim_seats(db, [reservation.seat_id for reservation in db_booking.reservations
+                               if reservation.status == ReservationStatus.PENDING])
+        await db.execute(
+            update(Reservation)
+            .where(Reservation.booking_id == booking_id, Reservation.status == ReservationStatus.PENDING)
+            .values(status=ReservationStatus.CONFIRMED)
+        )
     elif new_status == BookingStatus.CANCELED:
-        for reservation in db_booking.reservations:
-            update_reservation_status(db, reservation.id, ReservationStatus.CANCELED)
+        await cancel_bookings(db, [booking_id])
+
+    db_booking.status = new_status
+    await bump_session_versions(db, [db_booking.session_id])
 
-    db.commit()
-    logger.info(f"Status of booking id {booking_id} updated to {new_status}")
-    return db_booking
 
+async def cancel_bookings(db: AsyncSession, booking_ids: List[int]) -> None:
+    """
+    Cancel bookings together with their reservations.
 
-def get_booking(db: Session, booking_id: int) -> Booking:
+    Seats held by confirmed reservations are released. The caller is responsible
+    for bumping the versions of the sessions and committing the transaction.
+
+    Args:
+        db (AsyncSession): The database session.
+        booking_ids (List[int]): The IDs of the bookings to cancel.
+    """
+    if not booking_ids:
+        return
+    result = await db.execute(
+        update(Seat)
+        .where(Seat.id.in_(select(Reservation.seat_id).where(Reservation.booking_id.in_(booking_ids),
+                                                              Reservation.status == ReservationStatus.CONFIRMED)),
+               Seat.status != SeatStatus.CANCELED)
+        .values(status=SeatStatus.AVAILABLE)
+        .returning(Seat.session_id)
+    )
+    released_session_ids = set(result.scalars().all())
+    await db.execute(
+        update(Reservation)
+        .where(Reservation.booking_id.in_(booking_ids), Reservation.status != ReservationStatus.CANCELED)
+        .values(status=ReservationStatus.CANCELED)
+    )
+    await db.execute(
+        update(Booking)
+        .where(Booking.id.in_(booking_ids))
+        .values(status=BookingStatus.CANCELED)
+    )
+    await bump_seatmap_version(db, list(released_session_ids))
+
+
+async def get_booking(db: AsyncSession, booking_id: int) -> Booking:
     """
     Retrieve a booking by its ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         booking_id (int): The ID of the booking to retrieve.
 
     Returns:
@@ -126,23 +231,25 @@ def get_booking(db: Session, booking_id: int) -> Booking:
         HTTPException: If the booking is not found.
     """
     logger.info(f"Retrieving booking with id {booking_id}")
-    db_booking = db.query(Booking).filter(Booking.id == booking_id).first()
+    result = await db.execute(select(Booking).where(Booking.id == booking_id).options(*BOOKING_LOADERS))
+    db_booking = result.scalars().first()
     if not db_booking:
         logger.error(f"Booking with id {booking_id} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Booking not found")
     return db_booking
 
 
-def get_bookings(db: Session, skip: Optional[int] = None, limit: Optional[int] = None,
-                 user_id: Optional[int] = None, session_id: Optional[int] = None,
-                 booking_status: Optional[BookingStatus] = None) -> List[Booking]:
+async def get_bookings(db: AsyncSession, skip: Optional[int] = None, limit: Optional[int] = None,
+                       cursor: Optional[str] = None, user_id: Optional[int] = None, session_id: Optional[int] = None,
+                       booking_status: Optional[BookingStatus] = None) -> List[Booking]:
     """
     Retrieve a list of bookings with optional filters.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         skip (Optional[int]): Number of records to skip.
         limit (Optional[int]): Maximum number of records to return.
+        cursor (Optional[str]): The cursor of the previous page.
         user_id (Optional[int]): Filter by user ID.
         session_id (Optional[int]): Filter by session ID.
         booking_status (Optional[BookingStatus]): Filter by booking status.
@@ -152,7 +259,7 @@ def get_bookings(db: Session, skip: Optional[int] = None, limit: Optional[int] =
     """
     logger.info(
         f"Retrieving bookings with filters - skip: {skip}, limit: {limit}, user_id: {user_id}, session_id: {session_id}, booking_status: {booking_status}")
-    query = db.query(Booking)
+    query = select(Booking).options(*BOOKING_LOADERS)
 
     if user_id is not None:
         query = query.filter(Booking.user_id == user_id)
@@ -163,12 +270,38 @@ def get_bookings(db: Session, skip: Optional[int] = None, limit: Optional[int] =
     if booking_status is not None:
         query = query.filter(Booking.status == booking_status)
 
-    if skip is not None:
-        query = query.offset(skip)
-
-    if limit is not None:
-        query = query.limit(limit)
+    query = paginate(query, BOOKING_ORDER, cursor=cursor, skip=skip, limit=limit)
 
-    bookings = query.all()
+    result = await db.execute(query)
+    bookings = result.scalars().all()
     logger.info(f"Retrieved {len(bookings)} bookings")
     return bookings
+
+
+async def count_bookings(db: AsyncSession, user_id: Optional[int] = None, session_id: Optional[int] = None,
+                         booking_status: Optional[BookingStatus] = None) -> int:
+    """
+    Count the bookings matching the optional filters of `get_bookings`.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (Optional[int]): Filter by user ID.
+        session_id (Optional[int]): Filter by session ID.
+        booking_status (Optional[BookingStatus]): Filter by booking status.
+
+    Returns:
+        int: The number of bookings.
+    """
+    query = select(func.count()).select_from(Booking)
+
+    if user_id is not None:
+        query = query.filter(Booking.user_id == user_id)
+
+    if session_id is not None:
+        query = query.filter(Booking.session_id == session_id)
+
+    if booking_status is not None:
+        query = query.filter(Booking.status == booking_status)
+
+    result = await db.execute(query)
+    return result.scalar_one()
@@ -1,22 +1,30 @@
 from typing import Optional, List
 import logging
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from ..models import Film, FilmStatus, SessionStatus
-from ..schemas import FilmCreate
-from .sessions import update_session_status
+from ..models import Film, FilmStatus, Session as SessionModel
+from ..schemas import FilmCreate, FilmDetail, FilmSummary
+from .loaders import FILM_LOADERS
+from .sessions import cancel_film_sessions, get_session_summaries
+from .versions import bump_film_version
+from ..utils.cache import invalidate_catalog
+from ..utils.pagination import paginate
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-def create_film(db: Session, film: FilmCreate) -> Film:
+# Unique ordering of film listings, used for keyset pagination
+FILM_ORDER = (Film.id,)
+
+async def create_film(db: AsyncSession, film: FilmCreate) -> Film:
     """
     Create a new film.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         film (FilmCreate): The film creation schema.
 
     Returns:
@@ -25,36 +33,38 @@ def create_film(db: Session, film: FilmCreate) -> Film:
     logger.info(f"Creating a new film with title: {film.title}")
     db_film = Film(**film.dict())
     db.add(db_film)
-    db.commit()
-    db.refresh(db_film)
+    invalidate_catalog(db, "films")
+    await db.commit()
     logger.info(f"Film created with id {db_film.id}")
-    return db_film
+    return await get_film(db, db_film.id)
 
-def delete_film(db: Session, film_id: int) -> Film:
+async def delete_film(db: AsyncSession, film_id: int) -> Film:
     """
     Delete a film by its ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         film_id (int): The ID of the film to delete.
 
     Returns:
         Film: The deleted film.
     """
     logger.info(f"Deleting film with id {film_id}")
-    db_film = get_film(db, film_id)
+    db_film = await get_film(db, film_id)
 
-    db.delete(db_film)
-    db.commit()
+    await db.delete(db_film)
+    invalidate_catalog(db, "films", "sessions", f"film:{film_id}",
+                       *(f"session:{session.id}" for session in db_film.sessions))
+    await db.commit()
     logger.info(f"Film with id {film_id} deleted")
     return db_film
 
-def update_film_status(db: Session, film_id: int, new_status: FilmStatus) -> Film:
+async def update_film_status(db: AsyncSession, film_id: int, new_status: FilmStatus) -> Film:
     """
     Update the status of a film.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         film_id (int): The ID of the film to update.
         new_status (FilmStatus): The new status of the film.
 
@@ -62,23 +72,26 @@ def update_film_status(db: Session, film_id: int, new_status: FilmStatus) -> Fil
         Film: The updated film.
     """
     logger.info(f"Updating status of film id {film_id} to {new_status}")
-    db_film = get_film(db, film_id)
+    db_film = await get_film(db, film_id)
 
     db_film.status = new_status
+    await bump_film_version(db, film_id)
+    invalidate_catalog(db, "films")
     if new_status == FilmStatus.NOT_AVAILABLE:
-        for session in db_film.sessions:
-            update_session_status(db, session_id=session.id, new_status=SessionStatus.CANCELED)
-    db.commit()
+        await cancel_film_sessions(db, film_id)
+    await db.commit()
     logger.info(f"Status of film id {film_id} updated to {new_status}")
-    return db_film
+    # The sessions, bookings and seats loaded with the film were changed by set-based updates
+    return await get_film(db, film_id, populate_existing=True)
 
-def get_film(db: Session, film_id: int) -> Film:
+async def get_film(db: AsyncSession, film_id: int, populate_existing: bool = False) -> Film:
     """
     Retrieve a film by its ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         film_id (int): The ID of the film to retrieve.
+        populate_existing (bool): Whether to overwrite the objects already loaded in the session.
 
     Returns:
         Film: The retrieved film.
@@ -87,38 +100,114 @@ def get_film(db: Session, film_id: int) -> Film:
         HTTPException: If the film is not found.
     """
     logger.info(f"Retrieving film with id {film_id}")
-    db_film = db.query(Film).filter(Film.id == film_id).first()
+    result = await db.execute(
+        select(Film).where(Film.id == film_id).options(*FILM_LOADERS)
+        .execution_options(populate_existing=populate_existing)
+    )
+    db_film = result.scalars().first()
     if not db_film:
         logger.error(f"Film with id {film_id} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Film not found")
     return db_film
 
-def get_films(db: Session, skip: Optional[int] = None, limit: Optional[int] = None,
-              film_status: Optional[FilmStatus] = None) -> List[Film]:
+async def get_film_detail(db: AsyncSession, film_id: int) -> FilmDetail:
+    """
+    Retrieve a film with the summaries of its sessions.
+
+    Args:
+        db (AsyncSession): The database session.
+        film_id (int): The ID of the film to retrieve.
+
+    Returns:
+        FilmDetail: The film and its session summaries.
+
+    Raises:
+        HTTPException: If the film is not found.
+    """
+    logger.info(f"Retrieving film detail with id {film_id}")
+    result = await db.execute(select(Film).where(Film.id == film_id))
+    db_film = result.scalars().first()
+    if not db_film:
+        logger.error(f"Film with id {film_id} not found")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Film not found")
+    sessions = await get_session_summaries(db, film_id=film_id)
+    return FilmDetail(**FilmSummary.model_validate(db_film, from_attributes=True).dict(), sessions=sessions)
+
+async def get_films(db: AsyncSession, skip: Optional[int] = None, limit: Optional[int] = None,
+                    cursor: Optional[str] = None, film_status: Optional[FilmStatus] = None,
+                    with_sessions: bool = True) -> List[Film]:
     """
     Retrieve a list of films with optional filters.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         skip (Optional[int]): Number of records to skip.
         limit (Optional[int]): Maximum number of records to return.
+        cursor (Optional[str]): The cursor of the previous page.
         film_status (Optional[FilmStatus]): Filter by film status.
+        with_sessions (bool): Whether to load the sessions of the films. When False,
+            the sessions must not be accessed.
 
     Returns:
         List[Film]: A list of films.
     """
     logger.info(f"Retrieving films with filters - skip: {skip}, limit: {limit}, film_status: {film_status}")
-    query = db.query(Film)
+    query = select(Film)
+
+    if with_sessions:
+        query = query.options(*FILM_LOADERS)
 
     if film_status is not None:
         query = query.filter(Film.status == film_status)
 
-    if limit is not None:
-        query = query.limit(limit)
-
-    if skip is not None:
-        query = query.offset(skip)
+    query = paginate(query, FILM_ORDER, cursor=cursor, skip=skip, limit=limit)
 
-    films = query.all()
+    result = await db.execute(query)
+    films = result.scalars().all()
     logger.info(f"Retrieved {len(films)} films")
     return films
+
+
+async def count_films(db: AsyncSession, film_status: Optional[FilmStatus] = None) -> int:
+    """
+    Count the films matching the optional filters of `get_films`.
+
+    Args:
+        db (AsyncSession): The database session.
+        film_status (Optional[FilmStatus]): Filter by film status.
+
+    Returns:
+        int: The number of films.
+    """
+    query = select(func.count()).select_from(Film)
+
+    if film_status is not None:
+        query = query.filter(Film.status == film_status)
+
+    result = await db.execute(query)
+    return result.scalar_one()
+
+
+async def get_film_version(db: AsyncSession, film_id: int) -> Optional[tuple]:
+    """
+    Get the version of a film and of the sessions listed in it, from which its ETag is derived.
+
+    The film version is bumped whenever a session is added or removed and every session
+    version whenever the session changes, so the tuple changes with any part of the film.
+
+    Args:
+        db (AsyncSession): The database session.
+        film_id (int): The ID of the film.
+
+    Returns:
+        Optional[tuple]: The film version, session count and sum of the session versions,
+            or None if the film is not found.
+    """
+    result = await db.execute(
+        select(Film.version, func.count(SessionModel.id), func.coalesce(func.sum(SessionModel.version), 0))
+        .outerjoin(SessionModel, SessionModel.film_id == Film.id)
+        .where(Film.id == film_id)
+        .group_by(Film.id, Film.version)
+    )
+    row = result.first()
+    return tuple(row) if row else None
@@ -0,0 +1,28 @@
+"""
+Loader options matching the nested API schemas.
+
+Relationships are never loaded implicitly, since lazy loading is not available on an
+AsyncSession. Every query returning ORM objects for a response applies the options of
+the schema the objects are serialized with, so each collection is fetched with one
+SELECT ... IN per level instead of one SELECT per parent row.
+"""
+from sqlalchemy.orm import selectinload
+
+from ..models import Booking, Film, Session
+
+# schemas.Booking: reservations and payments
+BOOKING_LOADERS = (
+    selectinload(Booking.reservations),
+    selectinload(Booking.payments),
+)
+
+# schemas.Session: bookings, as schemas.Booking, and seats
+SESSION_LOADERS = (
+    selectinload(Session.bookings).options(*BOOKING_LOADERS),
+    selectinload(Session.seats),
+)
+
+# schemas.Film: sessions, as schemas.Session
+FILM_LOADERS = (
+    selectinload(Film.sessions).options(*SESSION_LOADERS),
+)
@@ -0,0 +1,89 @@
+import logging
+from collections import defaultdict
+from typing import List
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import OutboxMessage
+from ..utils.rabbitmq import RabbitMQPublisher
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+
+def add_outbox_message(db: AsyncSession, queue: str, subject: str, recipients: List[str], body: str,
+                       subtype: str = "html") -> OutboxMessage:
+    """
+    Add an email notification to the outbox.
+
+    The message is only added to the database session, so it is written by the same commit
+    as the change it announces, and discarded with it if the transaction is rolled back.
+    The caller is responsible for committing the transaction.
+
+    Args:
+        db (AsyncSession): The database session.
+        queue (str): The name of the RabbitMQ queue.
+        subject (str): The subject of the message.
+        recipients (List[str]): A list of recipient email addresses.
+        body (str): The body of the message.
+        subtype (str): The subtype of the message, default is "html".
+
+    Returns:
+        OutboxMessage: The pending outbox message.
+    """
+    db_message = OutboxMessage(queue=queue, payload={
+        "subject": subject,
+        "recipients": recipients,
+        "body": body,
+        "subtype": subtype
+    })
+    db.add(db_message)
+    return db_message
+
+
+async def relay_outbox_messages(db: AsyncSession, publisher: RabbitMQPublisher, batch_size: int) -> int:
+    """
+    Publish the oldest outbox messages to RabbitMQ and delete them from the outbox.
+
+    The batch is locked with FOR UPDATE SKIP LOCKED, so concurrent relays pick disjoint
+    batches. Messages are deleted only once the broker has confirmed them; if the commit
+    fails after that, they are published again by the next run, so delivery is at least once.
+
+    Args:
+        db (AsyncSession): The database session.
+        publisher (RabbitMQPublisher): The publisher to relay the messages with.
+        batch_size (int): The maximum number of messages to relay.
+
+    Returns:
+        int: The number of messages relayed.
+
+    Raises:
+        Exception: If the broker cannot be reached or does not confirm the messages. The
+            messages are left in the outbox.
+    """
+    result = await db.execute(
+        select(OutboxMessage)
+        .order_by(OutboxMessage.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    messages = result.scalars().all()
+    if not messages:
+        await db.rollback()
+        return 0
+
+    payloads_by_queue = defaultdict(list)
+    for message in messages:
+        payloads_by_queue[message.queue].append(message.payload)
+    try:
+        for queue, payloads in payloads_by_queue.items():
+            await publisher.publish_batch(queue, payloads)
+    except Exception:
+        await db.rollback()
+        raise
+
+    await db.execute(delete(OutboxMessage).where(OutboxMessage.id.in_([message.id for message in messages])))
+    await db.commit()
+    logger.info(f"Relayed {len(messages)} outbox messages")
+    return len(messages)
@@ -1,21 +1,34 @@
 import logging
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 from typing import Optional, List
 
-from sqlalchemy.orm import Session
-from ..models import Payment, PaymentStatus
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models import Booking, BookingStatus, Payment, PaymentStatus, User
 from ..schemas import PaymentCreate
+from .outbox import add_outbox_message
+from .versions import bump_booking_session_versions
+from ..utils.pagination import paginate
 
 logger = logging.getLogger(__name__)
 
+# Unique ordering of payment listings, used for keyset pagination
+PAYMENT_ORDER = (Payment.timestamp, Payment.id)
 
-def create_payment(db: Session, payment_data: PaymentCreate, amount: int) -> Payment:
+# Time after which a pending payment is considered failed
+PAYMENT_TIMEOUT = timedelta(minutes=10)
+
+
+async def create_payment(db: AsyncSession, payment_data: PaymentCreate, amount: int,
+                         checkout_url: Optional[str] = None) -> Payment:
     """
     Create a new payment record in the database.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         payment_data (PaymentCreate): The payment creation data.
+        amount (int): The amount of the payment, in cents.
+        checkout_url (Optional[str]): The URL of the Stripe Checkout Session paying it.
 
     Returns:
         Payment: The created payment record.
@@ -24,44 +37,90 @@ def create_payment(db: Session, payment_data: PaymentCreate, amount: int) -> Pay
         id=payment_data.id,
         booking_id=payment_data.booking_id,
         amount=amount,
-        status=PaymentStatus.PENDING
+        status=PaymentStatus.PENDING,
+        checkout_url=checkout_url
     )
     db.add(db_payment)
-    db.commit()
-    db.refresh(db_payment)
+    await bump_booking_session_versions(db, [payment_data.booking_id])
+    await db.commit()
+    await db.refresh(db_payment)
     return db_payment
 
 
-def update_payment_status(db: Session, payment_id: str, new_status: Optional[PaymentStatus] = None) -> Payment:
+async def update_payment_status(db: AsyncSession, payment_id: str, new_status: Optional[PaymentStatus] = None) -> Payment:
     """
     Update the status of a payment. If no status is provided, set the status to FAILED if the payment timestamp was more than 10 minutes ago.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         payment_id (str): The ID of the payment to update.
         new_status (PaymentStatus, optional): The new status to set. Defaults to None.
 
     Returns:
         Payment: The updated payment record.
     """
-    db_payment = get_payment(db, payment_id)
+    db_payment = await get_payment(db, payment_id)
     if new_status:
         db_payment.status = new_status
     else:
-        if db_payment.status is PaymentStatus.PENDING and db_payment.timestamp < datetime.now(timezone.utc) - timedelta(minutes=10):
+        if db_payment.status is PaymentStatus.PENDING and db_payment.timestamp < datetime.utcnow() - PAYMENT_TIMEOUT:
             db_payment.status = PaymentStatus.FAILED
 
-    db.commit()
-    db.refresh(db_payment)
+    await bump_booking_session_versions(db, [db_payment.booking_id])
+    await db.commit()
+    await db.refresh(db_payment)
     return db_payment
 
 
-def get_payment(db: Session, payment_id: str) -> Payment:
+async def expire_pending_payments(db: AsyncSession) -> List[int]:
+    """
+    Fail the pending payments that have reached the payment timeout.
+
+    The payments are updated by a single statement using the (status, timestamp) index,
+    so the cost grows with the number of expiring payments rather than with the table.
+    The users of the bookings left pending, who opted in to notifications, are told
+    through the outbox that they have to pay again.
+
+    Args:
+        db (AsyncSession): The database session.
+
+    Returns:
+        List[int]: The IDs of the bookings whose payments expired.
+    """
+    result = await db.execute(
+        update(Payment)
+        .where(Payment.status == PaymentStatus.PENDING,
+               Payment.timestamp < datetime.utcnow() - PAYMENT_TIMEOUT)
+        .values(status=PaymentStatus.FAILED)
+        .returning(Payment.booking_id)
+    )
+    booking_ids = sorted(set(result.scalars().all()))
+    await bump_booking_session_versions(db, booking_ids)
+    if booking_ids:
+        result = await db.execute(
+            select(Booking.id, User.email)
+            .join(User, Booking.user_id == User.id)
+            .where(Booking.id.in_(booking_ids), Booking.status == BookingStatus.PENDING, User.notifications)
+        )
+        for booking_id, email in result.all():
+            add_outbox_message(
+                db,
+                'booking_notifications',
+                subject="Payment Expired",
+                recipients=[email],
+                body=f"The payment for booking {booking_id} was not completed in time. Please pay again to keep the booking.",
+            )
+    await db.commit()
+    logger.info(f"Expired pending payments of bookings {booking_ids}")
+    return booking_ids
+
+
+async def get_payment(db: AsyncSession, payment_id: str) -> Payment:
     """
     Retrieve a payment record by ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         payment_id (int): The ID of the payment to retrieve.
 
     Returns:
@@ -70,21 +129,53 @@ def get_payment(db: Session, payment_id: str) -> Payment:
     Raises:
         Exception: If the payment is not found.
     """
-    db_payment = db.query(Payment).filter(Payment.id == payment_id).first()
+    result = await db.execute(select(Payment).where(Payment.id == payment_id))
+    db_payment = result.scalars().first()
     if db_payment is None:
         raise Exception("Payment not found")
     return db_payment
 
 
-def get_payments(db: Session, skip: Optional[int] = None, limit: Optional[int] = None,
-                 booking_id: Optional[int] = None) -> List[Payment]:
+async def get_pending_payment(db: AsyncSession, booking_id: int, amount: int) -> Optional[Payment]:
+    """
+    Retrieve the latest pending payment of a booking that can still be paid.
+
+    A payment can still be paid if it has a checkout URL, is for the given amount and
+    has not reached the payment timeout yet.
+
+    Args:
+        db (AsyncSession): The database session.
+        booking_id (int): The ID of the booking.
+        amount (int): The amount due, in cents.
+
+    Returns:
+        Optional[Payment]: The pending payment, or None if there is none.
+    """
+    result = await db.execute(
+        select(Payment)
+        .where(
+            Payment.booking_id == booking_id,
+            Payment.status == PaymentStatus.PENDING,
+            Payment.amount == amount,
+            Payment.checkout_url.isnot(None),
+            Payment.timestamp > datetime.utcnow() - PAYMENT_TIMEOUT
+        )
+        .order_by(Payment.timestamp.desc())
+        .limit(1)
+    )
+    return result.scalars().first()
+
+
+async def get_payments(db: AsyncSession, skip: Optional[int] = None, limit: Optional[int] = None,
+                       cursor: Optional[str] = None, booking_id: Optional[int] = None) -> List[Payment]:
     """
     Retrieve a list of payments with optional filters.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         skip (Optional[int]): Number of records to skip.
         limit (Optional[int]): Maximum number of records to return.
+        cursor (Optional[str]): The cursor of the previous page.
         payment_id (int): The ID of the payment to retrieve.
 
     Returns:
@@ -92,17 +183,14 @@ def get_payments(db: Session, skip: Optional[int] = None, limit: Optional[int] =
     """
     logger.info(
         f"Retrieving payments with filters - skip: {skip}, limit: {limit}, booking_id: {booking_id}")
-    query = db.query(Payment)
+    query = select(Payment)
 
     if booking_id is not None:
         query = query.filter(Payment.booking_id == booking_id)
 
-    if skip is not None:
-        query = query.offset(skip)
-
-    if limit is not None:
-        query = query.limit(limit)
+    query = paginate(query, PAYMENT_ORDER, cursor=cursor, skip=skip, limit=limit)
 
-    payments = query.all()
+    result = await db.execute(query)
+    payments = result.scalars().all()
     logger.info(f"Retrieved {len(payments)} payments")
     return payments
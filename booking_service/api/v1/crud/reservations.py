@@ -1,22 +1,31 @@
 from typing import Optional, List
 import logging
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from ..models import Seat, Booking, Reservation, ReservationStatus, SeatStatus, BookingStatus
+from ..models import Session as SessionModel, Seat, Booking, Reservation, ReservationStatus, SeatStatus, BookingStatus
 from ..schemas import ReservationCreate
-from .seats import update_seat_status
+from .seats import update_seat_status, claim_seats
+from .versions import bump_booking_session_versions
+from ..utils.pagination import paginate
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-def create_reservation(db: Session, reservation: ReservationCreate) -> Reservation:
+# Unique ordering of reservation listings, used for keyset pagination
+RESERVATION_ORDER = (Reservation.id,)
+
+async def create_reservation(db: AsyncSession, reservation: ReservationCreate) -> Reservation:
     """
     Create a new reservation for a seat.
 
+    Pending reservations may overlap; the seat is only claimed when the reservation is
+    confirmed, immediately for sessions with auto booking.
+
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         reservation (ReservationCreate): The reservation creation schema.
 
     Returns:
@@ -26,46 +35,55 @@ def create_reservation(db: Session, reservation: ReservationCreate) -> Reservati
         HTTPException: If the seat is already reserved.
     """
     logger.info(f"Creating a reservation for seat_id: {reservation.seat_id}")
-    seat = db.query(Seat).filter(Seat.id == reservation.seat_id).one()
+    result = await db.execute(select(Seat).where(Seat.id == reservation.seat_id))
+    seat = result.scalars().one()
     if seat.status != SeatStatus.AVAILABLE:
         logger.error(f"Seat with id {reservation.seat_id} is already reserved")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Seat is already reserved")
 
     db_reservation = Reservation(**reservation.dict())
-    db.add(db_reservation)
-    db.commit()
-    db.refresh(db_reservation)
-    logger.info(f"Reservation created with id {db_reservation.id}")
+    result = await db.execute(
+        select(SessionModel.auto_booking)
+        .join(Booking, Booking.session_id == SessionModel.id)
+        .where(Booking.id == reservation.booking_id)
+    )
+    if result.scalar():
+        await claim_seats(db, [reservation.seat_id])
+        db_reservation.status = ReservationStatus.CONFIRMED
 
-    if db_reservation.booking.session.auto_booking:
-        update_reservation_status(db, db_reservation.id, ReservationStatus.CONFIRMED)
+    db.add(db_reservation)
+    await bump_booking_session_versions(db, [reservation.booking_id])
+    await db.commit()
+    await db.refresh(db_reservation)
+    logger.info(f"Reservation created with id {db_reservation.id} and status {db_reservation.status}")
     return db_reservation
 
-def delete_reservation(db: Session, reservation_id: int) -> Reservation:
+async def delete_reservation(db: AsyncSession, reservation_id: int) -> Reservation:
     """
     Delete a reservation by its ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         reservation_id (int): The ID of the reservation to delete.
 
     Returns:
         Reservation: The deleted reservation.
     """
     logger.info(f"Deleting reservation with id {reservation_id}")
-    db_reservation = get_reservation(db, reservation_id)
+    db_reservation = await get_reservation(db, reservation_id)
 
-    db.delete(db_reservation)
-    db.commit()
+    await db.delete(db_reservation)
+    await bump_booking_session_versions(db, [db_reservation.booking_id])
+    await db.commit()
     logger.info(f"Reservation with id {reservation_id} deleted")
     return db_reservation
 
-def update_reservation_status(db: Session, reservation_id: int, new_status: ReservationStatus) -> Reservation:
+async def update_reservation_status(db: AsyncSession, reservation_id: int, new_status: ReservationStatus) -> Reservation:
     """
     Update the status of a reservation.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         reservation_id (int): The ID of the reservation to update.
         new_status (ReservationStatus): The new status of the reservation.
 
@@ -76,7 +94,7 @@ def update_reservation_status(db: Session, reservation_id: int, new_status: Rese
         HTTPException: If the new status is pending or if the reservation is canceled.
     """
     logger.info(f"Updating status of reservation id {reservation_id} to {new_status}")
-    db_reservation = get_reservation(db, reservation_id)
+    db_reservation = await get_reservation(db, reservation_id)
 
     if new_status == ReservationStatus.PENDING:
         logger.error("Cannot change status to pending")
@@ -87,21 +105,22 @@ def update_reservation_status(db: Session, reservation_id: int, new_status: Rese
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot change status of canceled reservation")
 
     if db_reservation.status == ReservationStatus.PENDING and new_status == ReservationStatus.CONFIRMED:
-        update_seat_status(db, db_reservation.seat_id, SeatStatus.RESERVED)
+        await claim_seats(db, [db_reservation.seat_id])
     elif db_reservation.status == ReservationStatus.CONFIRMED and new_status == ReservationStatus.CANCELED:
-        update_seat_status(db, db_reservation.seat_id, SeatStatus.AVAILABLE)
+        await update_seat_status(db, db_reservation.seat_id, SeatStatus.AVAILABLE)
 
     db_reservation.status = new_status
-    db.commit()
+    await bump_booking_session_versions(db, [db_reservation.booking_id])
+    await db.commit()
     logger.info(f"Status of reservation id {reservation_id} updated to {new_status}")
     return db_reservation
 
-def get_reservation(db: Session, reservation_id: int) -> Reservation:
+async def get_reservation(db: AsyncSession, reservation_id: int) -> Reservation:
     """
     Retrieve a reservation by its ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         reservation_id (int): The ID of the reservation to retrieve.
 
     Returns:
@@ -111,22 +130,24 @@ def get_reservation(db: Session, reservation_id: int) -> Reservation:
         HTTPException: If the reservation is not found.
     """
     logger.info(f"Retrieving reservation with id {reservation_id}")
-    db_reservation = db.query(Reservation).filter(Reservation.id == reservation_id).first()
+    result = await db.execute(select(Reservation).where(Reservation.id == reservation_id))
+    db_reservation = result.scalars().first()
     if not db_reservation:
         logger.error(f"Reservation with id {reservation_id} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reservation not found")
     return db_reservation
 
-def get_reservations(db: Session, skip: Optional[int] = None, limit: Optional[int] = None,
-                     user_id: Optional[int] = None, booking_id: Optional[int] = None,
-                     seat_id: Optional[int] = None, reservation_status: Optional[ReservationStatus] = None) -> List[Reservation]:
+async def get_reservations(db: AsyncSession, skip: Optional[int] = None, limit: Optional[int] = None,
+                           cursor: Optional[str] = None, user_id: Optional[int] = None, booking_id: Optional[int] = None,
+                           seat_id: Optional[int] = None, reservation_status: Optional[ReservationStatus] = None) -> List[Reservation]:
     """
     Retrieve a list of reservations with optional filters.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         skip (Optional[int]): Number of records to skip.
         limit (Optional[int]): Maximum number of records to return.
+        cursor (Optional[str]): The cursor of the previous page.
         user_id (Optional[int]): Filter by user ID.
         booking_id (Optional[int]): Filter by booking ID.
         seat_id (Optional[int]): Filter by seat ID.
@@ -136,7 +157,7 @@ def get_reservations(db: Session, skip: Optional[int] = None, limit: Optional[in
         List[Reservation]: A list of reservations.
     """
     logger.info(f"Retrieving reservations with filters - skip: {skip}, limit: {limit}, user_id: {user_id}, booking_id: {booking_id}, seat_id: {seat_id}, reservation_status: {reservation_status}")
-    query = db.query(Reservation)
+    query = select(Reservation)
 
     if user_id is not None:
         query = query.filter(Reservation.booking.has(Booking.user_id == user_id))
@@ -150,12 +171,42 @@ def get_reservations(db: Session, skip: Optional[int] = None, limit: Optional[in
     if reservation_status is not None:
         query = query.filter(Reservation.status == reservation_status)
 
-    if limit is not None:
-        query = query.limit(limit)
+    query = paginate(query, RESERVATION_ORDER, cursor=cursor, skip=skip, limit=limit)
 
-    if skip is not None:
-        query = query.offset(skip)
-
-    reservations = query.all()
+    result = await db.execute(query)
+    reservations = result.scalars().all()
     logger.info(f"Retrieved {len(reservations)} reservations")
     return reservations
+
+async def count_reservations(db: AsyncSession, user_id: Optional[int] = None, booking_id: Optional[int] = None,
+                             seat_id: Optional[int] = None, reservation_status: Optional[ReservationStatus] = None) -> int:
+    """
+    Count the reservations matching the optional filters of `get_reservations`.
+
+    Args:
+        db (AsyncSession): The database session.
+        user_id (Optional[int]): Filter by user ID.
+        booking_id (Optional[int]): Filter by booking ID.
+        seat_id (Optional[int]): Filter by seat ID.
+        reservation_status (Optional[ReservationStatus]): Filter by reservation status.
+
+    Returns:
+        int: The number of reservations.
+    """
+    query = select(func.count()).select_from(Reservation)
+
+    if user_id is not None:
+        query = query.filter(Reservation.booking.has(Booking.user_id == user_id))
+
+    if booking_id is not None:
+        query = query.filter(Reservation.booking_id == booking_id)
+
+    if seat_id is not None:
+        query = query.filter(Reservation.seat_id == seat_id)
+
+    if reservation_status is not None:
+        query = query.filter(Reservation.status == reservation_status)
+
+    result = await db.execute(query)
+    return result.scalar_one()
+
@@ -1,21 +1,27 @@
 from typing import Optional, List
 import logging
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from ..models import Seat, SeatStatus
+from ..models import Seat, SeatStatus, Session as SessionModel
 from ..schemas import SeatCreate
+from ..utils.cache import invalidate_catalog
+from ..utils.pagination import paginate
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-def create_seat(db: Session, seat: SeatCreate) -> Seat:
+# Unique ordering of seat listings, used for keyset pagination
+SEAT_ORDER = (Seat.id,)
+
+async def create_seat(db: AsyncSession, seat: SeatCreate) -> Seat:
     """
     Create a new seat.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         seat (SeatCreate): The seat creation schema.
 
     Returns:
@@ -24,36 +30,38 @@ def create_seat(db: Session, seat: SeatCreate) -> Seat:
     logger.info(f"Creating a new seat for session_id: {seat.session_id}")
     db_seat = Seat(**seat.dict())
     db.add(db_seat)
-    db.commit()
-    db.refresh(db_seat)
+    await bump_seatmap_version(db, [seat.session_id])
+    await db.commit()
+    await db.refresh(db_seat)
     logger.info(f"Seat created with id {db_seat.id}")
     return db_seat
 
-def delete_seat(db: Session, seat_id: int) -> Seat:
+async def delete_seat(db: AsyncSession, seat_id: int) -> Seat:
     """
     Delete a seat by its ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         seat_id (int): The ID of the seat to delete.
 
     Returns:
         Seat: The deleted seat.
     """
     logger.info(f"Deleting seat with id {seat_id}")
-    db_seat = get_seat(db, seat_id)
+    db_seat = await get_seat(db, seat_id)
 
-    db.delete(db_seat)
-    db.commit()
+    await db.delete(db_seat)
+    await bump_seatmap_version(db, [db_seat.session_id])
+    await db.commit()
     logger.info(f"Seat with id {seat_id} deleted")
     return db_seat
 
-def update_seat_status(db: Session, seat_id: int, new_status: SeatStatus) -> Seat:
+async def update_seat_status(db: AsyncSession, seat_id: int, new_status: SeatStatus) -> Seat:
     """
     Update the status of a seat.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         seat_id (int): The ID of the seat to update.
         new_status (SeatStatus): The new status of the seat.
 
@@ -61,21 +69,58 @@ def update_seat_status(db: Session, seat_id: int, new_status: SeatStatus) -> Sea
         Seat: The updated seat.
     """
     logger.info(f"Updating status of seat id {seat_id} to {new_status}")
-    db_seat = get_seat(db, seat_id)
+    db_seat = await get_seat(db, seat_id)
 
-    if db_seat.status != SeatStatus.CANCELED:
+    if db_seat.status != SeatStatus.CANCELED and db_seat.status != new_status:
         db_seat.status = new_status
+        await bump_seatmap_version(db, [db_seat.session_id])
 
-    db.commit()
+    await db.commit()
     logger.info(f"Status of seat id {seat_id} updated to {new_status}")
     return db_seat
 
-def get_seat(db: Session, seat_id: int) -> Seat:
+async def claim_seats(db: AsyncSession, seat_ids: List[int]) -> None:
+    """
+    Atomically mark available seats as reserved.
+
+    The claim is a single conditional UPDATE, so concurrent claims on the same seat are
+    resolved by the database: only one of them matches the seat while it is still
+    available. The caller is responsible for committing the transaction, or for rolling
+    it back if any seat could not be claimed.
+
+    Args:
+        db (AsyncSession): The database session.
+        seat_ids (List[int]): The IDs of the seats to claim.
+
+    Raises:
+        HTTPException: If any of the seats is not found or not available.
+    """
+    seat_ids = set(seat_ids)
+    if not seat_ids:
+        return
+    logger.info(f"Claiming seats {sorted(seat_ids)}")
+    result = await db.execute(
+        update(Seat)
+        .where(Seat.id.in_(seat_ids), Seat.status == SeatStatus.AVAILABLE)
+        .values(status=SeatStatus.RESERVED)
+        .returning(Seat.session_id)
+    )
+    session_ids = result.scalars().all()
+    if len(session_ids) != len(seat_ids):
+        result = await db.execute(select(func.count(Seat.id)).where(Seat.id.in_(seat_ids)))
+        if result.scalar() != len(seat_ids):
+            logger.error(f"Seats {sorted(seat_ids)} could not be claimed, some of them do not exist")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Seat not found")
+        logger.error(f"Seats {sorted(seat_ids)} could not be claimed, {len(session_ids)} were available")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Seat is already reserved")
+    await bump_seatmap_version(db, list(set(session_ids)))
+
+async def get_seat(db: AsyncSession, seat_id: int) -> Seat:
     """
     Retrieve a seat by its ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         seat_id (int): The ID of the seat to retrieve.
 
     Returns:
@@ -85,22 +130,24 @@ def get_seat(db: Session, seat_id: int) -> Seat:
         HTTPException: If the seat is not found.
     """
     logger.info(f"Retrieving seat with id {seat_id}")
-    db_seat = db.query(Seat).filter(Seat.id == seat_id).first()
+    result = await db.execute(select(Seat).where(Seat.id == seat_id))
+    db_seat = result.scalars().first()
     if not db_seat:
         logger.error(f"Seat with id {seat_id} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Seat not found")
     return db_seat
 
-def get_seats(db: Session, skip: Optional[int] = None, limit: Optional[int] = None,
-              session_id: Optional[int] = None, reservation_id: Optional[int] = None,
-              seat_status: Optional[SeatStatus] = None) -> List[Seat]:
+async def get_seats(db: AsyncSession, skip: Optional[int] = None, limit: Optional[int] = None,
+                    cursor: Optional[str] = None, session_id: Optional[int] = None, reservation_id: Optional[int] = None,
+                    seat_status: Optional[SeatStatus] = None) -> List[Seat]:
     """
     Retrieve a list of seats with optional filters.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         skip (Optional[int]): Number of records to skip.
         limit (Optional[int]): Maximum number of records to return.
+        cursor (Optional[str]): The cursor of the previous page.
         session_id (Optional[int]): Filter by session ID.
         reservation_id (Optional[int]): Filter by reservation ID.
         seat_status (Optional[SeatStatus]): Filter by seat status.
@@ -109,7 +156,7 @@ def get_seats(db: Session, skip: Optional[int] = None, limit: Optional[int] = No
         List[Seat]: A list of seats.
     """
     logger.info(f"Retrieving seats with filters - skip: {skip}, limit: {limit}, session_id: {session_id}, reservation_id: {reservation_id}, seat_status: {seat_status}")
-    query = db.query(Seat)
+    query = select(Seat)
 
     if session_id is not None:
         query = query.filter(Seat.session_id == session_id)
@@ -120,12 +167,31 @@ def get_seats(db: Session, skip: Optional[int] = None, limit: Optional[int] = No
     if seat_status is not None:
         query = query.filter(Seat.status == seat_status)
 
-    if limit is not None:
-        query = query.limit(limit)
+    query = paginate(query, SEAT_ORDER, cursor=cursor, skip=skip, limit=limit)
 
-    if skip is not None:
-        query = query.offset(skip)
-
-    seats = query.all()
+    result = await db.execute(query)
+    seats = result.scalars().all()
     logger.info(f"Retrieved {len(seats)} seats")
     return seats
+
+async def bump_seatmap_version(db: AsyncSession, session_ids: List[int]) -> None:
+    """
+    Increment the seat map version of the given sessions.
+
+    Must be called in the same transaction as every change to the seats of a session,
+    so that cached seat maps are never served for a newer state. The version of the
+    sessions is bumped along, and the cached catalog responses including them are
+    invalidated once the transaction commits.
+
+    Args:
+        db (AsyncSession): The database session.
+        session_ids (List[int]): The IDs of the sessions whose seats changed.
+    """
+    if not session_ids:
+        return
+    await db.execute(
+        update(SessionModel)
+        .where(SessionModel.id.in_(session_ids))
+        .values(seatmap_version=SessionModel.seatmap_version + 1, version=SessionModel.version + 1)
+    )
+    invalidate_catalog(db, *(f"session:{session_id}" for session_id in session_ids))
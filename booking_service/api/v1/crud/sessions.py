@@ -1,18 +1,27 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from typing import Optional, List
 import logging
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from ..models import Session as SessionModel, Seat, SessionStatus, SeatStatus, FilmStatus, BookingStatus, Film
-from ..schemas import SessionCreate
-from .seats import update_seat_status
-from .bookings import update_booking_status
+from ..models import (Session as SessionModel, Seat, SessionStatus, SeatStatus, FilmStatus, BookingStatus, Film,
+                      Booking, Reservation, ReservationStatus)
+from ..schemas import SessionCreate, SessionSummary
+from .loaders import SESSION_LOADERS
+from .seats import bump_seatmap_version
+from .versions import bump_film_version, bump_session_versions
+from ..utils.cache import invalidate_catalog
+from ..utils.pagination import paginate
+from ..utils.seatmap import encode_seat_map, SEATMAP_ENCODING
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# Unique ordering of session listings, used for keyset pagination
+SESSION_ORDER = (SessionModel.datetime, SessionModel.id)
+
 STATUS_ORDER = {
     SessionStatus.UPCOMING: 1,
     SessionStatus.NOW_PLAYING: 2,
@@ -21,12 +30,12 @@ STATUS_ORDER = {
 }
 
 
-def create_session(db: Session, session: SessionCreate) -> SessionModel:
+async def create_session(db: AsyncSession, session: SessionCreate) -> SessionModel:
     """
     Create a new session.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         session (SessionCreate): The session creation schema.
 
     Returns:
@@ -36,7 +45,8 @@ def create_session(db: Session, session: SessionCreate) -> SessionModel:
         HTTPException: If the film is not found or if the film is not available.
     """
     logger.info(f"Creating a new session for film_id: {session.film_id}")
-    db_film = db.query(Film).filter(Film.id == session.film_id).first()
+    result = await db.execute(select(Film.status, Film.duration).where(Film.id == session.film_id))
+    db_film = result.first()
     if not db_film:
         logger.error(f"Film with id {session.film_id} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Film not found")
@@ -45,69 +55,117 @@ def create_session(db: Session, session: SessionCreate) -> SessionModel:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Film is not available")
 
     db_session = SessionModel(**session.dict())
+    if session.datetime.tzinfo is not None:
+        # Stored as naive UTC, see models.py
+        db_session.datetime = session.datetime.astimezone(timezone.utc).replace(tzinfo=None)
+    db_session.end_datetime = db_session.datetime + timedelta(minutes=db_film.duration or 0)
     db.add(db_session)
-    db.commit()
-    db.refresh(db_session)
+    await db.flush()
     logger.info(f"Session created with id {db_session.id}")
 
-    for seat_number in range(1, session.capacity + 1):
-        seat = Seat(session_id=db_session.id)
-        db.add(seat)
-    db.commit()
+    await create_session_seats(db, db_session.id, session.capacity)
+    await bump_film_version(db, session.film_id)
+    invalidate_catalog(db, "sessions")
+    await db.commit()
     logger.info(f"{session.capacity} seats created for session id {db_session.id}")
 
-    return db_session
+    return await get_session(db, db_session.id)
+
+
+async def create_session_seats(db: AsyncSession, session_id: int, capacity: int) -> None:
+    """
+    Materialize all seats of a session with a single bulk INSERT.
+
+    The rows are sent as one executemany, which SQLAlchemy renders as batched
+    multi-row INSERT statements instead of flushing one ORM object per seat.
+    The caller is responsible for committing the transaction.
+
+    Args:
+        db (AsyncSession): The database session.
+        session_id (int): The ID of the session the seats belong to.
+        capacity (int): The number of seats to create.
+    """
+    if capacity <= 0:
+        return
+    await db.execute(
+        insert(Seat.__table__),
+        [{"session_id": session_id, "status": SeatStatus.AVAILABLE} for _ in range(capacity)]
+    )
 
 
-def delete_session(db: Session, session_id: int) -> SessionModel:
+async def delete_session(db: AsyncSession, session_id: int) -> SessionModel:
     """
     Delete a session by its ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         session_id (int): The ID of the session to delete.
 
     Returns:
         SessionModel: The deleted session.
     """
     logger.info(f"Deleting session with id {session_id}")
-    db_session = get_session(db, session_id)
+    db_session = await get_session(db, session_id)
 
-    db.delete(db_session)
-    db.commit()
+    await db.delete(db_session)
+    await bump_film_version(db, db_session.film_id)
+    invalidate_catalog(db, "sessions", f"session:{session_id}")
+    await db.commit()
     logger.info(f"Session with id {session_id} deleted")
     return db_session
 
 
-def handle_bookings_and_seats(db: Session, db_session: SessionModel, new_status: SessionStatus):
+async def handle_bookings_and_seats(db: AsyncSession, session_ids: List[int], new_status: SessionStatus) -> None:
     """
-    Handle bookings and seats when the session status changes.
+    Handle bookings and seats when the status of sessions changes.
+
+    Pending bookings of started or completed sessions, and every booking of canceled
+    sessions, are canceled together with their reservations. The remaining seats are
+    then closed as reserved or canceled. Each step is a single set-based UPDATE;
+    the caller is responsible for committing the transaction.
 
     Args:
-        db (Session): The database session.
-        db_session (SessionModel): The session model instance.
-        new_status (SessionStatus): The new status of the session.
+        db (AsyncSession): The database session.
+        session_ids (List[int]): The IDs of the sessions whose status changed.
+        new_status (SessionStatus): The new status of the sessions.
     """
-    logger.info(f"Handling bookings and seats for session id {db_session.id} with new status {new_status}")
+    if not session_ids:
+        return
+    logger.info(f"Handling bookings and seats for session ids {session_ids} with new status {new_status}")
     if new_status in [SessionStatus.NOW_PLAYING, SessionStatus.COMPLETED]:
-        for booking in db_session.bookings:
-            if booking.status == BookingStatus.PENDING:
-                update_booking_status(db, booking.id, BookingStatus.CANCELED)
-        for seat in db_session.seats:
-            update_seat_status(db, seat.id, SeatStatus.RESERVED)
+        booking_criteria = [Booking.session_id.in_(session_ids), Booking.status == BookingStatus.PENDING]
+        seat_status = SeatStatus.RESERVED
     elif new_status == SessionStatus.CANCELED:
-        for booking in db_session.bookings:
-            update_booking_status(db, booking.id, BookingStatus.CANCELED)
-        for seat in db_session.seats:
-            update_seat_status(db, seat.id, SeatStatus.CANCELED)
-
-
-def update_session_status(db: Session, session_id: int, new_status: Optional[SessionStatus] = None) -> SessionModel:
+        booking_criteria = [Booking.session_id.in_(session_ids), Booking.status != BookingStatus.CANCELED]
+        seat_status = SeatStatus.CANCELED
+    else:
+        return
+
+    await db.execute(
+        update(Reservation)
+        .where(Reservation.booking_id.in_(select(Booking.id).where(*booking_criteria)),
+               Reservation.status != ReservationStatus.CANCELED)
+        .values(status=ReservationStatus.CANCELED)
+    )
+    await db.execute(
+        update(Booking)
+        .where(*booking_criteria)
+        .values(status=BookingStatus.CANCELED)
+    )
+    await db.execute(
+        update(Seat)
+        .where(Seat.session_id.in_(session_ids), Seat.status != SeatStatus.CANCELED)
+        .values(status=seat_status)
+    )
+    await bump_seatmap_version(db, session_ids)
+
+
+async def update_session_status(db: AsyncSession, session_id: int, new_status: Optional[SessionStatus] = None) -> SessionModel:
     """
     Update the status of a session.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         session_id (int): The ID of the session to update.
         new_status (Optional[SessionStatus]): The new status of the session.
 
@@ -118,7 +176,7 @@ def update_session_status(db: Session, session_id: int, new_status: Optional[Ses
         HTTPException: If the session is completed or if the status transition is invalid.
     """
     logger.info(f"Updating status of session id {session_id} to {new_status}")
-    db_session = get_session(db, session_id)
+    db_session = await get_session(db, session_id)
 
     current_status = db_session.status
 
@@ -135,32 +193,111 @@ def update_session_status(db: Session, session_id: int, new_status: Optional[Ses
                                     detail="Cannot change status of session to a non-next status")
 
         db_session.status = new_status
-        handle_bookings_and_seats(db, db_session, new_status)
+        await handle_bookings_and_seats(db, [session_id], new_status)
     else:
         if current_status != SessionStatus.CANCELED:
             now = datetime.utcnow()
-            session_end_time = db_session.datetime + timedelta(minutes=db_session.film.duration)
 
             if db_session.datetime > now:
                 db_session.status = SessionStatus.UPCOMING
-            elif db_session.datetime <= now < session_end_time:
+            elif db_session.datetime <= now < db_session.end_datetime:
                 db_session.status = SessionStatus.NOW_PLAYING
-                handle_bookings_and_seats(db, db_session, SessionStatus.NOW_PLAYING)
+                await handle_bookings_and_seats(db, [session_id], SessionStatus.NOW_PLAYING)
             else:
                 db_session.status = SessionStatus.COMPLETED
-                handle_bookings_and_seats(db, db_session, SessionStatus.COMPLETED)
+                await handle_bookings_and_seats(db, [session_id], SessionStatus.COMPLETED)
 
-    db.commit()
+    await bump_session_versions(db, [session_id])
+    invalidate_catalog(db, "sessions")
+    await db.commit()
     logger.info(f"Status of session id {session_id} updated to {db_session.status}")
     return db_session
 
 
-def update_session_price(db: Session, session_id: int, new_price: float) -> SessionModel:
+async def sweep_session_statuses(db: AsyncSession, now: Optional[datetime] = None) -> dict:
+    """
+    Move sessions whose start or end time has passed to their next status.
+
+    Only sessions still in an active status are matched, through the (status, datetime)
+    and (status, end_datetime) indexes, so each run touches just the sessions that
+    crossed a boundary since the previous one. Bookings and seats are handled for
+    those sessions only.
+
+    Args:
+        db (AsyncSession): The database session.
+        now (Optional[datetime]): The reference time, defaults to the current UTC time.
+
+    Returns:
+        dict: The IDs of the sessions moved to each status.
+    """
+    now = now or datetime.utcnow()
+    logger.info(f"Sweeping session statuses at {now}")
+
+    result = await db.execute(
+        update(SessionModel)
+        .where(SessionModel.status.in_([SessionStatus.UPCOMING, SessionStatus.NOW_PLAYING]),
+               SessionModel.end_datetime <= now)
+        .values(status=SessionStatus.COMPLETED, version=SessionModel.version + 1)
+        .returning(SessionModel.id)
+    )
+    completed_ids = result.scalars().all()
+
+    result = await db.execute(
+        update(SessionModel)
+        .where(SessionModel.status == SessionStatus.UPCOMING,
+               SessionModel.datetime <= now)
+        .values(status=SessionStatus.NOW_PLAYING, version=SessionModel.version + 1)
+        .returning(SessionModel.id)
+    )
+    now_playing_ids = result.scalars().all()
+
+    await handle_bookings_and_seats(db, now_playing_ids, SessionStatus.NOW_PLAYING)
+    await handle_bookings_and_seats(db, completed_ids, SessionStatus.COMPLETED)
+
+    session_ids = [*now_playing_ids, *completed_ids]
+    if session_ids:
+        invalidate_catalog(db, "sessions", *(f"session:{session_id}" for session_id in session_ids))
+    await db.commit()
+    logger.info(f"{len(now_playing_ids)} sessions started, {len(completed_ids)} sessions completed")
+    return {SessionStatus.NOW_PLAYING: now_playing_ids, SessionStatus.COMPLETED: completed_ids}
+
+
+async def cancel_film_sessions(db: AsyncSession, film_id: int) -> List[int]:
+    """
+    Cancel the sessions of a film, with their bookings and seats.
+
+    Completed and already canceled sessions are left as they are. The sessions are
+    canceled by one UPDATE and their bookings and seats handled together; the caller
+    is responsible for committing the transaction.
+
+    Args:
+        db (AsyncSession): The database session.
+        film_id (int): The ID of the film whose sessions are canceled.
+
+    Returns:
+        List[int]: The IDs of the canceled sessions.
+    """
+    result = await db.execute(
+        update(SessionModel)
+        .where(SessionModel.film_id == film_id,
+               SessionModel.status.notin_([SessionStatus.COMPLETED, SessionStatus.CANCELED]))
+        .values(status=SessionStatus.CANCELED, version=SessionModel.version + 1)
+        .returning(SessionModel.id)
+    )
+    session_ids = result.scalars().all()
+    await handle_bookings_and_seats(db, session_ids, SessionStatus.CANCELED)
+    if session_ids:
+        invalidate_catalog(db, "sessions", *(f"session:{session_id}" for session_id in session_ids))
+    logger.info(f"{len(session_ids)} sessions of film id {film_id} canceled")
+    return session_ids
+
+
+async def update_session_price(db: AsyncSession, session_id: int, new_price: float) -> SessionModel:
     """
     Update the price of a session.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         session_id (int): The ID of the session to update.
         new_price (float): The new price of the session.
 
@@ -168,21 +305,22 @@ def update_session_price(db: Session, session_id: int, new_price: float) -> Sess
         SessionModel: The updated session.
     """
     logger.info(f"Updating price of session id {session_id} to {new_price}")
-    db_session = get_session(db, session_id)
+    db_session = await get_session(db, session_id)
 
     db_session.price = new_price
+    await bump_session_versions(db, [session_id])
 
-    db.commit()
+    await db.commit()
     logger.info(f"Price of session id {session_id} updated to {new_price}")
     return db_session
 
 
-def get_session(db: Session, session_id: int) -> SessionModel:
+async def get_session(db: AsyncSession, session_id: int) -> SessionModel:
     """
     Retrieve a session by its ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         session_id (int): The ID of the session to retrieve.
 
     Returns:
@@ -192,22 +330,64 @@ def get_session(db: Session, session_id: int) -> SessionModel:
         HTTPException: If the session is not found.
     """
     logger.info(f"Retrieving session with id {session_id}")
-    db_session = db.query(SessionModel).filter(SessionModel.id == session_id).first()
+    result = await db.execute(select(SessionModel).where(SessionModel.id == session_id).options(*SESSION_LOADERS))
+    db_session = result.scalars().first()
     if not db_session:
         logger.error(f"Session with id {session_id} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
     return db_session
 
 
-def get_sessions(db: Session, skip: Optional[int] = None, limit: Optional[int] = None,
-                 film_id: Optional[int] = None, session_status: Optional[SessionStatus] = None) -> List[SessionModel]:
+async def get_session_seat_map(db: AsyncSession, session_id: int) -> dict:
+    """
+    Retrieve the packed seat map of a session.
+
+    The router serves it from the catalog cache, which drops it when
+    `bump_seatmap_version` invalidates the session.
+
+    Args:
+        db (AsyncSession): The database session.
+        session_id (int): The ID of the session.
+
+    Returns:
+        dict: The seat map matching the `SeatMap` schema.
+
+    Raises:
+        HTTPException: If the session is not found.
+    """
+    logger.info(f"Retrieving seat map of session id {session_id}")
+    result = await db.execute(
+        select(SessionModel.seatmap_version, SessionModel.capacity).where(SessionModel.id == session_id)
+    )
+    row = result.first()
+    if not row:
+        logger.error(f"Session with id {session_id} not found")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+
+    result = await db.execute(select(Seat.id, Seat.status).where(Seat.session_id == session_id).order_by(Seat.id))
+    seats = result.all()
+    states, seat_id_runs = encode_seat_map(seats)
+    return {
+        "session_id": session_id,
+        "version": row.seatmap_version,
+        "capacity": row.capacity,
+        "encoding": SEATMAP_ENCODING,
+        "states": states,
+        "seat_id_runs": seat_id_runs,
+    }
+
+
+async def get_sessions(db: AsyncSession, skip: Optional[int] = None, limit: Optional[int] = None,
+                       cursor: Optional[str] = None, film_id: Optional[int] = None,
+                       session_status: Optional[SessionStatus] = None) -> List[SessionModel]:
     """
     Retrieve a list of sessions with optional filters.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         skip (Optional[int]): Number of records to skip.
         limit (Optional[int]): Maximum number of records to return.
+        cursor (Optional[str]): The cursor of the previous page.
         film_id (Optional[int]): Filter by film ID.
         session_status (Optional[SessionStatus]): Filter by session status.
 
@@ -216,7 +396,7 @@ def get_sessions(db: Session, skip: Optional[int] = None, limit: Optional[int] =
     """
     logger.info(
         f"Retrieving sessions with filters - skip: {skip}, limit: {limit}, film_id: {film_id}, session_status: {session_status}")
-    query = db.query(SessionModel)
+    query = select(SessionModel).options(*SESSION_LOADERS)
 
     if film_id is not None:
         query = query.filter(SessionModel.film_id == film_id)
@@ -224,12 +404,150 @@ def get_sessions(db: Session, skip: Optional[int] = None, limit: Optional[int] =
     if session_status is not None:
         query = query.filter(SessionModel.status == session_status)
 
-    if limit is not None:
-        query = query.limit(limit)
-
-    if skip is not None:
-        query = query.offset(skip)
+    query = paginate(query, SESSION_ORDER, cursor=cursor, skip=skip, limit=limit)
 
-    sessions = query.all()
+    result = await db.execute(query)
+    sessions = result.scalars().all()
     logger.info(f"Retrieved {len(sessions)} sessions")
     return sessions
+
+
+def select_session_summaries(session_id: Optional[int] = None) -> Select:
+    """
+    Build the query selecting the session summaries, with their seats counted by status.
+
+    Args:
+        session_id (Optional[int]): Select only this session, counting only its seats.
+
+    Returns:
+        Select: The query, matching the `SessionSummary` schema.
+    """
+    seat_counts = (
+        select(
+            Seat.session_id,
+            func.count(Seat.id).filter(Seat.status == SeatStatus.AVAILABLE).label("free_seats"),
+            func.count(Seat.id).filter(Seat.status == SeatStatus.RESERVED).label("reserved_seats"),
+        )
+        .group_by(Seat.session_id)
+    )
+    if session_id is not None:
+        seat_counts = seat_counts.where(Seat.session_id == session_id)
+    seat_counts = seat_counts.subquery()
+    query = (
+        select(
+            SessionModel.id,
+            SessionModel.film_id,
+            SessionModel.datetime,
+            SessionModel.price,
+            SessionModel.capacity,
+            SessionModel.auto_booking,
+            SessionModel.status,
+            func.coalesce(seat_counts.c.free_seats, 0).label("free_seats"),
+            func.coalesce(seat_counts.c.reserved_seats, 0).label("reserved_seats"),
+        )
+        .outerjoin(seat_counts, seat_counts.c.session_id == SessionModel.id)
+    )
+    if session_id is not None:
+        query = query.where(SessionModel.id == session_id)
+    return query
+
+
+async def get_session_summaries(db: AsyncSession, skip: Optional[int] = None, limit: Optional[int] = None,
+                                cursor: Optional[str] = None, film_id: Optional[int] = None,
+                                session_status: Optional[SessionStatus] = None) -> List[SessionSummary]:
+    """
+    Retrieve session summaries with optional filters.
+
+    Seats and bookings are not loaded; the free and reserved seats of each session
+    are counted in the same query instead.
+
+    Args:
+        db (AsyncSession): The database session.
+        skip (Optional[int]): Number of records to skip.
+        limit (Optional[int]): Maximum number of records to return.
+        cursor (Optional[str]): The cursor of the previous page.
+        film_id (Optional[int]): Filter by film ID.
+        session_status (Optional[SessionStatus]): Filter by session status.
+
+    Returns:
+        List[SessionSummary]: A list of session summaries.
+    """
+    logger.info(
+        f"Retrieving session summaries with filters - skip: {skip}, limit: {limit}, film_id: {film_id}, session_status: {session_status}")
+    query = select_session_summaries()
+
+    if film_id is not None:
+        query = query.filter(SessionModel.film_id == film_id)
+
+    if session_status is not None:
+        query = query.filter(SessionModel.status == session_status)
+
+    query = paginate(query, SESSION_ORDER, cursor=cursor, skip=skip, limit=limit)
+
+    result = await db.execute(query)
+    summaries = [SessionSummary.model_validate(row, from_attributes=True) for row in result.all()]
+    logger.info(f"Retrieved {len(summaries)} session summaries")
+    return summaries
+
+
+async def get_session_summary(db: AsyncSession, session_id: int) -> SessionSummary:
+    """
+    Retrieve a session summary by its ID, with seat counts instead of seats and bookings.
+
+    Args:
+        db (AsyncSession): The database session.
+        session_id (int): The ID of the session to retrieve.
+
+    Returns:
+        SessionSummary: The retrieved session summary.
+
+    Raises:
+        HTTPException: If the session is not found.
+    """
+    logger.info(f"Retrieving session summary with id {session_id}")
+    result = await db.execute(select_session_summaries(session_id))
+    row = result.first()
+    if not row:
+        logger.error(f"Session with id {session_id} not found")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    return SessionSummary.model_validate(row, from_attributes=True)
+
+
+async def count_sessions(db: AsyncSession, film_id: Optional[int] = None,
+                         session_status: Optional[SessionStatus] = None) -> int:
+    """
+    Count the sessions matching the optional filters of `get_sessions`.
+
+    Args:
+        db (AsyncSession): The database session.
+        film_id (Optional[int]): Filter by film ID.
+        session_status (Optional[SessionStatus]): Filter by session status.
+
+    Returns:
+        int: The number of sessions.
+    """
+    query = select(func.count()).select_from(SessionModel)
+
+    if film_id is not None:
+        query = query.filter(SessionModel.film_id == film_id)
+
+    if session_status is not None:
+        query = query.filter(SessionModel.status == session_status)
+
+    result = await db.execute(query)
+    return result.scalar_one()
+
+
+async def get_session_version(db: AsyncSession, session_id: int) -> Optional[int]:
+    """
+    Get the version of a session, from which its ETag is derived.
+
+    Args:
+        db (AsyncSession): The database session.
+        session_id (int): The ID of the session.
+
+    Returns:
+        Optional[int]: The version, or None if the session is not found.
+    """
+    result = await db.execute(select(SessionModel.version).where(SessionModel.id == session_id))
+    return result.scalar_one_or_none()
@@ -0,0 +1,200 @@
+import logging
+from datetime import datetime
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import BookingStatus, Payment, PaymentStatus, StripeEvent
+from .bookings import apply_booking_status, get_booking
+from .outbox import add_outbox_message
+from .users import get_user_by_booking_id
+from .versions import bump_booking_session_versions, bump_session_versions
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+
+async def store_stripe_event(db: AsyncSession, event_id: str, event_type: str, payload: dict) -> bool:
+    """
+    Store a verified Stripe event for the event processor.
+
+    Args:
+        db (AsyncSession): The database session.
+        event_id (str): The ID of the Stripe event.
+        event_type (str): The type of the Stripe event.
+        payload (dict): The object the event is about.
+
+    Returns:
+        bool: True if the event was stored, False if it had already been received.
+    """
+    db.add(StripeEvent(id=event_id, type=event_type, payload=payload))
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        logger.info(f"Stripe event {event_id} already received")
+        return False
+    logger.info(f"Stripe event {event_id} of type {event_type} stored")
+    return True
+
+
+async def complete_checkout(db: AsyncSession, payment_id: str) -> Optional[str]:
+    """
+    Complete the payment of a paid Checkout Session and confirm its booking if it is pending.
+
+    The customer has been charged once the Checkout Session is paid, so the payment is
+    completed even if the booking cannot be confirmed, for example because another
+    booking claimed its seats meanwhile; only the confirmation is rolled back then, and
+    the booking is left for a refund or manual handling.
+
+    Args:
+        db (AsyncSession): The database session.
+        payment_id (str): The ID of the Checkout Session, which is the ID of the payment.
+
+    Returns:
+        Optional[str]: Why the booking could not be confirmed, or None.
+
+    Raises:
+        LookupError: If the payment is not found.
+    """
+    result = await db.execute(
+        update(Payment)
+        .where(Payment.id == payment_id)
+        .values(status=PaymentStatus.COMPLETED)
+        .returning(Payment.booking_id)
+    )
+    booking_id = result.scalars().first()
+    if booking_id is None:
+        raise LookupError(f"Payment {payment_id} not found")
+
+    db_booking = await get_booking(db, booking_id)
+    session_id = db_booking.session_id
+    if db_booking.status != BookingStatus.PENDING:
+        await bump_session_versions(db, [session_id])
+        return None
+    try:
+        async with db.begin_nested():
+            db_user = await get_user_by_booking_id(db, booking_id)
+            if db_user and db_user.notifications:
+                add_outbox_message(
+                    db,
+                    'booking_notifications',
+                    subject="Booking Status Update",
+                    recipients=[db_user.email],
+                    body=f"Booking status changed to {BookingStatus.CONFIRMED}.",
+                )
+            await apply_booking_status(db, db_booking, BookingStatus.CONFIRMED)
+    except HTTPException as e:
+        logger.error(f"Payment {payment_id} completed but booking id {booking_id} could not be confirmed: {e.detail}")
+        await bump_session_versions(db, [session_id])
+        return f"Payment {payment_id} completed but booking {booking_id} not confirmed: {e.detail}"
+    logger.info(f"Payment {payment_id} completed and booking id {booking_id} confirmed")
+    return None
+
+
+async def expire_checkout(db: AsyncSession, payment_id: str) -> None:
+    """
+    Fail the pending payment of an expired Checkout Session.
+
+    Args:
+        db (AsyncSession): The database session.
+        payment_id (str): The ID of the Checkout Session, which is the ID of the payment.
+    """
+    result = await db.execute(
+        update(Payment)
+        .where(Payment.id == payment_id, Payment.status == PaymentStatus.PENDING)
+        .values(status=PaymentStatus.FAILED)
+        .returning(Payment.booking_id)
+    )
+    await bump_booking_session_versions(db, result.scalars().all())
+
+
+async def apply_stripe_event(db: AsyncSession, db_event: StripeEvent) -> Optional[str]:
+    """
+    Apply a Stripe event to the payments and bookings. Events of other types are ignored.
+
+    Args:
+        db (AsyncSession): The database session.
+        db_event (StripeEvent): The event to apply.
+
+    Returns:
+        Optional[str]: The error of an event applied only in part, which needs manual handling, or None.
+    """
+    if db_event.type == "checkout.session.completed":
+        return await complete_checkout(db, db_event.payload["id"])
+    if db_event.type == "checkout.session.expired":
+        await expire_checkout(db, db_event.payload["id"])
+    else:
+        logger.info(f"Ignoring Stripe event {db_event.id} of type {db_event.type}")
+    return None
+
+
+async def process_stripe_events(db: AsyncSession, batch_size: int) -> int:
+    """
+    Apply the oldest unprocessed Stripe events in one transaction.
+
+    The batch is locked with FOR UPDATE SKIP LOCKED, so concurrent processors pick
+    disjoint batches. Each event is applied in a savepoint: an event that fails is rolled
+    back alone and marked as processed with its error, so it can be replayed once the
+    cause is fixed instead of blocking the events behind it. An event applied only in
+    part, a paid checkout whose booking cannot be confirmed, keeps its changes and is
+    marked with its error as well.
+
+    Args:
+        db (AsyncSession): The database session.
+        batch_size (int): The maximum number of events to apply.
+
+    Returns:
+        int: The number of events processed.
+    """
+    result = await db.execute(
+        select(StripeEvent)
+        .where(StripeEvent.processed_at.is_(None))
+        .order_by(StripeEvent.created_at, StripeEvent.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    db_events = result.scalars().all()
+    if not db_events:
+        await db.rollback()
+        return 0
+
+    for db_event in db_events:
+        try:
+            async with db.begin_nested():
+                db_event.error = await apply_stripe_event(db, db_event)
+        except Exception as e:
+            logger.error(f"Error applying Stripe event {db_event.id}: {e}")
+            db_event.error = str(e)
+        db_event.processed_at = datetime.utcnow()
+    await db.commit()
+    logger.info(f"Processed {len(db_events)} Stripe events")
+    return len(db_events)
+
+
+async def reset_stripe_events(db: AsyncSession, failed_only: bool = True, since: Optional[datetime] = None) -> int:
+    """
+    Mark processed Stripe events as unprocessed, so the event processor applies them again.
+
+    Applying an event twice leaves the payments and bookings as applying it once.
+
+    Args:
+        db (AsyncSession): The database session.
+        failed_only (bool): Whether to reset only the events that failed.
+        since (Optional[datetime]): Reset only the events received since this time, in naive UTC.
+
+    Returns:
+        int: The number of events reset.
+    """
+    query = update(StripeEvent).where(StripeEvent.processed_at.isnot(None))
+    if failed_only:
+        query = query.where(StripeEvent.error.isnot(None))
+    if since is not None:
+        query = query.where(StripeEvent.created_at >= since)
+    result = await db.execute(query.values(processed_at=None, error=None))
+    await db.commit()
+    logger.info(f"Reset {result.rowcount} Stripe events")
+    return result.rowcount
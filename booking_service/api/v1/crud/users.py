@@ -1,21 +1,23 @@
 from typing import Optional
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 import logging
 
-from ..models import User
+from ..models import Booking, User
 from ..schemas import UserCreate
+from ..utils.cache import invalidate_user
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-def create_user(db: Session, user: UserCreate) -> User:
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
     """
     Create a new user.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         user (UserCreate): The user creation schema.
 
     Returns:
@@ -24,17 +26,17 @@ def create_user(db: Session, user: UserCreate) -> User:
     logger.info(f"Creating a new user with email: {user.email}")
     db_user = User(email=user.email, hashed_password=user.password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     logger.info(f"User created with id {db_user.id}")
     return db_user
 
-def update_user_nickname(db: Session, user_id: int, new_nickname: str) -> User:
+async def update_user_nickname(db: AsyncSession, user_id: int, new_nickname: str) -> User:
     """
     Update a user's nickname.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         user_id (int): The ID of the user to update.
         new_nickname (str): The new nickname for the user.
 
@@ -45,23 +47,25 @@ def update_user_nickname(db: Session, user_id: int, new_nickname: str) -> User:
         HTTPException: If the user is not found.
     """
     logger.info(f"Updating nickname for user id {user_id}")
-    db_user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    db_user = result.scalars().first()
     if not db_user:
         logger.error(f"User with id {user_id} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
     db_user.nickname = new_nickname
-    db.commit()
-    db.refresh(db_user)
+    invalidate_user(db, db_user.email)
+    await db.commit()
+    await db.refresh(db_user)
     logger.info(f"Nickname for user id {user_id} updated to {new_nickname}")
     return db_user
 
-def update_user_notifications(db: Session, user_id: int, new_notifications: bool) -> User:
+async def update_user_notifications(db: AsyncSession, user_id: int, new_notifications: bool) -> User:
     """
     Update a user's notification settings.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         user_id (int): The ID of the user to update.
         new_notifications (bool): The new notification setting for the user.
 
@@ -72,23 +76,25 @@ def update_user_notifications(db: Session, user_id: int, new_notifications: bool
         HTTPException: If the user is not found.
     """
     logger.info(f"Updating notifications for user id {user_id}")
-    db_user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    db_user = result.scalars().first()
     if not db_user:
         logger.error(f"User with id {user_id} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
     db_user.notifications = new_notifications
-    db.commit()
-    db.refresh(db_user)
+    invalidate_user(db, db_user.email)
+    await db.commit()
+    await db.refresh(db_user)
     logger.info(f"Notifications for user id {user_id} updated to {new_notifications}")
     return db_user
 
-def grant_user_admin(db: Session, email: str) -> User:
+async def grant_user_admin(db: AsyncSession, email: str) -> User:
     """
     Grant admin privileges to a user.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         email (str): The email of the user to update.
 
     Returns:
@@ -98,49 +104,67 @@ def grant_user_admin(db: Session, email: str) -> User:
         HTTPException: If the user is not found.
     """
     logger.info(f"Granting admin privileges to user with email {email}")
-    db_user = get_user(db, email)
+    db_user = await get_user(db, email)
     if not db_user:
         logger.error(f"User with email {email} not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
     db_user.is_admin = True
-    db.commit()
-    db.refresh(db_user)
+    invalidate_user(db, db_user.email)
+    await db.commit()
+    await db.refresh(db_user)
     logger.info(f"Admin privileges granted to user with email {email}")
     return db_user
 
-def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
     """
     Retrieve a user by their ID.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         user_id (int): The ID of the user to retrieve.
 
     Returns:
         Optional[User]: The retrieved user, or None if not found.
     """
     logger.info(f"Retrieving user with id {user_id}")
-    db_user = db.query(User).filter(User.id == user_id).first()
+    result = await db.execute(select(User).where(User.id == user_id))
+    db_user = result.scalars().first()
     if db_user:
         logger.info(f"User with id {user_id} found")
     else:
         logger.info(f"User with id {user_id} not found")
     return db_user
 
-def get_user(db: Session, email: str) -> Optional[User]:
+async def get_user_by_booking_id(db: AsyncSession, booking_id: int) -> Optional[User]:
+    """
+    Retrieve the user who made a booking.
+
+    Args:
+        db (AsyncSession): The database session.
+        booking_id (int): The ID of the booking.
+
+    Returns:
+        Optional[User]: The retrieved user, or None if the booking or the user is not found.
+    """
+    logger.info(f"Retrieving user of booking id {booking_id}")
+    result = await db.execute(select(User).join(Booking, Booking.user_id == User.id).where(Booking.id == booking_id))
+    return result.scalars().first()
+
+async def get_user(db: AsyncSession, email: str) -> Optional[User]:
     """
     Retrieve a user by their email.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         email (str): The email of the user to retrieve.
 
     Returns:
         Optional[User]: The retrieved user, or None if not found.
     """
     logger.info(f"Retrieving user with email {email}")
-    db_user = db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    db_user = result.scalars().first()
     if db_user:
         logger.info(f"User with email {email} found")
     else:
@@ -0,0 +1,70 @@
+from typing import Iterable
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Booking, Film, Session as SessionModel
+from ..utils.cache import invalidate_catalog
+
+
+async def bump_film_version(db: AsyncSession, film_id: int) -> None:
+    """
+    Increment the version of a film.
+
+    Must be called in the same transaction as every change to the film or to the list
+    of its sessions, since the version makes up the ETag of the film. The cached catalog
+    responses including the film are invalidated once the transaction commits.
+
+    Args:
+        db (AsyncSession): The database session.
+        film_id (int): The ID of the film that changed.
+    """
+    await db.execute(update(Film).where(Film.id == film_id).values(version=Film.version + 1))
+    invalidate_catalog(db, f"film:{film_id}")
+
+
+async def bump_session_versions(db: AsyncSession, session_ids: Iterable[int]) -> None:
+    """
+    Increment the version of sessions.
+
+    Must be called in the same transaction as every change to a session or to the
+    bookings, reservations and payments nested in it, since the version makes up the
+    ETag of the session. Seat changes go through `crud.seats.bump_seatmap_version`,
+    which bumps the version too. The cached catalog responses including the sessions
+    are invalidated once the transaction commits.
+
+    Args:
+        db (AsyncSession): The database session.
+        session_ids (Iterable[int]): The IDs of the sessions that changed.
+    """
+    session_ids = set(session_ids)
+    if not session_ids:
+        return
+    await db.execute(
+        update(SessionModel)
+        .where(SessionModel.id.in_(session_ids))
+        .values(version=SessionModel.version + 1)
+    )
+    invalidate_catalog(db, *(f"session:{session_id}" for session_id in session_ids))
+
+
+async def bump_booking_session_versions(db: AsyncSession, booking_ids: Iterable[int]) -> None:
+    """
+    Increment the version of the sessions of bookings.
+
+    Used when a booking or the reservations and payments nested in it change.
+
+    Args:
+        db (AsyncSession): The database session.
+        booking_ids (Iterable[int]): The IDs of the bookings that changed.
+    """
+    booking_ids = set(booking_ids)
+    if not booking_ids:
+        return
+    result = await db.execute(
+        update(SessionModel)
+        .where(SessionModel.id.in_(select(Booking.session_id).where(Booking.id.in_(booking_ids))))
+        .values(version=SessionModel.version + 1)
+        .returning(SessionModel.id)
+    )
+    invalidate_catalog(db, *(f"session:{session_id}" for session_id in result.scalars().all()))
@@ -1,34 +1,79 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
 from .config import settings
 
+# Async drivers used in place of the synchronous ones configured in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """
+    Translate a database URL to the matching async driver.
+
+    DATABASE_URL is shared with Alembic, which runs migrations with the synchronous
+    driver, so the API swaps the scheme for its async counterpart.
+
+    Args:
+        database_url (str): The configured database URL.
+
+    Returns:
+        str: The database URL using an async driver.
+    """
+    scheme, separator, rest = database_url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}"
+
+
+def use_immediate_transactions(async_engine: AsyncEngine) -> None:
+    """
+    Make transactions on a SQLite engine take the write lock as soon as they begin.
+
+    With SQLite's default deferred transactions, concurrent writers that have already read
+    can deadlock on lock upgrades and fail with "database is locked" instead of waiting.
+    Other databases are left untouched.
+
+    Args:
+        async_engine (AsyncEngine): The engine to configure.
+    """
+    if async_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def disable_driver_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(async_engine.sync_engine, "begin")
+    def begin_immediate(connection):
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
 # Retrieve the database URL from the settings
-SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
+SQLALCHEMY_DATABASE_URL = get_async_database_url(settings.DATABASE_URL)
 
-# Create a database engine
-# SQLite specific argument `check_same_thread` is required to allow multiple threads to use the same connection
-if "sqlite" in SQLALCHEMY_DATABASE_URL:
-    engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(SQLALCHEMY_DATABASE_URL)
+# Create an async database engine
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL)
+use_immediate_transactions(engine)
 
-# Create a configured "Session" class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create a configured "AsyncSession" class
+# Objects are not expired on commit, since refreshing them implicitly is not possible with asyncio
+AsyncSessionLocal = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
 
 # Create a base class for our classes definitions
 Base = declarative_base()
 
-def get_db():
+
+async def get_db():
     """
-    Dependency that provides a SQLAlchemy session (database connection).
+    Dependency that provides an SQLAlchemy async session (database connection).
     It ensures that the database session is properly managed by closing it after the request is completed.
 
     Yields:
-        db (Session): SQLAlchemy session object
+        db (AsyncSession): SQLAlchemy async session object
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
-        
\ No newline at end of file
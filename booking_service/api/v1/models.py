@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Float, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Float, Enum, Index, JSON, func
 from sqlalchemy.orm import relationship
-from datetime import datetime, timezone
+from datetime import datetime
 from .database import Base
 from enum import Enum as PyEnum
 
@@ -43,6 +43,15 @@ class PaymentStatus(str, PyEnum):
     REFUNDED = "refunded"
 
 
+# DateTime columns are timezone naive and hold UTC times. asyncpg rejects timezone aware
+# values for them, so times are written as naive UTC, e.g. with datetime.utcnow.
+
+
+# Lazy loading is not available on an AsyncSession, so relationships must not be accessed
+# implicitly. Queries returning objects for the API schemas load the collections those
+# schemas serialize with the options in crud/loaders.py.
+
+
 # Define the User model
 class User(Base):
     __tablename__ = "users"
@@ -68,6 +77,7 @@ class Film(Base):
     duration = Column(Integer)  # Duration in minutes
     image_url = Column(String, nullable=True)
     status = Column(Enum(FilmStatus), default=FilmStatus.AVAILABLE)
+    version = Column(Integer, default=1, nullable=False, server_default="1")  # Bumped on every change to the film or its sessions list
     sessions = relationship("Session", back_populates="film", cascade="all, delete-orphan")
 
     def __repr__(self):
@@ -77,13 +87,21 @@ class Film(Base):
 # Define the Session model
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        # Used by the scheduled status sweep
+        Index("ix_sessions_status_datetime", "status", "datetime"),
+        Index("ix_sessions_status_end_datetime", "status", "end_datetime"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     film_id = Column(Integer, ForeignKey("films.id", ondelete="CASCADE"))
     datetime = Column(DateTime, index=True)
+    end_datetime = Column(DateTime, index=True)  # datetime + film duration
     price = Column(Float)
     capacity = Column(Integer)  # Number of available seats
     auto_booking = Column(Boolean, default=False)
     status = Column(Enum(SessionStatus), default=SessionStatus.UPCOMING)
+    seatmap_version = Column(Integer, default=0, nullable=False, server_default="0")  # Bumped on every seat change
+    version = Column(Integer, default=1, nullable=False, server_default="1")  # Bumped on every change to the session, its seats or bookings
     film = relationship("Film", back_populates="sessions")
     bookings = relationship("Booking", back_populates="session", cascade="all, delete-orphan")
     seats = relationship("Seat", back_populates="session", cascade="all, delete-orphan")
@@ -128,7 +146,7 @@ class Reservation(Base):
     booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"))
     seat_id = Column(Integer, ForeignKey("seats.id", ondelete="SET NULL"))
     status = Column(Enum(ReservationStatus), default=ReservationStatus.PENDING)
-    deadline = Column(DateTime, default=datetime.now(timezone.utc))
+    deadline = Column(DateTime, default=datetime.utcnow)
     booking = relationship("Booking", back_populates="reservations")
 
     def __repr__(self):
@@ -137,12 +155,51 @@ class Reservation(Base):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        # Used by the scheduled expiry of pending payments
+        Index("ix_payments_status_timestamp", "status", "timestamp"),
+    )
     id = Column(String, primary_key=True, index=True)
     booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"))
     amount = Column(Float, nullable=False)
     status = Column(Enum(PaymentStatus), default=PaymentStatus.PENDING)
-    timestamp = Column(DateTime, default=datetime.now(timezone.utc))
+    timestamp = Column(DateTime, default=datetime.utcnow)
+    checkout_url = Column(String, nullable=True)
     booking = relationship("Booking", back_populates="payments")
 
     def __repr__(self):
         return f"<Payment(id={self.id}, booking_id={self.booking_id}, amount={self.amount}, status={self.status})>"
+
+
+# Define the OutboxMessage model
+class OutboxMessage(Base):
+    """
+    Message written in the same transaction as the change it announces, and relayed to
+    RabbitMQ by a background job once the transaction has committed.
+    """
+    __tablename__ = "outbox_messages"
+    id = Column(Integer, primary_key=True, index=True)
+    queue = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, queue={self.queue})>"
+
+
+# Define the StripeEvent model
+class StripeEvent(Base):
+    """
+    Stripe webhook event, stored when it is received and applied by a background job.
+    The Stripe event ID is the primary key, so an event delivered several times is stored once.
+    """
+    __tablename__ = "stripe_events"
+    id = Column(String, primary_key=True)
+    type = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    processed_at = Column(DateTime, nullable=True, index=True)
+    error = Column(String, nullable=True)
+
+    def __repr__(self):
+        return f"<StripeEvent(id={self.id}, type={self.type}, processed_at={self.processed_at})>"
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict
 
 from ..database import get_db
 from ..models import User as UserModel
 from ..schemas import User
 from ..utils.auth import get_current_active_admin
 from ..crud.users import grant_user_admin
+from ..utils.cache import catalog_cache
 
 router = APIRouter(
     prefix="/admin",
@@ -16,15 +17,25 @@ router = APIRouter(
 )
 
 @router.put("/users/{user_email}/set_admin", response_model=User, status_code=status.HTTP_200_OK)
-async def set_user_admin(user_email: str, db: Session = Depends(get_db)) -> Any:
+async def set_user_admin(user_email: str, db: AsyncSession = Depends(get_db)) -> Any:
     """
     Grant admin privileges to a user.
 
     Args:
         user_email (str): The email of the user to grant admin privileges to.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         User: The updated user with admin privileges.
     """
-    return grant_user_admin(db, user_email)
+    return await grant_user_admin(db, user_email)
+
+@router.get("/cache", response_model=Dict[str, Any], status_code=status.HTTP_200_OK)
+async def read_cache_stats() -> Dict[str, Any]:
+    """
+    Get the counters of the catalog cache.
+
+    Returns:
+        Dict[str, Any]: The hits, misses, evictions, invalidations, size and limits of the cache.
+    """
+    return catalog_cache.stats()
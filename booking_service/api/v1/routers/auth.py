@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from datetime import timedelta
 from typing import Any, Dict
@@ -7,7 +7,7 @@ from typing import Any, Dict
 from ..database import get_db
 from ..schemas import UserCreate, User
 from ..models import User as UserModel
-from ..utils.auth import verify_password, get_password_hash
+from ..utils.auth import hash_password, verify_and_update_password
 from ..utils.jwt import create_access_token
 from ..config import settings
 from ..crud.users import get_user
@@ -23,13 +23,13 @@ ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
 
 @router.post("/register", response_model=User, status_code=status.HTTP_201_CREATED, summary="Register a new user", tags=["auth"])
-async def register_user(user: UserCreate, db: Session = Depends(get_db)) -> User:
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)) -> User:
     """
     Register a new user.
 
     Args:
         user (UserCreate): The user registration data.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         User: The registered user.
@@ -37,26 +37,26 @@ async def register_user(user: UserCreate, db: Session = Depends(get_db)) -> User
     Raises:
         HTTPException: If the email is already registered.
     """
-    db_user = get_user(db, user.email)
+    db_user = await get_user(db, user.email)
     if db_user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
     db_user = UserModel(email=user.email, nickname="Anonym", hashed_password=hashed_password)
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
 @router.post("/token", response_model=Dict[str, str], summary="Login for access token", tags=["auth"])
-async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)) -> Dict[str, str]:
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)) -> Dict[str, str]:
     """
     Login for access token.
 
     Args:
         form_data (OAuth2PasswordRequestForm): The login form data.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         Dict[str, str]: The access token and token type.
@@ -64,9 +64,16 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
     Raises:
         HTTPException: If the email or password is incorrect.
     """
-    user = get_user(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await get_user(db, form_data.username)
+    if not user:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect email or password")
+    verified, new_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+    if not verified:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect email or password")
+    if new_hash:
+        # The hash was made with another cost factor than the configured one
+        user.hashed_password = new_hash
+        await db.commit()
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -1,15 +1,16 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
 from ..database import get_db
 from ..schemas import BookingCreate, Booking
-from ..crud.bookings import create_booking, get_booking, get_bookings, update_booking_status, delete_booking
-from ..crud.users import get_user_by_id
+from ..crud.bookings import create_booking, get_booking, get_bookings, update_booking_status, delete_booking, count_bookings, BOOKING_ORDER
+from ..crud.outbox import add_outbox_message
+from ..crud.users import get_user_by_booking_id
 from ..models import User, BookingStatus
 from ..utils.auth import get_current_active_user, get_current_active_admin
-from ..utils.rabbitmq import publish_message
+from ..utils.pagination import set_next_cursor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,7 +27,7 @@ router = APIRouter(
              tags=["bookings"])
 async def create_new_booking(
         booking: BookingCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_active_user)
 ) -> Booking:
     """
@@ -34,14 +35,14 @@ async def create_new_booking(
 
     Args:
         booking (BookingCreate): The booking creation data.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_user (User): The current active user.
 
     Returns:
         Booking: The created booking.
     """
     logger.info(f"Creating a new booking for user: {current_user.email}")
-    db_booking = create_booking(db=db, booking=booking, user_id=current_user.id)
+    db_booking = await create_booking(db=db, booking=booking, user_id=current_user.id)
     logger.info(f"Booking created with ID: {db_booking.id}")
     return db_booking
 
@@ -50,7 +51,7 @@ async def create_new_booking(
                summary="Delete a booking", tags=["bookings"])
 async def delete_booking_from_db(
         booking_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_admin: User = Depends(get_current_active_admin)
 ) -> Booking:
     """
@@ -58,14 +59,14 @@ async def delete_booking_from_db(
 
     Args:
         booking_id (int): The ID of the booking to delete.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_admin (User): The current active admin.
 
     Returns:
         Booking: The deleted booking.
     """
     logger.info(f"Admin {current_admin.email} attempting to delete booking with ID: {booking_id}")
-    db_booking = delete_booking(db, booking_id)
+    db_booking = await delete_booking(db, booking_id)
     logger.info(f"Booking with ID: {booking_id} deleted")
     return db_booking
 
@@ -75,7 +76,7 @@ async def delete_booking_from_db(
 async def set_booking_status(
         booking_id: int,
         new_status: BookingStatus,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_admin: User = Depends(get_current_active_admin)
 ) -> Booking:
     """
@@ -84,25 +85,27 @@ async def set_booking_status(
     Args:
         booking_id (int): The ID of the booking.
         new_status (BookingStatus): The new status to set.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_admin (User): The current active admin.
 
     Returns:
         Booking: The updated booking.
     """
     logger.info(f"Admin {current_admin.email} setting status of booking ID {booking_id} to {new_status}")
-    db_booking = update_booking_status(db, booking_id, new_status)
-    db_user = get_user_by_id(db, db_booking.user_id)
-    if not db_user:
-        logger.error(f"User not found for booking ID {booking_id}")
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
-    if db_user.notifications:
-        await publish_message(
+    db_user = await get_user_by_booking_id(db, booking_id)
+    # The notification is committed together with the new status
+    if db_user and db_user.notifications:
+        add_outbox_message(
+            db,
             'booking_notifications',
             subject="Booking Status Update",
             recipients=[db_user.email],
             body=f"Booking status changed to {new_status}.",
         )
+    db_booking = await update_booking_status(db, booking_id, new_status)
+    if not db_user:
+        logger.error(f"User not found for booking ID {booking_id}")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     logger.info(f"Booking ID {booking_id} status updated to {new_status}")
     return db_booking
 
@@ -111,7 +114,7 @@ async def set_booking_status(
              summary="Cancel user booking", tags=["bookings"])
 async def cancel_user_booking(
         booking_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_active_user)
 ) -> Booking:
     """
@@ -119,7 +122,7 @@ async def cancel_user_booking(
 
     Args:
         booking_id (int): The ID of the booking to cancel.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_user (User): The current active user.
 
     Returns:
@@ -129,70 +132,84 @@ async def cancel_user_booking(
         HTTPException: If the user is not authorized to cancel the booking.
     """
     logger.info(f"User {current_user.email} attempting to cancel booking with ID {booking_id}")
-    db_booking = get_booking(db, booking_id=booking_id)
+    db_booking = await get_booking(db, booking_id=booking_id)
     if db_booking.user_id != current_user.id and not current_user.is_admin:
         logger.warning(f"Unauthorized cancellation attempt by user {current_user.email} for booking ID {booking_id}")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to cancel this booking")
-    update_booking_status(db, booking_id, BookingStatus.CANCELED)
 
+    # The notification is committed together with the cancellation
     if current_user.notifications:
-        await publish_message(
+        add_outbox_message(
+            db,
             'booking_notifications',
             subject="Booking Cancellation",
             recipients=[current_user.email],
             body=f"Booking with ID {booking_id} cancelled.",
         )
+    await update_booking_status(db, booking_id, BookingStatus.CANCELED)
     logger.info(f"Booking with ID {booking_id} cancelled")
     return db_booking
 
 
 @router.get("/{booking_id}", response_model=Booking, status_code=status.HTTP_200_OK, summary="Read a booking",
             tags=["bookings"])
-async def read_booking(booking_id: int, db: Session = Depends(get_db)) -> Booking:
+async def read_booking(booking_id: int, db: AsyncSession = Depends(get_db)) -> Booking:
     """
     Read a booking by ID.
 
     Args:
         booking_id (int): The ID of the booking to read.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         Booking: The booking with the given ID.
     """
     logger.info(f"Fetching booking details for booking ID {booking_id}")
-    return get_booking(db, booking_id)
+    return await get_booking(db, booking_id)
 
 
 @router.get("/", response_model=List[Booking], status_code=status.HTTP_200_OK, summary="Read multiple bookings",
             tags=["bookings"])
 async def read_bookings(
+        response: Response,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
+        cursor: Optional[str] = None,
         user_id: Optional[int] = None,
         session_id: Optional[int] = None,
         booking_status: Optional[BookingStatus] = None,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ) -> List[Booking]:
     """
     Read multiple bookings with optional filters.
+    The total number of matching bookings is returned in the X-Total-Count header and, when the
+    page is full, the cursor of the next page in the X-Next-Cursor header.
 
     Args:
+        response (Response): The response, used to set the total count and next cursor headers.
         skip (Optional[int]): Number of records to skip.
         limit (Optional[int]): Maximum number of records to return.
+        cursor (Optional[str]): The cursor of the previous page.
         user_id (Optional[int]): Filter by user ID.
         session_id (Optional[int]): Filter by session ID.
         booking_status (Optional[BookingStatus]): Filter by booking status.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         List[Booking]: A list of bookings.
     """
     logger.info("Fetching multiple bookings")
-    return get_bookings(
+    response.headers["X-Total-Count"] = str(
+        await count_bookings(db, user_id=user_id, session_id=session_id, booking_status=booking_status)
+    )
+    bookings = await get_bookings(
         db,
         skip=skip,
         limit=limit,
+        cursor=cursor,
         user_id=user_id,
         session_id=session_id,
         booking_status=booking_status
     )
+    set_next_cursor(response, bookings, BOOKING_ORDER, limit)
+    return bookings
@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from ..database import get_db
 from ..utils.auth import get_current_active_user
 from ..schemas import User
+from ..crud.outbox import add_outbox_message
 from ..crud.users import update_user_notifications
-from ..utils.rabbitmq import publish_message
 
 router = APIRouter(
     prefix="/email",
@@ -39,14 +39,14 @@ router = APIRouter(
     },
 )
 async def subscribe(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> dict:
     """
     Subscribe the current user to email notifications.
 
     Args:
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         current_user (User): The current active user.
 
     Returns:
@@ -56,13 +56,15 @@ async def subscribe(
         HTTPException: If there is an error updating the user notifications.
     """
     try:
-        update_user_notifications(db, current_user.id, True)
-        await publish_message(
+        # The confirmation is committed together with the new setting
+        add_outbox_message(
+            db,
             'booking_notifications',
             subject="Subscription to Booking Notifications",
             recipients=[current_user.email],
             body=f"You have successfully subscribed to booking notifications!",
         )
+        await update_user_notifications(db, current_user.id, True)
         return {"message": "Subscription successful"}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
@@ -94,14 +96,14 @@ async def subscribe(
     },
 )
 async def unsubscribe(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> dict:
     """
     Unsubscribe the current user from email notifications.
 
     Args:
-        db (Session): Database session.
+        db (AsyncSession): Database session.
         current_user (User): The current active user.
 
     Returns:
@@ -111,13 +113,15 @@ async def unsubscribe(
         HTTPException: If there is an error updating the user notifications.
     """
     try:
-        update_user_notifications(db, current_user.id, False)
-        await publish_message(
+        # The confirmation is committed together with the new setting
+        add_outbox_message(
+            db,
             'booking_notifications',
             subject="Unsubscription from Booking Notifications",
             recipients=[current_user.email],
             body=f"You have successfully unsubscribed from booking notifications.",
         )
+        await update_user_notifications(db, current_user.id, False)
         return {"message": "Unsubscribe successful"}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
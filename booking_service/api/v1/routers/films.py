@@ -1,15 +1,18 @@
 import os
 from pathlib import Path
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, status
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, UploadFile, File, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional, Union
 import shutil
 
 from ..database import get_db
 from ..models import FilmStatus
-from ..schemas import FilmCreate, Film, User
-from ..crud.films import get_films, get_film, create_film, delete_film, update_film_status
+from ..schemas import FilmCreate, Film, FilmDetail, FilmSummary, User
+from ..crud.films import get_films, get_film, get_film_detail, get_film_version, create_film, delete_film, update_film_status, count_films, FILM_ORDER
+from ..crud.versions import bump_film_version
 from ..utils.auth import get_current_active_admin
+from ..utils.cache import cached_response, dump_response, film_tags
+from ..utils.pagination import set_next_cursor
 
 # Define the base directory
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -24,7 +27,7 @@ router = APIRouter(
 @router.post("/", response_model=Film, status_code=status.HTTP_201_CREATED, summary="Create a new film", tags=["films"])
 async def create_new_film(
     film: FilmCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_active_admin)
 ) -> Film:
     """
@@ -32,19 +35,19 @@ async def create_new_film(
 
     Args:
         film (FilmCreate): The film creation data.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_admin (User): The current active admin.
 
     Returns:
         Film: The created film.
     """
-    return create_film(db=db, film=film)
+    return await create_film(db=db, film=film)
 
 @router.post("/{film_id}/upload_image", response_model=Film, status_code=status.HTTP_200_OK, summary="Upload film image", tags=["films"])
 async def upload_film_image(
     film_id: int, 
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_active_admin)
 ) -> Film:
     """
@@ -53,13 +56,13 @@ async def upload_film_image(
     Args:
         film_id (int): The ID of the film.
         file (UploadFile): The image file to upload.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_admin (User): The current active admin.
 
     Returns:
         Film: The updated film with the image URL.
     """
-    db_film = get_film(db, film_id)
+    db_film = await get_film(db, film_id)
     if not db_film:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Film not found")
 
@@ -73,14 +76,15 @@ async def upload_film_image(
     with file_location.open("wb+") as file_object:
         shutil.copyfileobj(file.file, file_object)
 
-    db.commit()
-    db.refresh(db_film)
+    await bump_film_version(db, film_id)
+    await db.commit()
+    await db.refresh(db_film)
     return db_film
 
 @router.delete("/{film_id}/delete", response_model=Film, status_code=status.HTTP_200_OK, summary="Delete a film", tags=["films"])
 async def delete_film_from_db(
     film_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_active_admin)
 ) -> Film:
     """
@@ -88,19 +92,19 @@ async def delete_film_from_db(
 
     Args:
         film_id (int): The ID of the film to delete.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_admin (User): The current active admin.
 
     Returns:
         Film: The deleted film.
     """
-    return delete_film(db, film_id)
+    return await delete_film(db, film_id)
 
 @router.post("/{film_id}/status/{new_status}", response_model=Film, status_code=status.HTTP_200_OK, summary="Set film status", tags=["films"])
 async def set_film_status(
     film_id: int,
     new_status: FilmStatus,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_active_admin)
 ) -> Film:
     """
@@ -109,45 +113,85 @@ async def set_film_status(
     Args:
         film_id (int): The ID of the film.
         new_status (FilmStatus): The new status to set.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_admin (User): The current active admin.
 
     Returns:
         Film: The updated film with the new status.
     """
-    return update_film_status(db, film_id, new_status)
-
-@router.get("/{film_id}", response_model=Film, status_code=status.HTTP_200_OK, summary="Get a film by ID", tags=["films"])
-async def read_film(film_id: int, db: Session = Depends(get_db)) -> Film:
+    return await update_film_status(db, film_id, new_status)
+
+# Catalog reads are served from the catalog cache and serialized with the schema matching `expand`;
+# the response unions document both representations
+@router.get("/{film_id}", response_model=Union[Film, FilmDetail], status_code=status.HTTP_200_OK, summary="Get a film by ID", tags=["films"])
+async def read_film(
+    request: Request,
+    response: Response,
+    film_id: int,
+    expand: Optional[Literal["full"]] = None,
+    db: AsyncSession = Depends(get_db)
+) -> Response:
     """
     Get a film by its ID.
+    The sessions of the film are returned as summaries, unless expand=full is given.
+    The film is served from the catalog cache, with an ETag derived from the versions of the
+    film and its sessions; a matching If-None-Match header gets a 304 response.
 
     Args:
+        request (Request): The request, used as the cache key and for conditional requests.
+        response (Response): The response.
         film_id (int): The ID of the film to retrieve.
-        db (Session): The database session.
+        expand (Optional[str]): "full" to return the sessions with their bookings and seats.
+        db (AsyncSession): The database session.
 
     Returns:
-        Film: The film with the given ID.
+        Response: The film with the given ID.
     """
-    return get_film(db, film_id)
+    async def load():
+        if expand == "full":
+            return dump_response(Film, await get_film(db, film_id))
+        return dump_response(FilmDetail, await get_film_detail(db, film_id))
+
+    return await cached_response(request, response, load, film_tags,
+                                 version=lambda: get_film_version(db, film_id))
 
-@router.get("/", response_model=List[Film], status_code=status.HTTP_200_OK, summary="Get films with optional filters", tags=["films"])
+@router.get("/", response_model=Union[List[Film], List[FilmSummary]], status_code=status.HTTP_200_OK, summary="Get films with optional filters", tags=["films"])
 async def read_films(
+    request: Request,
+    response: Response,
     skip: Optional[int] = None,
     limit: Optional[int] = None,
+    cursor: Optional[str] = None,
     film_status: Optional[FilmStatus] = None,
-    db: Session = Depends(get_db)
-) -> List[Film]:
+    expand: Optional[Literal["full"]] = None,
+    db: AsyncSession = Depends(get_db)
+) -> Response:
     """
     Get a list of films with optional filters.
+    The films are returned as summaries without their sessions, unless expand=full is given,
+    and served from the catalog cache with an ETag; a matching If-None-Match header gets a 304 response.
+    The total number of matching films is returned in the X-Total-Count header and, when the
+    page is full, the cursor of the next page in the X-Next-Cursor header.
 
     Args:
+        request (Request): The request, used as the cache key.
+        response (Response): The response, used to set the total count and next cursor headers.
         skip (Optional[int]): Number of records to skip.
         limit (Optional[int]): Maximum number of records to return.
+        cursor (Optional[str]): The cursor of the previous page.
         film_status (Optional[FilmStatus]): Filter by film status.
-        db (Session): The database session.
+        expand (Optional[str]): "full" to return the films with their sessions, bookings and seats.
+        db (AsyncSession): The database session.
 
     Returns:
-        List[Film]: A list of films.
+        Response: A list of films.
     """
-    return get_films(db, skip=skip, limit=limit, film_status=film_status)
+    async def load():
+        response.headers["X-Total-Count"] = str(await count_films(db, film_status=film_status))
+        films = await get_films(db, skip=skip, limit=limit, cursor=cursor, film_status=film_status,
+                                with_sessions=expand == "full")
+        set_next_cursor(response, films, FILM_ORDER, limit)
+        return dump_response(List[Film] if expand == "full" else List[FilmSummary], films)
+
+    return await cached_response(request, response, load,
+                                 lambda films: {"films"}.union(*(film_tags(film) for film in films)))
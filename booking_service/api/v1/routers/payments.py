@@ -1,26 +1,58 @@
+import asyncio
 import logging
 import stripe
 import os
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from starlette.responses import JSONResponse
 
 from ..models import PaymentStatus
 
+from ..config import settings
 from ..database import get_db
 from ..schemas import PaymentCreate, Payment
 from ..utils.auth import get_current_active_user
 from ..schemas import User
-from ..crud.payments import create_payment, update_payment_status, get_payment, get_payments
+from ..crud.payments import create_payment, get_payment, get_payments, get_pending_payment
 from ..crud.bookings import get_booking
 from ..crud.sessions import get_session
+from ..crud.stripe_events import store_stripe_event
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Stripe
-stripe.api_key = os.getenv("STRIPE_API_KEY")
+# Initialize Stripe; the HTTP client gives up after the same timeout as the API,
+# so a call abandoned by the API does not keep holding a worker thread
+stripe.api_key = settings.STRIPE_API_KEY
+stripe.api_base = settings.STRIPE_API_BASE
+stripe.default_http_client = stripe.http_client.new_default_http_client(timeout=settings.STRIPE_TIMEOUT)
+
+
+async def create_stripe_checkout_session(idempotency_key: str, **params) -> stripe.checkout.Session:
+    """
+    Create a Stripe Checkout Session without blocking the event loop.
+
+    The synchronous Stripe client runs in a worker thread and the call is abandoned after
+    STRIPE_TIMEOUT seconds. Stripe answers a repeated idempotency key with the Checkout
+    Session it created for the first request, so the call is safe to retry.
+
+    Args:
+        idempotency_key (str): The idempotency key of the request.
+        **params: The parameters of the Checkout Session.
+
+    Returns:
+        stripe.checkout.Session: The created Checkout Session.
+
+    Raises:
+        asyncio.TimeoutError: If Stripe did not answer in time.
+    """
+    return await asyncio.wait_for(
+        asyncio.to_thread(stripe.checkout.Session.create, idempotency_key=idempotency_key, **params),
+        timeout=settings.STRIPE_TIMEOUT
+    )
+
 
 router = APIRouter(
     prefix="/payments",
@@ -33,7 +65,7 @@ router = APIRouter(
              summary="Create a Stripe Checkout Session")
 async def create_checkout_session(
         payment: PaymentCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_active_user)
 ) -> dict:
     """
@@ -41,27 +73,35 @@ async def create_checkout_session(
 
     Args:
         payment (PaymentCreate): The payment creation data.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_user (User): The current active user.
 
     Returns:
         Any: The created Stripe Checkout Session URL.
     """
     try:
-        db_booking = get_booking(db, payment.booking_id)
+        db_booking = await get_booking(db, payment.booking_id)
         if db_booking.payments:
             for current_payment in db_booking.payments:
                 if current_payment.status == PaymentStatus.COMPLETED:
                     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
                                         detail="Payment with this booking_id already exist.")
-        db_session = get_session(db, db_booking.session_id)
+        db_session = await get_session(db, db_booking.session_id)
         if not db_session:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                                 detail="Session for this payment is not found.")
         amount = int(db_session.price * len(db_booking.reservations) * 100)
 
-        # Create a Checkout Session
-        session = stripe.checkout.Session.create(
+        # Send the user back to the checkout they already started, if it can still be paid
+        db_payment = await get_pending_payment(db, payment.booking_id, amount)
+        if db_payment:
+            logger.info(f"Checkout Session reused: {db_payment.id} for Booking ID: {db_payment.booking_id}")
+            return {"checkout_url": db_payment.checkout_url}
+
+        # Create a Checkout Session; the payments made so far tell the attempts of a booking apart,
+        # so a request repeated before this one is saved gets the same Checkout Session back
+        session = await create_stripe_checkout_session(
+            idempotency_key=f"checkout-{payment.booking_id}-{amount}-{len(db_booking.payments)}",
             payment_method_types=['card'],
             line_items=[{
                 'price_data': {
@@ -81,23 +121,36 @@ async def create_checkout_session(
 
         # Save the Payment information in the database
         payment.id = session["id"]
-        db_payment = create_payment(db, payment, amount)
-        logger.info(f"Checkout Session created: {session['id']} for Booking ID: {db_payment.booking_id}")
+        try:
+            await create_payment(db, payment, amount, session.url)
+        except IntegrityError:
+            # A concurrent request got the same Checkout Session and saved it first
+            await db.rollback()
+        logger.info(f"Checkout Session created: {session['id']} for Booking ID: {payment.booking_id}")
 
         return {"checkout_url": session.url}
+    except HTTPException:
+        raise
+    except asyncio.TimeoutError:
+        logger.error(f"Stripe did not create the Checkout Session within {settings.STRIPE_TIMEOUT}s")
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Payment provider timed out")
     except Exception as e:
         logger.error(f"Error creating Checkout Session: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error creating Checkout Session")
 
 
 @router.post("/webhook", status_code=status.HTTP_200_OK, summary="Handle Stripe Webhook")
-async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
+async def stripe_webhook(request: Request, db: AsyncSession = Depends(get_db)):
     """
     Handle Stripe Webhook events.
 
+    The verified event is stored and acknowledged right away; the scheduled event
+    processor applies it to the payments and bookings. Events delivered again by Stripe
+    are acknowledged without being stored twice.
+
     Args:
         request (Request): The request object.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         Any: The response to the webhook event.
@@ -107,7 +160,7 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
 
     try:
         event = stripe.Webhook.construct_event(
-            payload, sig_header, os.getenv("STRIPE_WEBHOOK_SECRET")
+            payload, sig_header, settings.STRIPE_WEBHOOK_SECRET
         )
     except ValueError as e:
         # Invalid payload
@@ -118,17 +171,6 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
         logger.error(f"Invalid signature: {e}")
         return JSONResponse({"error": "Invalid signature"}, status_code=400)
 
-    if event['type'] == 'checkout.session.completed':
-        session = event['data']['object']
-        logger.info(f"Checkout Session was successful: {session['id']}")
-
-        # Update payment status in the database
-        payment_id = session["id"]
-        if payment_id:
-            db_payment = update_payment_status(db, payment_id, PaymentStatus.COMPLETED)
-            if db_payment:
-                logger.info(f"Payment status updated to COMPLETED for payment ID: {payment_id}")
-            else:
-                logger.error(f"Payment not found for payment ID: {payment_id}")
+    await store_stripe_event(db, event["id"], event["type"], event["data"]["object"])
 
     return JSONResponse({"status": "success"})
@@ -1,13 +1,15 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
 from ..schemas import ReservationCreate, Reservation
-from ..crud.reservations import create_reservation, delete_reservation, get_reservation, get_reservations, update_reservation_status
+from ..crud.reservations import create_reservation, delete_reservation, get_reservation, get_reservations, update_reservation_status, count_reservations, RESERVATION_ORDER
+from ..crud.bookings import get_booking
 from ..models import User, ReservationStatus
 from ..utils.auth import get_current_user, get_current_active_admin
+from ..utils.pagination import set_next_cursor
 
 router = APIRouter(
     prefix="/reservations",
@@ -18,7 +20,7 @@ router = APIRouter(
 @router.post("/", response_model=Reservation, status_code=status.HTTP_201_CREATED, summary="Create a new reservation", tags=["reservations"])
 async def create_new_reservation(
     reservation: ReservationCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> Reservation:
     """
@@ -26,18 +28,18 @@ async def create_new_reservation(
 
     Args:
         reservation (ReservationCreate): The reservation creation data.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_user (User): The current active user.
 
     Returns:
         Reservation: The created reservation.
     """
-    return create_reservation(db=db, reservation=reservation)
+    return await create_reservation(db=db, reservation=reservation)
 
 @router.delete("/{reservation_id}/delete", response_model=Reservation, status_code=status.HTTP_200_OK, summary="Delete a reservation", tags=["reservations"])
 async def delete_reservation_from_db(
     reservation_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_active_admin)
 ) -> Reservation:
     """
@@ -45,19 +47,19 @@ async def delete_reservation_from_db(
 
     Args:
         reservation_id (int): The ID of the reservation to delete.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_admin (User): The current active admin.
 
     Returns:
         Reservation: The deleted reservation.
     """
-    return delete_reservation(db, reservation_id)
+    return await delete_reservation(db, reservation_id)
 
 @router.post("/{reservation_id}/status/{new_status}", response_model=Reservation, status_code=status.HTTP_200_OK, summary="Set reservation status", tags=["reservations"])
 async def set_reservation_status(
     reservation_id: int,
     new_status: ReservationStatus,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_active_admin)
 ) -> Reservation:
     """
@@ -66,18 +68,18 @@ async def set_reservation_status(
     Args:
         reservation_id (int): The ID of the reservation.
         new_status (ReservationStatus): The new status to set.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_admin (User): The current active admin.
 
     Returns:
         Reservation: The updated reservation with the new status.
     """
-    return update_reservation_status(db, reservation_id, new_status)
+    return await update_reservation_status(db, reservation_id, new_status)
 
 @router.post("/{reservation_id}/cancel", response_model=Reservation, status_code=status.HTTP_200_OK, summary="Cancel user reservation", tags=["reservations"])
 async def cancel_user_reservation(
     reservation_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> Reservation:
     """
@@ -85,7 +87,7 @@ async def cancel_user_reservation(
 
     Args:
         reservation_id (int): The ID of the reservation to cancel.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_user (User): The current active user.
 
     Returns:
@@ -94,44 +96,54 @@ async def cancel_user_reservation(
     Raises:
         HTTPException: If the user is not authorized to cancel the reservation.
     """
-    db_reservation = get_reservation(db, reservation_id=reservation_id)
-    if db_reservation.booking.user_id != current_user.id:
+    db_reservation = await get_reservation(db, reservation_id=reservation_id)
+    db_booking = await get_booking(db, db_reservation.booking_id)
+    if db_booking.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to cancel this reservation")
 
-    return update_reservation_status(db, reservation_id, ReservationStatus.CANCELED)
+    return await update_reservation_status(db, reservation_id, ReservationStatus.CANCELED)
 
 @router.get("/{reservation_id}", response_model=Reservation, status_code=status.HTTP_200_OK, summary="Get a reservation by ID", tags=["reservations"])
 async def read_reservation(
     reservation_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Reservation:
     """
     Get a reservation by its ID.
 
     Args:
         reservation_id (int): The ID of the reservation to retrieve.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
         Reservation: The reservation with the given ID.
     """
-    return get_reservation(db, reservation_id)
+    return await get_reservation(db, reservation_id)
 
 @router.get("/", response_model=List[Reservation], status_code=status.HTTP_200_OK, summary="Get reservations with optional filters", tags=["reservations"])
 async def read_reservations(
+    response: Response,
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db)
 ) -> List[Reservation]:
     """
     Get a list of reservations with optional filters.
+    The total number of reservations is returned in the X-Total-Count header and, when the
+    page is full, the cursor of the next page in the X-Next-Cursor header.
 
     Args:
+        response (Response): The response, used to set the total count and next cursor headers.
         skip (int): Number of records to skip.
         limit (int): Maximum number of records to return.
-        db (Session): The database session.
+        cursor (Optional[str]): The cursor of the previous page.
+        db (AsyncSession): The database session.
 
     Returns:
         List[Reservation]: A list of reservations.
     """
-    return get_reservations(db, skip=skip, limit=limit)
\ No newline at end of file
+    response.headers["X-Total-Count"] = str(await count_reservations(db))
+    reservations = await get_reservations(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, reservations, RESERVATION_ORDER, limit)
+    return reservations
\ No newline at end of file
@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import List, Literal, Optional, Union
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
 from ..models import SessionStatus
-from ..schemas import SessionCreate, Session, User
-from ..crud.sessions import create_session, get_sessions, get_session, delete_session, update_session_status, update_session_price
+from ..schemas import SessionCreate, Session, SessionSummary, SeatMap, User
+from ..crud.sessions import create_session, get_sessions, get_session, delete_session, update_session_status, update_session_price, get_session_seat_map, count_sessions, get_session_summaries, get_session_summary, get_session_version, SESSION_ORDER
 from ..utils.auth import get_current_active_admin
+from ..utils.cache import cached_response, dump_response, session_tags
+from ..utils.pagination import set_next_cursor
 
 router = APIRouter(
     prefix="/sessions",
@@ -17,7 +19,7 @@ router = APIRouter(
 @router.post("/", response_model=Session, status_code=status.HTTP_201_CREATED, summary="Create a new session", tags=["sessions"])
 async def create_new_session(
     session: SessionCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_active_admin)
 ) -> Session:
     """
@@ -25,18 +27,18 @@ async def create_new_session(
 
     Args:
         session (SessionCreate): The session creation data.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_admin (User): The current active admin.
 
     Returns:
         Session: The created session.
     """
-    return create_session(db=db, session=session)
+    return await create_session(db=db, session=session)
 
 @router.delete("/{session_id}/delete", response_model=Session, status_code=status.HTTP_200_OK, summary="Delete a session", tags=["sessions"])
 async def delete_session_from_db(
     session_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_active_admin)
 ) -> Session:
     """
@@ -44,19 +46,19 @@ async def delete_session_from_db(
 
     Args:
         session_id (int): The ID of the session to delete.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_admin (User): The current active admin.
 
     Returns:
         Session: The deleted session.
     """
-    return delete_session(db, session_id)
+    return await delete_session(db, session_id)
 
 @router.post("/{session_id}/status/{new_status}", response_model=Session, status_code=status.HTTP_200_OK, summary="Set session status", tags=["sessions"])
 async def set_session_status(
     session_id: int,
     new_status: SessionStatus,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_active_admin)
 ) -> Session:
     """
@@ -65,19 +67,19 @@ async def set_session_status(
     Args:
         session_id (int): The ID of the session.
         new_status (SessionStatus): The new status to set.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_admin (User): The current active admin.
 
     Returns:
         Session: The updated session with the new status.
     """
-    return update_session_status(db, session_id, new_status)
+    return await update_session_status(db, session_id, new_status)
 
 @router.post("/{session_id}/price/{new_price}", response_model=Session, status_code=status.HTTP_200_OK, summary="Set session price", tags=["sessions"])
 async def set_session_price(
     session_id: int,
     new_price: float,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_admin: User = Depends(get_current_active_admin)
 ) -> Session:
     """
@@ -86,50 +88,141 @@ async def set_session_price(
     Args:
         session_id (int): The ID of the session.
         new_price (float): The new price to set.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_admin (User): The current active admin.
 
     Returns:
         Session: The updated session with the new price.
     """
-    return update_session_price(db, session_id, new_price)
+    return await update_session_price(db, session_id, new_price)
 
 @router.get("/{session_id}", response_model=Session, status_code=status.HTTP_200_OK, summary="Get a session by ID", tags=["sessions"])
 async def read_session(
+    request: Request,
+    response: Response,
     session_id: int,
-    db: Session = Depends(get_db)
-) -> Session:
+    db: AsyncSession = Depends(get_db)
+) -> Response:
     """
     Get a session by its ID.
+    The session is served from the catalog cache, with an ETag derived from the version of the
+    session; a matching If-None-Match header gets a 304 response.
+
+    Args:
+        request (Request): The request, used as the cache key and for conditional requests.
+        response (Response): The response.
+        session_id (int): The ID of the session to retrieve.
+        db (AsyncSession): The database session.
+
+    Returns:
+        Response: The session with the given ID.
+    """
+    async def load():
+        return dump_response(Session, await get_session(db, session_id))
+
+    return await cached_response(request, response, load, session_tags,
+                                 version=lambda: get_session_version(db, session_id))
+
+@router.get("/{session_id}/summary", response_model=SessionSummary, status_code=status.HTTP_200_OK, summary="Get a session summary by ID", tags=["sessions"])
+async def read_session_summary(
+    request: Request,
+    response: Response,
+    session_id: int,
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    """
+    Get a session by its ID, with seat counts instead of seats and bookings.
+    The summary is served from the catalog cache, with an ETag derived from the version of the
+    session; a matching If-None-Match header gets a 304 response.
 
     Args:
+        request (Request): The request, used as the cache key and for conditional requests.
+        response (Response): The response.
         session_id (int): The ID of the session to retrieve.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
 
     Returns:
-        Session: The session with the given ID.
+        Response: The summary of the session with the given ID.
     """
-    return get_session(db, session_id)
+    async def load():
+        return dump_response(SessionSummary, await get_session_summary(db, session_id))
+
+    return await cached_response(request, response, load, session_tags,
+                                 version=lambda: get_session_version(db, session_id))
+
+@router.get("/{session_id}/seatmap", response_model=SeatMap, status_code=status.HTTP_200_OK, summary="Get the packed seat map of a session", tags=["sessions"])
+async def read_session_seat_map(
+    request: Request,
+    response: Response,
+    session_id: int,
+    db: AsyncSession = Depends(get_db)
+) -> Response:
+    """
+    Get the seat states of a session as a packed array.
+    The seat map is served from the catalog cache, with an ETag derived from the version of the
+    session; a matching If-None-Match header gets a 304 response.
+
+    Args:
+        request (Request): The request, used as the cache key and for conditional requests.
+        response (Response): The response.
+        session_id (int): The ID of the session.
+        db (AsyncSession): The database session.
+
+    Returns:
+        Response: One byte per seat in seat id order, with the seat map version.
+    """
+    async def load():
+        return dump_response(SeatMap, await get_session_seat_map(db, session_id))
+
+    return await cached_response(request, response, load, lambda seat_map: {f"session:{session_id}"},
+                                 version=lambda: get_session_version(db, session_id))
 
-@router.get("/", response_model=List[Session], status_code=status.HTTP_200_OK, summary="Get sessions with optional filters", tags=["sessions"])
+# Served from the catalog cache and serialized with the schema matching `expand`; the response
+# union documents both representations
+@router.get("/", response_model=Union[List[Session], List[SessionSummary]], status_code=status.HTTP_200_OK, summary="Get sessions with optional filters", tags=["sessions"])
 async def read_sessions(
+    request: Request,
+    response: Response,
     skip: Optional[int] = None,
     limit: Optional[int] = None,
+    cursor: Optional[str] = None,
     film_id: Optional[int] = None,
     session_status: Optional[SessionStatus] = None,
-    db: Session = Depends(get_db)
-) -> List[Session]:
+    expand: Optional[Literal["full"]] = None,
+    db: AsyncSession = Depends(get_db)
+) -> Response:
     """
     Get a list of sessions with optional filters.
+    The sessions are returned as summaries with seat counts, unless expand=full is given,
+    and served from the catalog cache with an ETag; a matching If-None-Match header gets a 304 response.
+    Sessions are ordered by start time.
+    The total number of matching sessions is returned in the X-Total-Count header and, when the
+    page is full, the cursor of the next page in the X-Next-Cursor header.
 
     Args:
+        request (Request): The request, used as the cache key.
+        response (Response): The response, used to set the total count and next cursor headers.
         skip (Optional[int]): Number of records to skip.
         limit (Optional[int]): Maximum number of records to return.
+        cursor (Optional[str]): The cursor of the previous page.
         film_id (Optional[int]): Filter by film ID.
         session_status (Optional[SessionStatus]): Filter by session status.
-        db (Session): The database session.
+        expand (Optional[str]): "full" to return the sessions with their bookings and seats.
+        db (AsyncSession): The database session.
 
     Returns:
-        List[Session]: A list of sessions.
+        Response: A list of sessions.
     """
-    return get_sessions(db, skip=skip, limit=limit, film_id=film_id, session_status=session_status)
\ No newline at end of file
+    async def load():
+        response.headers["X-Total-Count"] = str(await count_sessions(db, film_id=film_id, session_status=session_status))
+        if expand == "full":
+            sessions = await get_sessions(db, skip=skip, limit=limit, cursor=cursor, film_id=film_id,
+                                          session_status=session_status)
+        else:
+            sessions = await get_session_summaries(db, skip=skip, limit=limit, cursor=cursor, film_id=film_id,
+                                                   session_status=session_status)
+        set_next_cursor(response, sessions, SESSION_ORDER, limit)
+        return dump_response(List[Session] if expand == "full" else List[SessionSummary], sessions)
+
+    return await cached_response(request, response, load,
+                                 lambda sessions: {"sessions"}.union(*(session_tags(session) for session in sessions)))
\ No newline at end of file
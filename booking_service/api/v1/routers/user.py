@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
 from ..utils.auth import get_current_active_user
@@ -15,7 +15,7 @@ router = APIRouter(
 @router.put("/change_nickname/{new_nickname}", response_model=User, status_code=status.HTTP_200_OK, summary="Change user nickname", tags=["user"])
 async def change_nickname(
     new_nickname: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> User:
     """
@@ -23,10 +23,10 @@ async def change_nickname(
 
     Args:
         new_nickname (str): The new nickname to set.
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         current_user (User): The current active user.
 
     Returns:
         User: The updated user with the new nickname.
     """
-    return update_user_nickname(db, current_user.id, new_nickname)
\ No newline at end of file
+    return await update_user_nickname(db, current_user.id, new_nickname)
\ No newline at end of file
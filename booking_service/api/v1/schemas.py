@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 from .models import FilmStatus, PaymentStatus, SeatStatus, ReservationStatus, SessionStatus
 
@@ -101,9 +101,10 @@ class Payment(BaseModel):
 
 class BookingCreate(BaseModel):
     """
-    Schema for creating a new booking.
+    Schema for creating a new booking, optionally reserving seats in the same request.
     """
     session_id: int
+    seat_ids: List[int] = []
 
 
 class Booking(BaseModel):
@@ -150,6 +151,39 @@ class Session(BaseModel):
         orm_mode = True
 
 
+class SessionSummary(BaseModel):
+    """
+    Schema for representing a session in catalog listings, with seat counts instead of seats and bookings.
+    """
+    id: int
+    film_id: int
+    datetime: datetime
+    price: float
+    capacity: int
+    auto_booking: bool
+    status: SessionStatus
+    free_seats: int
+    reserved_seats: int
+
+    class Config:
+        orm_mode = True
+
+
+class SeatMap(BaseModel):
+    """
+    Schema for representing the packed seat map of a session.
+
+    `states` holds one byte per seat (base64 encoded) in seat id order and
+    `seat_id_runs` lists the seat ids as (first id, length) runs.
+    """
+    session_id: int
+    version: int
+    capacity: int
+    encoding: str
+    states: str
+    seat_id_runs: List[Tuple[int, int]]
+
+
 class FilmCreate(BaseModel):
     """
     Schema for creating a new film.
@@ -176,6 +210,28 @@ class Film(BaseModel):
         orm_mode = True
 
 
+class FilmSummary(BaseModel):
+    """
+    Schema for representing a film card in catalog listings.
+    """
+    id: int
+    title: str
+    description: str
+    duration: int
+    image_url: Optional[str] = None
+    status: FilmStatus
+
+    class Config:
+        orm_mode = True
+
+
+class FilmDetail(FilmSummary):
+    """
+    Schema for representing a film with the summaries of its sessions.
+    """
+    sessions: List[SessionSummary]
+
+
 class AdminAction(BaseModel):
     """
     Schema for representing an admin action.
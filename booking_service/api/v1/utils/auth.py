@@ -1,16 +1,20 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.context import CryptContext
 from jose import JWTError, jwt
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+import asyncio
 import logging
 
 from ..database import get_db
 from ..models import User as UserModel
 from ..schemas import User
 from ..config import settings
+from .cache import user_cache
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -20,8 +24,18 @@ SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = settings.ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context; hashes with another cost factor than BCRYPT_ROUNDS need an update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so hashing runs in threads without blocking the event loop;
+# the pool size bounds the CPU a burst of logins can take
+password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password")
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
@@ -51,6 +65,34 @@ def get_password_hash(password: str) -> str:
     """
     return pwd_context.hash(password)
 
+async def hash_password(password: str) -> str:
+    """
+    Hash a password in the password thread pool.
+
+    Args:
+        password (str): The password to hash.
+
+    Returns:
+        str: The hashed password.
+    """
+    return await asyncio.get_running_loop().run_in_executor(password_executor, get_password_hash, password)
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password in the password thread pool, rehashing it if its cost factor is outdated.
+
+    Args:
+        plain_password (str): The plain password to verify.
+        hashed_password (str): The hashed password to verify against.
+
+    Returns:
+        Tuple[bool, Optional[str]]: Whether the password matches, and the new hash to store
+            if the password matches but was hashed with another cost factor.
+    """
+    return await asyncio.get_running_loop().run_in_executor(
+        password_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a new access token.
@@ -95,28 +137,38 @@ def decode_access_token(token: str) -> str:
         logger.error(f"Invalid authentication credentials: {e}")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> UserModel:
+async def get_current_user(db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)) -> User:
     """
     Get the current user based on the access token.
 
+    The user is served from the user cache when possible. Writes through `crud.users`
+    drop the cached user on commit, and USER_CACHE_TTL bounds how stale it can be
+    after any other change.
+
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
         token (str): The OAuth2 token.
 
     Returns:
-        UserModel: The current user.
+        User: A snapshot of the current user.
 
     Raises:
         HTTPException: If the user is not found or the token is invalid.
     """
     email = decode_access_token(token)
-    user = db.query(UserModel).filter(UserModel.email == email).first()
+    user = user_cache.get(email)
     if user is None:
-        logger.error(f"User with email {email} not found")
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        generation = user_cache.generation
+        result = await db.execute(select(UserModel).where(UserModel.email == email))
+        db_user = result.scalars().first()
+        if db_user is None:
+            logger.error(f"User with email {email} not found")
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+        user = User.model_validate(db_user, from_attributes=True)
+        user_cache.set(email, user, tags=(email,), generation=generation)
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """
     Get the current active user.
 
@@ -134,7 +186,7 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return current_user
 
-def get_current_active_admin(current_user: User = Depends(get_current_active_user)) -> User:
+async def get_current_active_admin(current_user: User = Depends(get_current_active_user)) -> User:
     """
     Get the current active admin user.
 
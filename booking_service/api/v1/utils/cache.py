@@ -0,0 +1,314 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Optional, Set
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..config import settings
+from .etag import etag_matches, make_etag, not_modified
+
+# Response headers stored together with a cached catalog response
+CACHED_HEADERS = ("X-Total-Count", "X-Next-Cursor")
+
+# Key of the catalog tags to invalidate once the transaction of a database session commits
+PENDING_INVALIDATIONS_KEY = "catalog_cache_invalidations"
+
+# Key of the user emails to invalidate once the transaction of a database session commits
+PENDING_USER_INVALIDATIONS_KEY = "user_cache_invalidations"
+
+
+class CacheBackend(ABC):
+    """
+    Interface of the catalog cache backends.
+
+    Entries carry tags naming the films and sessions they were built from,
+    so that a change to any of them drops exactly the entries that include it.
+    """
+
+    @property
+    @abstractmethod
+    def generation(self) -> int:
+        """
+        A counter incremented by every invalidation.
+        """
+
+    @abstractmethod
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached value.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Optional[Any]: The value, or None if it is not cached or has expired.
+        """
+
+    @abstractmethod
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = (), generation: Optional[int] = None) -> None:
+        """
+        Cache a value.
+
+        Args:
+            key (Hashable): The cache key.
+            value (Any): The value to cache.
+            tags (Iterable[str]): The tags invalidating the value.
+            generation (Optional[int]): The generation read before the value was built. The value
+                is not stored if an invalidation happened since, as it may already be stale.
+        """
+
+    @abstractmethod
+    def invalidate(self, tags: Iterable[str]) -> None:
+        """
+        Drop every value carrying any of the given tags.
+
+        Args:
+            tags (Iterable[str]): The tags to invalidate.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Drop every cached value.
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the counters of the cache.
+
+        Returns:
+            Dict[str, Any]: The hits, misses, size and limits of the cache.
+        """
+
+
+class LRUTTLCache(CacheBackend):
+    """
+    In-process cache bounded in size, evicting the least recently used entries, and
+    in age, expiring entries after a fixed time to live.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._keys_by_tag: Dict[str, Set[Hashable]] = {}
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[str] = (), generation: Optional[int] = None) -> None:
+        if self.maxsize <= 0 or (generation is not None and generation != self._generation):
+            return
+        if key in self._entries:
+            self._remove(key)
+        tags = frozenset(tags)
+        self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        self._generation += 1
+        for tag in tags:
+            for key in self._keys_by_tag.pop(tag, set()):
+                if key in self._entries:
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+catalog_cache: CacheBackend = LRUTTLCache(maxsize=settings.CATALOG_CACHE_MAXSIZE, ttl=settings.CATALOG_CACHE_TTL)
+
+# Authenticated users keyed and tagged by email, the subject of their access tokens
+user_cache: CacheBackend = LRUTTLCache(maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_CACHE_TTL)
+
+
+def invalidate_catalog(db: AsyncSession, *tags: str) -> None:
+    """
+    Invalidate catalog tags once the current transaction commits.
+
+    Invalidating after the commit keeps readers from caching the state the transaction
+    is replacing. The tags are dropped if the transaction is rolled back.
+
+    Args:
+        db (AsyncSession): The database session making the change.
+        *tags (str): The tags to invalidate, such as "films", "film:1" or "session:2".
+    """
+    db.info.setdefault(PENDING_INVALIDATIONS_KEY, set()).update(tags)
+
+
+def invalidate_user(db: AsyncSession, email: str) -> None:
+    """
+    Drop a cached authenticated user once the current transaction commits.
+
+    Args:
+        db (AsyncSession): The database session changing the user.
+        email (str): The email of the user.
+    """
+    db.info.setdefault(PENDING_USER_INVALIDATIONS_KEY, set()).add(email)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    tags = session.info.pop(PENDING_INVALIDATIONS_KEY, None)
+    if tags:
+        catalog_cache.invalidate(tags)
+    emails = session.info.pop(PENDING_USER_INVALIDATIONS_KEY, None)
+    if emails:
+        user_cache.invalidate(emails)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop(PENDING_INVALIDATIONS_KEY, None)
+    session.info.pop(PENDING_USER_INVALIDATIONS_KEY, None)
+
+
+def session_tags(session: dict) -> Set[str]:
+    """
+    Get the tags of a serialized session.
+
+    Changes to the bookings nested in a session bump the version of the session, which
+    invalidates its tag, so the bookings carry no tags of their own.
+
+    Args:
+        session (dict): The serialized session.
+
+    Returns:
+        Set[str]: The tags.
+    """
+    return {f"session:{session['id']}"}
+
+
+def film_tags(film: dict) -> Set[str]:
+    """
+    Get the tags of a serialized film and of the sessions it includes.
+
+    Args:
+        film (dict): The serialized film.
+
+    Returns:
+        Set[str]: The tags.
+    """
+    tags = {f"film:{film['id']}"}
+    for session in film.get("sessions", []):
+        tags |= session_tags(session)
+    return tags
+
+
+@lru_cache(maxsize=None)
+def _type_adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def dump_response(schema: Any, value: Any) -> Any:
+    """
+    Serialize a value through a response schema, as FastAPI does for a response model.
+
+    Args:
+        schema (Any): The response schema, such as `List[FilmSummary]`.
+        value (Any): The ORM objects or schema instances to serialize.
+
+    Returns:
+        Any: The JSON compatible content.
+    """
+    adapter = _type_adapter(schema)
+    return adapter.dump_python(adapter.validate_python(value, from_attributes=True), mode="json", by_alias=True)
+
+
+async def cached_response(request: Request, response: Response, load: Callable[[], Awaitable[Any]],
+                          tags: Callable[[Any], Set[str]],
+                          version: Optional[Callable[[], Awaitable[Any]]] = None) -> Response:
+    """
+    Serve a catalog response from the cache, building and caching it on a miss.
+
+    Responses are cached as rendered JSON, keyed by path and query parameters, along with
+    the pagination headers `load` sets on `response` and a strong ETag. The ETag is derived
+    from the row versions given by `version` when there is one, so that a request whose
+    If-None-Match header still matches is answered with 304 Not Modified before anything is
+    loaded or serialized. Otherwise it is a digest of the rendered body.
+
+    Args:
+        request (Request): The request.
+        response (Response): The response `load` sets its headers on.
+        load (Callable[[], Awaitable[Any]]): Builds the JSON compatible content on a miss.
+        tags (Callable[[Any], Set[str]]): Gives the tags of the content.
+        version (Optional[Callable[[], Awaitable[Any]]]): Looks up the row versions the content
+            is built from, or None if the rows are not found.
+
+    Returns:
+        Response: The JSON response, or an empty 304 response.
+    """
+    query = tuple(sorted(request.query_params.multi_items()))
+    key = (request.url.path, query)
+    cached = catalog_cache.get(key)
+    if cached is None:
+        generation = catalog_cache.generation
+        etag = None
+        if version is not None:
+            row_version = await version()
+            if row_version is not None:
+                etag = make_etag(request.url.path, query, row_version)
+                if etag_matches(request, etag):
+                    return not_modified(etag)
+        content = await load()
+        body = JSONResponse(content).body
+        etag = etag or make_etag(body)
+        headers = {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers}
+        catalog_cache.set(key, (body, headers, etag), tags(content), generation=generation)
+    else:
+        body, headers, etag = cached
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return Response(content=body, media_type="application/json", headers={**headers, "ETag": etag})
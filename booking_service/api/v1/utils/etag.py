@@ -0,0 +1,54 @@
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+from starlette import status
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong ETag from the values identifying a representation.
+
+    Args:
+        *parts (Any): The values, such as the path, the query and the row versions, or the
+            rendered body.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    digest = hashlib.sha256(b"\x1f".join(part if isinstance(part, bytes) else str(part).encode()
+                                          for part in parts)).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check whether the If-None-Match header of a request matches an ETag.
+
+    Args:
+        request (Request): The request.
+        etag (str): The current ETag of the representation.
+
+    Returns:
+        bool: True if the client already holds the current representation.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixed tags match as well
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Build the 304 Not Modified response telling the client to reuse its copy.
+
+    Args:
+        etag (str): The current ETag of the representation.
+
+    Returns:
+        Response: The empty response.
+    """
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,101 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+from starlette import status
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """
+    Encode the sort key values of the last row of a page into an opaque cursor.
+
+    Args:
+        values (Sequence[Any]): The values of the ordering columns, ending with the ID.
+
+    Returns:
+        str: The URL-safe cursor.
+    """
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode()).decode("ascii")
+
+
+def decode_cursor(cursor: str, order_by: Sequence[InstrumentedAttribute]) -> List[Any]:
+    """
+    Decode a cursor produced by `encode_cursor` for the given ordering columns.
+
+    Args:
+        cursor (str): The cursor.
+        order_by (Sequence[InstrumentedAttribute]): The ordering columns, ending with the ID.
+
+    Returns:
+        List[Any]: The values of the ordering columns.
+
+    Raises:
+        HTTPException: If the cursor is malformed.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(order_by):
+            raise ValueError("cursor does not match the ordering")
+        return [datetime.fromisoformat(value) if column.type.python_type is datetime else value
+                for column, value in zip(order_by, values)]
+    except (ValueError, TypeError, UnicodeEncodeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def paginate(query: Select, order_by: Sequence[InstrumentedAttribute], cursor: Optional[str] = None,
+             skip: Optional[int] = None, limit: Optional[int] = None) -> Select:
+    """
+    Order a query on a unique key and restrict it to one page.
+
+    With a cursor, the page starts right after the row the cursor was taken from, so
+    the database seeks to it through the index instead of scanning the skipped rows.
+
+    Args:
+        query (Select): The query to paginate.
+        order_by (Sequence[InstrumentedAttribute]): The ordering columns, ending with the ID.
+        cursor (Optional[str]): The cursor of the previous page.
+        skip (Optional[int]): Number of records to skip.
+        limit (Optional[int]): Maximum number of records to return.
+
+    Returns:
+        Select: The paginated query.
+    """
+    query = query.order_by(*order_by)
+
+    if cursor is not None:
+        values = decode_cursor(cursor, order_by)
+        if len(order_by) == 1:
+            query = query.where(order_by[0] > values[0])
+        else:
+            query = query.where(tuple_(*order_by) > tuple_(*values))
+
+    if skip is not None:
+        query = query.offset(skip)
+
+    if limit is not None:
+        query = query.limit(limit)
+
+    return query
+
+
+def set_next_cursor(response: Response, items: Sequence[Any], order_by: Sequence[InstrumentedAttribute],
+                    limit: Optional[int]) -> None:
+    """
+    Set the X-Next-Cursor header when a page is full.
+
+    Args:
+        response (Response): The response of the list endpoint.
+        items (Sequence[Any]): The rows of the page.
+        order_by (Sequence[InstrumentedAttribute]): The ordering columns the page was queried with.
+        limit (Optional[int]): The page size.
+    """
+    if limit is not None and items and len(items) >= limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor([getattr(items[-1], column.key) for column in order_by])
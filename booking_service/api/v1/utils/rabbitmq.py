@@ -1,8 +1,13 @@
 import logging
 import aio_pika
+from aio_pika.abc import AbstractChannel, AbstractRobustConnection
+from aio_pika.pool import Pool
 import os
 import asyncio
 import json
+from typing import List, Optional, Set
+
+from ..config import settings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -10,47 +15,109 @@ logger = logging.getLogger(__name__)
 
 RABBITMQ_URL = os.getenv("RABBITMQ_URL")
 
-async def publish_message(queue: str, subject: str, recipients: list, body: str, subtype: str = "html"):
-    """
-    Publish a message to the specified RabbitMQ queue.
 
-    Args:
-        queue (str): The name of the RabbitMQ queue.
-        subject (str): The subject of the message.
-        recipients (list): A list of recipient email addresses.
-        body (str): The body of the message.
-        subtype (str): The subtype of the message, default is "html".
+class RabbitMQPublisher:
+    """
+    Publisher keeping one robust RabbitMQ connection for the lifetime of the application.
 
-    Raises:
-        Exception: If there is an error while publishing the message.
+    Messages are published on a pool of channels opened with publisher confirms, so a
+    publish returns once the broker has taken responsibility for the message. Queues are
+    declared once per publisher; the robust connection and channels restore them after
+    a reconnection. If the broker cannot be reached, the connection is retried on the
+    next publish instead of failing the application startup.
     """
-    try:
-        # Establish a connection to RabbitMQ
-        connection = await aio_pika.connect_robust(RABBITMQ_URL)
-        async with connection:
-            # Create a communication channel
-            channel = await connection.channel()
-            
-            # Declare a queue
-            await channel.declare_queue(queue, durable=True)
-            
-            # Prepare the message payload
-            message = {
-                "subject": subject,
-                "recipients": recipients,
-                "body": body,
-                "subtype": subtype
-            }
-            
-            # Publish the message to the queue
-            await channel.default_exchange.publish(
-                aio_pika.Message(
-                    body=json.dumps(message).encode(),
-                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT
-                ),
-                routing_key=queue,
-            )
-        
-        logger.info(f"Message published to queue {queue}: {message}")
-    except Exception as e:
-        logger.error(f"Error publishing message to queue {queue}: {e}")
+
+    def __init__(self, url: str, pool_size: int, confirm_timeout: float):
+        self.url = url
+        self.pool_size = pool_size
+        self.confirm_timeout = confirm_timeout
+        self._connection: Optional[AbstractRobustConnection] = None
+        self._channel_pool: Optional[Pool] = None
+        self._declared_queues: Set[str] = set()
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        """
+        Connect to RabbitMQ, logging the error if the broker cannot be reached.
+        """
+        try:
+            await self._connect()
+        except Exception as e:
+            logger.error(f"Could not connect to RabbitMQ, retrying on the next publish: {e}")
+
+    async def close(self) -> None:
+        """
+        Close the channels and the connection.
+        """
+        async with self._lock:
+            if self._channel_pool is not None:
+                await self._channel_pool.close()
+            if self._connection is not None:
+                await self._connection.close()
+            self._channel_pool = None
+            self._connection = None
+            self._declared_queues.clear()
+        logger.info("RabbitMQ publisher closed")
+
+    async def publish(self, queue: str, payload: dict) -> None:
+        """
+        Publish a persistent JSON message to a queue and wait for the broker confirm.
+
+        Args:
+            queue (str): The name of the queue.
+            payload (dict): The message payload.
+
+        Raises:
+            Exception: If the broker cannot be reached or does not confirm the message in time.
+        """
+        await self.publish_batch(queue, [payload])
+
+    async def publish_batch(self, queue: str, payloads: List[dict]) -> None:
+        """
+        Publish persistent JSON messages to a queue on one channel.
+
+        The messages are sent back to back and their confirms awaited together, so a batch
+        costs about one round trip to the broker instead of one per message.
+
+        Args:
+            queue (str): The name of the queue.
+            payloads (List[dict]): The message payloads.
+
+        Raises:
+            Exception: If the broker cannot be reached or does not confirm every message in time.
+        """
+        if not payloads:
+            return
+        channel_pool = await self._connect()
+        async with channel_pool.acquire() as channel:
+            if queue not in self._declared_queues:
+                await channel.declare_queue(queue, durable=True)
+                self._declared_queues.add(queue)
+            await asyncio.gather(*(
+                channel.default_exchange.publish(
+                    aio_pika.Message(
+                        body=json.dumps(payload).encode(),
+                        content_type="application/json",
+                        delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+                    ),
+                    routing_key=queue,
+                    timeout=self.confirm_timeout,
+                )
+                for payload in payloads
+            ))
+
+    async def _connect(self) -> Pool:
+        async with self._lock:
+            if self._channel_pool is None:
+                self._connection = await aio_pika.connect_robust(self.url)
+                self._channel_pool = Pool(self._open_channel, max_size=self.pool_size)
+                logger.info("RabbitMQ publisher connected")
+            return self._channel_pool
+
+    async def _open_channel(self) -> AbstractChannel:
+        return await self._connection.channel(publisher_confirms=True)
+
+
+publisher = RabbitMQPublisher(RABBITMQ_URL, pool_size=settings.RABBITMQ_CHANNEL_POOL_SIZE,
+                              confirm_timeout=settings.RABBITMQ_CONFIRM_TIMEOUT)
+
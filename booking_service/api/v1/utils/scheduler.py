@@ -1,66 +1,104 @@
 from datetime import timedelta, datetime
 import logging
 
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.date import DateTrigger
 
-from .tasks import update_session, set_main_admin
-from ..database import get_db
+from .rabbitmq import publisher
+from .tasks import update_session, update_payments, set_main_admin
+from ..config import settings
+from ..crud.outbox import relay_outbox_messages
+from ..crud.stripe_events import process_stripe_events
+from ..database import AsyncSessionLocal
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-# Initialize scheduler
-scheduler = BackgroundScheduler()
 
-
-@scheduler.scheduled_job('interval', seconds=15)
-def scheduled_update_session():
+async def scheduled_update_session():
     """
     Scheduled job to update sessions every 15 seconds.
     """
     logger.info("Running scheduled session update job")
     try:
-        db = next(get_db())
-        update_session(db)
+        async with AsyncSessionLocal() as db:
+            await update_session(db)
         logger.info("Scheduled session update job completed successfully")
     except Exception as e:
         logger.error(f"Error in scheduled session update job: {e}")
-    finally:
-        db.close()
 
 
-@scheduler.scheduled_job('interval', seconds=400)
-def scheduled_update_payments():
+async def scheduled_update_payments():
     """
     Scheduled job to update outdated payments every 400 seconds.
     """
-    logger.info("Running scheduled session payments update job")
+    logger.info("Running scheduled payments update job")
     try:
-        db = next(get_db())
-        update_session(db)
-        logger.info("Scheduled payments update job completed successfully")
+        async with AsyncSessionLocal() as db:
+            booking_ids = await update_payments(db)
+        logger.info(f"Scheduled payments update job completed successfully, payments of bookings {booking_ids} expired")
     except Exception as e:
         logger.error(f"Error in scheduled payments update job: {e}")
-    finally:
-        db.close()
 
 
-def set_main_admin_job():
+async def scheduled_relay_outbox():
+    """
+    Scheduled job draining the outbox to RabbitMQ in batches.
+    """
+    try:
+        while True:
+            async with AsyncSessionLocal() as db:
+                relayed = await relay_outbox_messages(db, publisher, settings.OUTBOX_BATCH_SIZE)
+            if relayed < settings.OUTBOX_BATCH_SIZE:
+                break
+    except Exception as e:
+        logger.error(f"Error in scheduled outbox relay job: {e}")
+
+
+async def scheduled_process_stripe_events():
+    """
+    Scheduled job applying the received Stripe events in batches.
+    """
+    try:
+        while True:
+            async with AsyncSessionLocal() as db:
+                processed = await process_stripe_events(db, settings.STRIPE_EVENTS_BATCH_SIZE)
+            if processed < settings.STRIPE_EVENTS_BATCH_SIZE:
+                break
+    except Exception as e:
+        logger.error(f"Error in scheduled Stripe event processing job: {e}")
+
+
+async def set_main_admin_job():
     """
     One-time job to set the main admin.
     """
     logger.info("Running one-time set main admin job")
     try:
-        db = next(get_db())
-        set_main_admin(db)
+        async with AsyncSessionLocal() as db:
+            await set_main_admin(db)
         logger.info("One-time set main admin job completed successfully")
     except Exception as e:
         logger.error(f"Error in one-time set main admin job: {e}")
-    finally:
-        db.close()
 
 
-# Schedule one-time job to run 1 minute from now
-one_time_run = datetime.now() + timedelta(minutes=1)
-scheduler.add_job(set_main_admin_job, DateTrigger(run_date=one_time_run))
+def create_scheduler() -> AsyncIOScheduler:
+    """
+    Create the scheduler running the periodic jobs on the application's event loop.
+
+    The scheduler is created per application startup, since an AsyncIOScheduler
+    is bound to the event loop it was started on.
+
+    Returns:
+        AsyncIOScheduler: The configured, not yet started, scheduler.
+    """
+    scheduler = AsyncIOScheduler()
+    scheduler.add_job(scheduled_update_session, 'interval', seconds=15)
+    scheduler.add_job(scheduled_update_payments, 'interval', seconds=400)
+    scheduler.add_job(scheduled_relay_outbox, 'interval', seconds=settings.OUTBOX_RELAY_INTERVAL)
+    scheduler.add_job(scheduled_process_stripe_events, 'interval', seconds=settings.STRIPE_EVENTS_INTERVAL)
+
+    # Schedule one-time job to run 1 minute from now
+    one_time_run = datetime.now() + timedelta(minutes=1)
+    scheduler.add_job(set_main_admin_job, DateTrigger(run_date=one_time_run))
+    return scheduler
@@ -0,0 +1,51 @@
+import base64
+from typing import Iterable, List, Tuple
+
+from ..models import SeatStatus
+
+# One byte per seat, in seat id order
+SEAT_STATUS_CODES = {
+    SeatStatus.AVAILABLE: 0,
+    SeatStatus.RESERVED: 1,
+    SeatStatus.CANCELED: 2,
+}
+SEAT_STATUS_BY_CODE = {code: seat_status for seat_status, code in SEAT_STATUS_CODES.items()}
+SEATMAP_ENCODING = "u8"
+
+
+def encode_seat_map(seats: Iterable[Tuple[int, SeatStatus]]) -> Tuple[str, List[Tuple[int, int]]]:
+    """
+    Pack seat states into a compact representation.
+
+    Args:
+        seats (Iterable[Tuple[int, SeatStatus]]): (seat id, status) pairs ordered by seat id.
+
+    Returns:
+        Tuple[str, List[Tuple[int, int]]]: The base64 encoded state bytes and the seat ids
+        as (first id, length) runs of consecutive ids.
+    """
+    states = bytearray()
+    runs: List[Tuple[int, int]] = []
+    for seat_id, seat_status in seats:
+        states.append(SEAT_STATUS_CODES[seat_status])
+        if runs and runs[-1][0] + runs[-1][1] == seat_id:
+            runs[-1] = (runs[-1][0], runs[-1][1] + 1)
+        else:
+            runs.append((seat_id, 1))
+    return base64.b64encode(bytes(states)).decode("ascii"), runs
+
+
+def decode_seat_map(states: str, seat_id_runs: Iterable[Tuple[int, int]]) -> List[Tuple[int, SeatStatus]]:
+    """
+    Unpack a seat map produced by `encode_seat_map`.
+
+    Args:
+        states (str): The base64 encoded state bytes.
+        seat_id_runs (Iterable[Tuple[int, int]]): The (first id, length) runs of seat ids.
+
+    Returns:
+        List[Tuple[int, SeatStatus]]: (seat id, status) pairs ordered by seat id.
+    """
+    seat_ids = [seat_id for first, length in seat_id_runs for seat_id in range(first, first + length)]
+    codes = base64.b64decode(states)
+    return [(seat_id, SEAT_STATUS_BY_CODE[code]) for seat_id, code in zip(seat_ids, codes)]
@@ -1,72 +1,72 @@
-from sqlalchemy.orm import Session
+from typing import List
+
+from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
 from ..config import settings
-from ..models import Session as SessionModel, Payment
-from ..crud.sessions import update_session_status
-from ..crud.payments import update_payment_status
+from ..crud.sessions import sweep_session_statuses
+from ..crud.payments import expire_pending_payments
 from ..crud.users import grant_user_admin
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
 
-def update_session(db: Session):
+async def update_session(db: AsyncSession):
     """
-    Update the status of all sessions.
+    Update the status of the sessions whose start or end time has passed.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
     """
     logger.info("Starting session update task")
     try:
-        sessions = db.query(SessionModel).all()
-        for session in sessions:
-            update_session_status(db, session.id)
-        db.commit()
+        await sweep_session_statuses(db)
         logger.info("Session update task completed successfully")
     except Exception as e:
         logger.error(f"Error during session update task: {e}")
-        db.rollback()
+        await db.rollback()
     finally:
-        db.close()
+        await db.close()
 
 
-def update_payments(db: Session):
+async def update_payments(db: AsyncSession) -> List[int]:
     """
-    Update the status of all payments.
+    Fail the pending payments that have reached the payment timeout.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
+
+    Returns:
+        List[int]: The IDs of the bookings whose payments expired.
     """
     logger.info("Starting payments update task")
     try:
-        payments = db.query(Payment).all()
-        for payment in payments:
-            update_payment_status(db, payment.id)
-        db.commit()
+        booking_ids = await expire_pending_payments(db)
         logger.info("Payment update task completed successfully")
+        return booking_ids
     except Exception as e:
         logger.error(f"Error during payment update task: {e}")
-        db.rollback()
+        await db.rollback()
+        return []
     finally:
-        db.close()
+        await db.close()
 
 
-def set_main_admin(db: Session):
+async def set_main_admin(db: AsyncSession):
     """
     Grant admin privileges to the main admin user.
 
     Args:
-        db (Session): The database session.
+        db (AsyncSession): The database session.
     """
     logger.info(f"Setting main admin: {settings.MAIN_ADMIN}")
     try:
-        grant_user_admin(db, settings.MAIN_ADMIN)
-        db.commit()
+        await grant_user_admin(db, settings.MAIN_ADMIN)
+        await db.commit()
         logger.info("Main admin privileges granted successfully")
     except Exception as e:
         logger.error(f"Error during setting main admin: {e}")
-        db.rollback()
+        await db.rollback()
     finally:
-        db.close()
+        await db.close()
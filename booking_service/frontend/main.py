@@ -1,3 +1,4 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
@@ -6,6 +7,7 @@ import logging
 
 from v1 import router
 from v1.middleware import AuthMiddleware
+from v1.api_client import create_api_client
 from v1.config import settings
 
 # Initialize logger
@@ -13,6 +15,23 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open the shared API client on startup and close it on shutdown.
+
+    Args:
+        app (FastAPI): The FastAPI application.
+    """
+    app.state.api_client = create_api_client()
+    logger.info("API client started")
+    try:
+        yield
+    finally:
+        await app.state.api_client.aclose()
+        logger.info("API client closed")
+
+
 def create_app():
     """
     Create and configure an instance of the FastAPI application.
@@ -21,7 +40,7 @@ def create_app():
         app (FastAPI): The configured FastAPI application.
     """
     # Create the main FastAPI app instance
-    app = FastAPI(title="HomeCinemaVR Frontend")
+    app = FastAPI(title="HomeCinemaVR Frontend", lifespan=lifespan)
 
     # Mount the static files directory
     app.mount(
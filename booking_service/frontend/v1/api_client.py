@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from fastapi import Request
+import httpx
+
+from .config import settings
+
+
+class RevalidatingTransport(httpx.AsyncBaseTransport):
+    """
+    Transport revalidating the API responses it has seen instead of downloading them again.
+
+    GET responses carrying an ETag are kept in a bounded LRU store, keyed by URL and
+    Authorization header. Repeated GETs are sent with If-None-Match, and a 304 Not Modified
+    answer is turned back into the stored 200 response.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, maxsize: int):
+        self.transport = transport
+        self.maxsize = maxsize
+        self._responses: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.method != "GET" or self.maxsize <= 0:
+            return await self.transport.handle_async_request(request)
+
+        key = (str(request.url), request.headers.get("authorization"))
+        stored = self._responses.get(key)
+        if stored is not None:
+            request.headers["If-None-Match"] = stored[0]
+
+        response = await self.transport.handle_async_request(request)
+        if response.status_code == 304 and stored is not None:
+            await response.aclose()
+            self._responses.move_to_end(key)
+            _, headers, content = stored
+            return httpx.Response(200, headers=headers, stream=httpx.ByteStream(content),
+                                  extensions=response.extensions)
+
+        etag = response.headers.get("etag")
+        if response.status_code != 200 or etag is None:
+            self._responses.pop(key, None)
+            return response
+
+        # Keep the body as received, content encoding included, so it can be replayed as is
+        try:
+            content = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        self._responses[key] = (etag, response.headers.multi_items(), content)
+        self._responses.move_to_end(key)
+        while len(self._responses) > self.maxsize:
+            self._responses.popitem(last=False)
+        return httpx.Response(200, headers=response.headers, stream=httpx.ByteStream(content),
+                              extensions=response.extensions)
+
+    async def aclose(self) -> None:
+        self._responses.clear()
+        await self.transport.aclose()
+
+
+def create_api_client() -> httpx.AsyncClient:
+    """
+    Create the HTTP client used to call the API for the lifetime of the application.
+
+    Connections to the API are kept alive and reused across requests, within the
+    configured pool limits and timeouts. Catalog responses are revalidated with
+    their ETags rather than downloaded again.
+
+    Returns:
+        httpx.AsyncClient: The API client.
+    """
+    transport = httpx.AsyncHTTPTransport(
+        limits=httpx.Limits(
+            max_connections=settings.API_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.API_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.API_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return httpx.AsyncClient(
+        base_url=settings.API_URL,
+        timeout=httpx.Timeout(settings.API_TIMEOUT, connect=settings.API_CONNECT_TIMEOUT),
+        transport=RevalidatingTransport(transport, maxsize=settings.API_CACHE_MAXSIZE),
+    )
+
+
+def get_api_client(request: Request) -> httpx.AsyncClient:
+    """
+    Get the shared API client of the application.
+
+    Args:
+        request (Request): The request object.
+
+    Returns:
+        httpx.AsyncClient: The API client.
+    """
+    return request.app.state.api_client
+
+
+def auth_headers(request: Request) -> dict:
+    """
+    Build the headers authenticating an API call as the current user.
+
+    Args:
+        request (Request): The request object.
+
+    Returns:
+        dict: The Authorization header taken from the access token cookie, if any.
+    """
+    token = request.cookies.get("access_token")
+    return {"Authorization": token} if token else {}
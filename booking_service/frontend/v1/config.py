@@ -6,6 +6,13 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     ALGORITHM: str = os.getenv("ALGORITHM")
     API_URL: str = os.getenv("API_URL")
+    API_TIMEOUT: float = float(os.getenv("API_TIMEOUT", "30"))
+    API_CONNECT_TIMEOUT: float = float(os.getenv("API_CONNECT_TIMEOUT", "5"))
+    API_MAX_CONNECTIONS: int = int(os.getenv("API_MAX_CONNECTIONS", "100"))
+    API_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("API_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    API_KEEPALIVE_EXPIRY: float = float(os.getenv("API_KEEPALIVE_EXPIRY", "30"))
+    API_CACHE_MAXSIZE: int = int(os.getenv("API_CACHE_MAXSIZE", "1024"))
+    AUTH_CACHE_MAXSIZE: int = int(os.getenv("AUTH_CACHE_MAXSIZE", "1024"))
     USE_CREDENTIALS: bool = os.getenv("USE_CREDENTIALS") == 'true'
     CORS_ORIGINS: str = os.getenv("CORS_ORIGINS").split(",")
 
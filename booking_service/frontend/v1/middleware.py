@@ -1,43 +1,91 @@
-from starlette.middleware.base import BaseHTTPMiddleware
-from fastapi import Request, Response
+from collections import OrderedDict
+from typing import Optional
+import hashlib
+import logging
+import math
+import time
+
 from jose import JWTError, jwt
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Receive, Scope, Send
 from .config import settings
-import logging
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
-class AuthMiddleware(BaseHTTPMiddleware):
+# Request state of a visitor without a valid access token
+ANONYMOUS_STATE = {
+    "user_id": None,
+    "email": None,
+    "nickname": "",
+    "is_admin": False,
+}
+
+
+class AuthMiddleware:
     """
     Middleware to handle authentication using JWT tokens.
-    
+
     This middleware extracts the JWT token from the request cookies,
     decodes it, and attaches user information to the request state.
+
+    It is a pure ASGI middleware, so responses stream through untouched, and it skips
+    the static files. Decoded claims are kept in a small LRU keyed by a hash of the
+    token until the token expires, so a token is decoded once rather than on every page.
     """
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        token = request.cookies.get("access_token")
-        if token:
-            if token.startswith("Bearer "):
-                token = token[len("Bearer "):]
-            try:
-                payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-                request.state.user_id = payload.get("id")
-                request.state.email = payload.get("sub")
-                request.state.nickname = payload.get("nickname", "")
-                request.state.is_admin = payload.get("is_admin", False)
-                request.state.notifications = payload.get("notifications", False)
-            except JWTError as e:
-                logger.warning(f"JWT Error: {e}")
-                request.state.user_id = None
-                request.state.email = None
-                request.state.nickname = ""
-                request.state.is_admin = False
-        else:
-            request.state.user_id = None
-            request.state.email = None
-            request.state.nickname = ""
-            request.state.is_admin = False
-        
-        response = await call_next(request)
-        return response
+    def __init__(self, app: ASGIApp, maxsize: int = settings.AUTH_CACHE_MAXSIZE, skip_prefixes: tuple = ("/static",)):
+        self.app = app
+        self.maxsize = maxsize
+        self.skip_prefixes = skip_prefixes
+        self._claims: "OrderedDict[bytes, tuple]" = OrderedDict()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and not scope["path"].startswith(self.skip_prefixes):
+            token = HTTPConnection(scope).cookies.get("access_token")
+            state = self.decode(token) if token else ANONYMOUS_STATE
+            scope.setdefault("state", {}).update(state)
+        await self.app(scope, receive, send)
+
+    def decode(self, token: str) -> dict:
+        """
+        Get the request state of an access token, decoding it on a cache miss.
+
+        Args:
+            token (str): The access token cookie.
+
+        Returns:
+            dict: The user information to attach to the request state.
+        """
+        if token.startswith("Bearer "):
+            token = token[len("Bearer "):]
+        key = hashlib.sha256(token.encode()).digest()
+        cached = self._claims.get(key)
+        if cached is not None:
+            expires_at, state = cached
+            if expires_at > time.time():
+                self._claims.move_to_end(key)
+                return state
+            del self._claims[key]
+
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError as e:
+            logger.warning(f"JWT Error: {e}")
+            return ANONYMOUS_STATE
+        state = {
+            "user_id": payload.get("id"),
+            "email": payload.get("sub"),
+            "nickname": payload.get("nickname", ""),
+            "is_admin": payload.get("is_admin", False),
+            "notifications": payload.get("notifications", False),
+        }
+        self._store(key, payload.get("exp"), state)
+        return state
+
+    def _store(self, key: bytes, exp: Optional[float], state: dict) -> None:
+        if self.maxsize <= 0:
+            return
+        self._claims[key] = (math.inf if exp is None else float(exp), state)
+        while len(self._claims) > self.maxsize:
+            self._claims.popitem(last=False)
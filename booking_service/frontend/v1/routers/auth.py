@@ -3,8 +3,7 @@ from fastapi import APIRouter, Request, Form, Response, Depends
 from fastapi.responses import RedirectResponse, HTMLResponse
 from fastapi.templating import Jinja2Templates
 from starlette.status import HTTP_302_FOUND
-import httpx
-from ..config import settings
+from ..api_client import get_api_client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -49,8 +48,8 @@ async def post_register(request: Request, email: str = Form(...), password: str
         HTMLResponse: Renders the registration page with an error message on failure.
     """
     logger.info("Received registration request for email: %s", email)
-    async with httpx.AsyncClient(base_url=settings.API_URL) as client:
-        response = await client.post("/auth/register", json={"email": email, "password": password})
+    client = get_api_client(request)
+    response = await client.post("/auth/register", json={"email": email, "password": password})
     if response.status_code == 201:
         logger.info("User registered successfully with email: %s", email)
         return RedirectResponse(url="/auth/login", status_code=HTTP_302_FOUND)
@@ -88,8 +87,8 @@ async def post_login(request: Request, email: str = Form(...), password: str = F
         HTMLResponse: Renders the login page with an error message on failure.
     """
     logger.info("Received login request for email: %s", email)
-    async with httpx.AsyncClient(base_url=settings.API_URL) as client:
-        response = await client.post("/auth/token", data={"username": email, "password": password})
+    client = get_api_client(request)
+    response = await client.post("/auth/token", data={"username": email, "password": password})
     if response.status_code == 200:
         token = response.json()["access_token"]
         logger.info("User logged in successfully with email: %s", email)
@@ -8,8 +8,7 @@ from fastapi.templating import Jinja2Templates
 from fastapi.responses import RedirectResponse, HTMLResponse
 from pydantic import BaseModel
 
-from ..config import settings
-import httpx
+from ..api_client import get_api_client, auth_headers
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -41,16 +40,15 @@ async def read_films(request: Request, page: int = 1, limit: int = 12):
     """
     logger.info(f"Fetching films for page {page} with limit {limit}")
     skip = (page - 1) * limit
-    async with httpx.AsyncClient(base_url=settings.API_URL) as client:
-        response = await client.get("/films/", params={"skip": skip, "limit": limit})
-        if response.status_code != status.HTTP_200_OK:
-            logger.error(f"Failed to fetch films: {response.status_code}")
-            films = []
-            total_films = 0
-        else:
-            films = response.json()
-            response = await client.get("/films/")
-            total_films = len(response.json())
+    client = get_api_client(request)
+    response = await client.get("/films/", params={"skip": skip, "limit": limit})
+    if response.status_code != status.HTTP_200_OK:
+        logger.error(f"Failed to fetch films: {response.status_code}")
+        films = []
+        total_films = 0
+    else:
+        films = response.json()
+        total_films = int(response.headers.get("X-Total-Count", len(films)))
 
     return templates.TemplateResponse("films.html", {
         "request": request,
@@ -74,17 +72,17 @@ async def read_film(request: Request, film_id: int):
         TemplateResponse: The film details page.
     """
     logger.info(f"Fetching details for film_id {film_id}")
-    async with httpx.AsyncClient(base_url=settings.API_URL) as client:
-        response = await client.get(f"/films/{film_id}")
-        if response.status_code != status.HTTP_200_OK:
-            logger.error(f"Failed to fetch film details: {response.status_code}")
+    client = get_api_client(request)
+    response = await client.get(f"/films/{film_id}")
+    if response.status_code != status.HTTP_200_OK:
+        logger.error(f"Failed to fetch film details: {response.status_code}")
+        film = None
+    else:
+        film = response.json()
+        if film["status"] == "not_available":
             film = None
         else:
-            film = response.json()
-            if film["status"] == "not_available":
-                film = None
-            else:
-                film = format_sessions(film)
+            film = format_sessions(film)
     return templates.TemplateResponse("film.html", {"request": request, "film": film})
 
 
@@ -133,33 +131,32 @@ async def add_film(
         status=film_status
     )
 
-    token = request.cookies.get("access_token")
-    headers = {"Authorization": token}
-    async with httpx.AsyncClient(base_url=settings.API_URL, headers=headers) as client:
-        response = await client.post("/films/", json=new_film.dict())
-        if response.status_code != status.HTTP_201_CREATED:
-            logger.error(f"Failed to add film: {response.status_code}")
-            raise HTTPException(status_code=response.status_code, detail="Error adding film")
-
-        film_id = response.json()["id"]
-        files = {"file": (image.filename, image.file, image.content_type)}
-        response = await client.post(f"/films/{film_id}/upload_image", files=files)
-        if response.status_code != status.HTTP_200_OK:
-            logger.error(f"Failed to upload image for film: {response.status_code}")
-            raise HTTPException(status_code=response.status_code, detail="Error adding image to film")
+    headers = auth_headers(request)
+    client = get_api_client(request)
+    response = await client.post("/films/", json=new_film.dict(), headers=headers)
+    if response.status_code != status.HTTP_201_CREATED:
+        logger.error(f"Failed to add film: {response.status_code}")
+        raise HTTPException(status_code=response.status_code, detail="Error adding film")
+
+    film_id = response.json()["id"]
+    files = {"file": (image.filename, image.file, image.content_type)}
+    response = await client.post(f"/films/{film_id}/upload_image", files=files, headers=headers)
+    if response.status_code != status.HTTP_200_OK:
+        logger.error(f"Failed to upload image for film: {response.status_code}")
+        raise HTTPException(status_code=response.status_code, detail="Error adding image to film")
         
-        # Reset the file pointer to the beginning
-        image.file.seek(0)
+    # Reset the file pointer to the beginning
+    image.file.seek(0)
         
-        # Create the directory if it doesn't exist
-        file_location = f"images/films/{film_id}_{image.filename}"
-        file_location = STATIC_DIR / file_location
-        file_location.parent.mkdir(parents=True, exist_ok=True)
+    # Create the directory if it doesn't exist
+    file_location = f"images/films/{film_id}_{image.filename}"
+    file_location = STATIC_DIR / file_location
+    file_location.parent.mkdir(parents=True, exist_ok=True)
 
-        # Save the file
-        with file_location.open("wb+") as file_object:
-            shutil.copyfileobj(image.file, file_object)
-        logger.info(f"Image {image.filename} saved to {file_location}")
+    # Save the file
+    with file_location.open("wb+") as file_object:
+        shutil.copyfileobj(image.file, file_object)
+    logger.info(f"Image {image.filename} saved to {file_location}")
 
     logger.info(f"Successfully added film: {title}")
     return RedirectResponse(url="/films/1/12", status_code=status.HTTP_303_SEE_OTHER)
@@ -190,13 +187,12 @@ async def update_film_status(
         logger.warning("Unauthorized status update attempt")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to perform this action")
 
-    token = request.cookies.get("access_token")
-    headers = {"Authorization": token}
-    async with httpx.AsyncClient(base_url=settings.API_URL, headers=headers) as client:
-        response = await client.post(f"/films/{film_id}/status/{new_status}")
-        if response.status_code != status.HTTP_200_OK:
-            logger.error(f"Failed to update status for film_id {film_id}: {response.status_code}")
-            raise HTTPException(status_code=response.status_code, detail="Error changing film status")
+    headers = auth_headers(request)
+    client = get_api_client(request)
+    response = await client.post(f"/films/{film_id}/status/{new_status}", headers=headers)
+    if response.status_code != status.HTTP_200_OK:
+        logger.error(f"Failed to update status for film_id {film_id}: {response.status_code}")
+        raise HTTPException(status_code=response.status_code, detail="Error changing film status")
 
     logger.info(f"Successfully updated status of film_id {film_id} to {new_status}")
     return RedirectResponse(url="/films/1/12", status_code=status.HTTP_303_SEE_OTHER)
@@ -216,5 +212,4 @@ def format_sessions(film):
     for session in film.get("sessions", []):
         dt_object = datetime.fromisoformat(session["datetime"])
         session["datetime"] = dt_object.strftime("%B %d, %Y %H:%M:%S")
-        session["reserved_seats"] = len([seat for seat in session["seats"] if seat["status"] == "reserved"])
     return film
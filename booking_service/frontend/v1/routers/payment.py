@@ -1,9 +1,8 @@
 import logging
 from fastapi import APIRouter, Request, HTTPException, status
 from fastapi.responses import RedirectResponse
-import httpx
 
-from ..config import settings
+from ..api_client import get_api_client, auth_headers
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -33,14 +32,13 @@ async def pay_booking(request: Request, booking_id: int):
     """
     logger.info(f"Creating Checkout Session for booking_id: {booking_id}")
     try:
-        token = request.cookies.get("access_token")
-        headers = {"Authorization": token}
-        async with httpx.AsyncClient(base_url=settings.API_URL, headers=headers) as client:
-            response = await client.post("/payments/create-checkout-session", json={"id": "temp", "booking_id": booking_id})
-            if response.status_code != status.HTTP_201_CREATED:
-                logger.error(f"Error creating Checkout Session: {response.text}")
-                raise HTTPException(status_code=response.status_code, detail="Error creating Checkout Session")
-            checkout_url = response.json()["checkout_url"]
+        headers = auth_headers(request)
+        client = get_api_client(request)
+        response = await client.post("/payments/create-checkout-session", json={"id": "temp", "booking_id": booking_id}, headers=headers)
+        if response.status_code != status.HTTP_201_CREATED:
+            logger.error(f"Error creating Checkout Session: {response.text}")
+            raise HTTPException(status_code=response.status_code, detail="Error creating Checkout Session")
+        checkout_url = response.json()["checkout_url"]
     except Exception as e:
         logger.error(f"Error redirecting to Checkout Session: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -4,7 +4,7 @@ from fastapi.responses import RedirectResponse, HTMLResponse
 import logging
 import httpx
 
-from ..config import settings
+from ..api_client import get_api_client, auth_headers
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -60,14 +60,13 @@ async def change_nickname(request: Request, new_nickname: str = Form(...)):
         logger.warning("Unauthorized attempt to change nickname")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to perform this action")
 
-    token = request.cookies.get("access_token")
-    headers = {"Authorization": token}
+    headers = auth_headers(request)
     try:
-        async with httpx.AsyncClient(base_url=settings.API_URL, headers=headers) as client:
-            response = await client.put(f"/user/change_nickname/{new_nickname}")
-            if response.status_code != status.HTTP_200_OK:
-                logger.error("Error changing nickname: %s", response.text)
-                raise HTTPException(status_code=response.status_code, detail="Error changing nickname")
+        client = get_api_client(request)
+        response = await client.put(f"/user/change_nickname/{new_nickname}", headers=headers)
+        if response.status_code != status.HTTP_200_OK:
+            logger.error("Error changing nickname: %s", response.text)
+            raise HTTPException(status_code=response.status_code, detail="Error changing nickname")
         logger.info("Nickname changed successfully for user: %s", request.state.email)
     except httpx.HTTPStatusError as e:
         logger.error("HTTP error occurred: %s", e)
@@ -97,14 +96,13 @@ async def subscribe(request: Request):
         logger.warning("Unauthorized attempt to subscribe to notifications")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to perform this action")
 
-    token = request.cookies.get("access_token")
-    headers = {"Authorization": token}
+    headers = auth_headers(request)
     try:
-        async with httpx.AsyncClient(base_url=settings.API_URL, headers=headers, timeout=30.0) as client:
-            response = await client.post("/email/subscribe/")
-            if response.status_code != status.HTTP_200_OK:
-                logger.error("Error subscribing to notifications: %s", response.text)
-                raise HTTPException(status_code=response.status_code, detail="Error subscribing to notifications")
+        client = get_api_client(request)
+        response = await client.post("/email/subscribe/", headers=headers)
+        if response.status_code != status.HTTP_200_OK:
+            logger.error("Error subscribing to notifications: %s", response.text)
+            raise HTTPException(status_code=response.status_code, detail="Error subscribing to notifications")
         logger.info("User subscribed to notifications: %s", request.state.email)
     except httpx.HTTPStatusError as e:
         logger.error("HTTP error occurred: %s", e)
@@ -134,14 +132,13 @@ async def unsubscribe(request: Request):
         logger.warning("Unauthorized attempt to unsubscribe from notifications")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to perform this action")
 
-    token = request.cookies.get("access_token")
-    headers = {"Authorization": token}
+    headers = auth_headers(request)
     try:
-        async with httpx.AsyncClient(base_url=settings.API_URL, headers=headers, timeout=30.0) as client:
-            response = await client.post("/email/unsubscribe/")
-            if response.status_code != status.HTTP_200_OK:
-                logger.error("Error unsubscribing from notifications: %s", response.text)
-                raise HTTPException(status_code=response.status_code, detail="Error unsubscribing from notifications")
+        client = get_api_client(request)
+        response = await client.post("/email/unsubscribe/", headers=headers)
+        if response.status_code != status.HTTP_200_OK:
+            logger.error("Error unsubscribing from notifications: %s", response.text)
+            raise HTTPException(status_code=response.status_code, detail="Error unsubscribing from notifications")
         logger.info("User unsubscribed from notifications: %s", request.state.email)
     except httpx.HTTPStatusError as e:
         logger.error("HTTP error occurred: %s", e)
@@ -1,3 +1,5 @@
+import asyncio
+import base64
 from datetime import datetime
 
 from fastapi import APIRouter, Request, HTTPException, Form, UploadFile, File, status
@@ -5,9 +7,8 @@ from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from fastapi.responses import RedirectResponse, HTMLResponse
 import logging
-import httpx
 
-from ..config import settings
+from ..api_client import get_api_client, auth_headers
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,6 +22,9 @@ router = APIRouter(
 
 templates = Jinja2Templates(directory="v1/templates")
 
+# Seat status codes used by the API seat map, indexed by code
+SEAT_STATUSES = ("available", "reserved", "canceled")
+
 
 class SessionCreate(BaseModel):
     film_id: int
@@ -46,15 +50,21 @@ async def read_session(request: Request, session_id: int):
         HTTPException: If an error occurs while fetching the session details.
     """
     logger.info(f"Fetching session details for session_id: {session_id}")
-    async with httpx.AsyncClient(base_url=settings.API_URL) as client:
-        response = await client.get(f"/sessions/{session_id}")
+    client = get_api_client(request)
+    # The seats come from the packed seat map only, so the session is fetched without them
+    responses = await asyncio.gather(
+        client.get(f"/sessions/{session_id}/summary"),
+        client.get(f"/sessions/{session_id}/seatmap"),
+        client.get("/bookings/", params={"session_id": session_id}),
+    )
+    for response in responses:
         if response.status_code != status.HTTP_200_OK:
             logger.error(f"Error fetching session details: {response.text}")
             raise HTTPException(status_code=response.status_code, detail="Error fetching session")
-        session = response.json()
-        session = format_session(session)
-        response = await client.get(f"/films/{session['film_id']}")
-        film = response.json()
+    session, seat_map, bookings = (response.json() for response in responses)
+    session = format_session(session, seat_map, bookings)
+    response = await client.get(f"/films/{session['film_id']}")
+    film = response.json()
     return templates.TemplateResponse("session.html", {"request": request, "session": session, "film": film})
 
 
@@ -100,14 +110,13 @@ async def create_session(
         auto_booking=auto_booking
     )
 
-    token = request.cookies.get("access_token")
-    headers = {"Authorization": token}
+    headers = auth_headers(request)
     logger.info(f"Creating a new session for film_id: {film_id}")
-    async with httpx.AsyncClient(base_url=settings.API_URL, headers=headers) as client:
-        response = await client.post("/sessions/", json=new_session.dict())
-        if response.status_code != status.HTTP_201_CREATED:
-            logger.error(f"Error creating session: {response.text}")
-            raise HTTPException(status_code=response.status_code, detail="Error adding session")
+    client = get_api_client(request)
+    response = await client.post("/sessions/", json=new_session.dict(), headers=headers)
+    if response.status_code != status.HTTP_201_CREATED:
+        logger.error(f"Error creating session: {response.text}")
+        raise HTTPException(status_code=response.status_code, detail="Error adding session")
 
     return RedirectResponse(url=f"/films/{film_id}", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -132,15 +141,14 @@ async def change_session_status(request: Request, session_id: int, new_status: s
         logger.warning(f"Unauthorized attempt to change session status by user: {request.state.email}")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to perform this action")
 
-    token = request.cookies.get("access_token")
-    headers = {"Authorization": token}
+    headers = auth_headers(request)
     logger.info(f"Changing session status for session_id: {session_id} to new_status: {new_status}")
-    async with httpx.AsyncClient(base_url=settings.API_URL, headers=headers) as client:
-        response = await client.post(f"/sessions/{session_id}/status/{new_status}")
-        if response.status_code != status.HTTP_200_OK:
-            logger.error(f"Error changing session status: {response.text}")
-            raise HTTPException(status_code=response.status_code, detail="Error changing status of session")
-        session = response.json()
+    client = get_api_client(request)
+    response = await client.post(f"/sessions/{session_id}/status/{new_status}", headers=headers)
+    if response.status_code != status.HTTP_200_OK:
+        logger.error(f"Error changing session status: {response.text}")
+        raise HTTPException(status_code=response.status_code, detail="Error changing status of session")
+    session = response.json()
 
     return RedirectResponse(url=f"/films/{session['film_id']}", status_code=status.HTTP_303_SEE_OTHER)
 
@@ -167,30 +175,50 @@ async def change_session_price(request: Request,
         logger.warning(f"Unauthorized attempt to change session price by user: {request.state.email}")
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to perform this action")
 
-    token = request.cookies.get("access_token")
-    headers = {"Authorization": token}
+    headers = auth_headers(request)
     logger.info(f"Changing session price for session_id: {session_id} to new_price: {new_price}")
-    async with httpx.AsyncClient(base_url=settings.API_URL, headers=headers) as client:
-        response = await client.post(f"/sessions/{session_id}/price/{new_price}")
-        if response.status_code != status.HTTP_200_OK:
-            logger.error(f"Error changing session price: {response.text}")
-            raise HTTPException(status_code=response.status_code, detail="Error changing status of session")
-        session = response.json()
+    client = get_api_client(request)
+    response = await client.post(f"/sessions/{session_id}/price/{new_price}", headers=headers)
+    if response.status_code != status.HTTP_200_OK:
+        logger.error(f"Error changing session price: {response.text}")
+        raise HTTPException(status_code=response.status_code, detail="Error changing status of session")
+    session = response.json()
 
     return RedirectResponse(url=f"/sessions/{session['id']}", status_code=status.HTTP_303_SEE_OTHER)
 
 
-def format_session(session):
+def decode_seat_map(seat_map):
+    """
+    Decode a packed seat map returned by the API.
+
+    Args:
+        seat_map (dict): The seat map data.
+
+    Returns:
+        list: The seats ordered by ID, each with its ID, status and display number.
+    """
+    seat_ids = [seat_id for first, length in seat_map["seat_id_runs"] for seat_id in range(first, first + length)]
+    states = base64.b64decode(seat_map["states"])
+    return [
+        {"id": seat_id, "status": SEAT_STATUSES[code], "number": number}
+        for number, (seat_id, code) in enumerate(zip(seat_ids, states), start=1)
+    ]
+
+
+def format_session(session, seat_map, bookings):
     """
     Format session details.
 
     Args:
-        session (dict): The session data.
+        session (dict): The session summary.
+        seat_map (dict): The packed seat map of the session.
+        bookings (list): The bookings of the session.
 
     Returns:
         dict: The formatted session data.
     """
-    for booking in session.get("bookings", []):
+    session["bookings"] = bookings
+    for booking in bookings:
         for payment in booking.get("payments", []):
             if payment["status"] == "completed":
                 booking["completed_payment"] = payment
@@ -198,8 +226,6 @@ def format_session(session):
             booking["completed_payment"] = None
     dt_object = datetime.fromisoformat(session["datetime"])
     session["datetime"] = dt_object.strftime("%B %d, %Y %H:%M:%S")
+    session["seats"] = decode_seat_map(seat_map)
     session["reserved_seats"] = len([seat for seat in session["seats"] if seat["status"] == "reserved"])
-    session["seats"] = sorted(session["seats"], key=lambda seat: seat["id"])
-    for i, seat in enumerate(session["seats"], start=1):
-        seat["number"] = i
     return session
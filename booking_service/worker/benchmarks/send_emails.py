@@ -0,0 +1,105 @@
+"""
+Throughput benchmark for the email worker.
+
+Sends emails to a local aiosmtpd server standing in for the mail server, first with a
+new SMTP connection per email, as the worker did before, then through the worker's
+`SMTPPool`. Both runs keep `--concurrency` emails in flight, like a consumer with that
+prefetch count, and print the emails sent per second. The stand-in server can delay its
+EHLO answer to account for the handshake cost of a remote server.
+
+Usage (from the `worker` directory, with aiosmtpd installed):
+    python -m benchmarks.send_emails [--emails 500] [--concurrency 16] [--pool-size 4]
+                                     [--handshake-latency 0.02]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import aiosmtplib
+from aiosmtpd.controller import Controller
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SMTP_HOST = "127.0.0.1"
+SMTP_PORT = 8025
+
+# The worker reads its settings on import; point it at the stand-in server
+os.environ.setdefault("MAIL_SERVER", SMTP_HOST)
+os.environ.setdefault("MAIL_PORT", str(SMTP_PORT))
+os.environ.setdefault("MAIL_FROM", "benchmark@example.com")
+
+from worker import SMTPPool, build_email
+
+
+class CountingHandler:
+    """
+    aiosmtpd handler accepting every email and counting them.
+    """
+
+    def __init__(self, handshake_latency: float):
+        self.handshake_latency = handshake_latency
+        self.received = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.handshake_latency)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 Message accepted for delivery"
+
+
+async def run(send, emails: int, concurrency: int) -> float:
+    """
+    Send the emails with at most `concurrency` in flight and return the elapsed time.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send_one(index: int):
+        async with semaphore:
+            await send(build_email({
+                "subject": f"Benchmark {index}",
+                "recipients": ["user@example.com"],
+                "body": "<p>Booking status changed to confirmed.</p>",
+                "subtype": "html",
+            }))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(send_one(index) for index in range(emails)))
+    return time.perf_counter() - started
+
+
+async def main(emails: int, concurrency: int, pool_size: int, handshake_latency: float):
+    handler = CountingHandler(handshake_latency)
+    controller = Controller(handler, hostname=SMTP_HOST, port=SMTP_PORT)
+    controller.start()
+    try:
+        async def send_with_new_connection(message):
+            await aiosmtplib.send(message, hostname=SMTP_HOST, port=SMTP_PORT, start_tls=False)
+
+        elapsed = await run(send_with_new_connection, emails, concurrency)
+        print(f"connection per email: {emails} emails in {elapsed:.3f}s ({emails / elapsed:.1f} emails/s)")
+
+        pool = SMTPPool(SMTP_HOST, SMTP_PORT, None, None, use_tls=False, start_tls=False, size=pool_size)
+        try:
+            elapsed = await run(pool.send, emails, concurrency)
+        finally:
+            await pool.close()
+        print(f"pool of {pool_size} connections: {emails} emails in {elapsed:.3f}s ({emails / elapsed:.1f} emails/s)")
+
+        assert handler.received == 2 * emails, "the server did not receive every email"
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--emails", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--handshake-latency", type=float, default=0.02)
+    args = parser.parse_args()
+    asyncio.run(main(args.emails, args.concurrency, args.pool_size, args.handshake_latency))
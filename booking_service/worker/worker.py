@@ -3,8 +3,14 @@ import json
 import time
 import logging
 import asyncio
+import argparse
+from contextlib import asynccontextmanager
+from functools import partial
+from email.message import EmailMessage
+from typing import AsyncIterator, List, Optional
+
 import aio_pika
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
+import aiosmtplib
 
 # Fetch environment variables
 RABBITMQ_URL = os.getenv("RABBITMQ_URL")
@@ -13,43 +19,189 @@ MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
 MAIL_FROM = os.getenv("MAIL_FROM")
 MAIL_PORT = int(os.getenv("MAIL_PORT"))
 MAIL_SERVER = os.getenv("MAIL_SERVER")
+MAIL_STARTTLS = os.getenv("MAIL_STARTTLS") == 'true'
+MAIL_SSL_TLS = os.getenv("MAIL_SSL_TLS") == 'true'
+# Number of messages processed at the same time by the consumer
+WORKER_PREFETCH = int(os.getenv("WORKER_PREFETCH", "16"))
+# Number of SMTP connections kept open and reused across messages
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
+# Seconds an SMTP command may take before the email is retried later
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT", "10"))
+# Seconds to wait before each retry of a failed email; it is dead-lettered once they are exhausted
+RETRY_DELAYS = [int(delay) for delay in os.getenv("RETRY_DELAYS", "5,30,120,600").split(",")]
+
+QUEUE = 'booking_notifications'
+DEAD_LETTER_QUEUE = f'{QUEUE}.dead'
+ATTEMPT_HEADER = 'x-attempt'
+ERROR_HEADER = 'x-last-error'
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configuration for FastMail
-conf = ConnectionConfig(
-    MAIL_USERNAME=MAIL_USERNAME,
-    MAIL_PASSWORD=MAIL_PASSWORD,
-    MAIL_FROM=MAIL_FROM,
-    MAIL_PORT=MAIL_PORT,
-    MAIL_SERVER=MAIL_SERVER
-)
-
-async def send_email(message):
-    fm = FastMail(conf)
-    await fm.send_message(message)
-    logger.info(f"Email sent to {message.recipients}")
-
-async def callback(message: aio_pika.IncomingMessage):
-    async with message.process():
+
+class SMTPPool:
+    """
+    Pool of persistent SMTP connections.
+
+    Connections are opened on demand up to the pool size, kept open between messages
+    and reopened when the server has closed them, so the SMTP handshake, STARTTLS and
+    login are paid once per connection instead of once per email.
+    """
+
+    def __init__(self, hostname: str, port: int, username: Optional[str], password: Optional[str],
+                 use_tls: bool, start_tls: bool, size: int, timeout: float = 60):
+        self.hostname = hostname
+        self.port = port
+        self.username = username or None
+        self.password = password or None
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.size = size
+        self.timeout = timeout
+        self._idle: "asyncio.Queue[aiosmtplib.SMTP]" = asyncio.Queue()
+        self._clients: List[aiosmtplib.SMTP] = []
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """
+        Borrow a connected SMTP client, waiting for one if the pool is exhausted.
+        """
+        if self._idle.empty() and len(self._clients) < self.size:
+            client = aiosmtplib.SMTP(hostname=self.hostname, port=self.port, username=self.username,
+                                     password=self.password, use_tls=self.use_tls, start_tls=self.start_tls,
+                                     timeout=self.timeout)
+            self._clients.append(client)
+        else:
+            client = await self._idle.get()
+        try:
+            if not client.is_connected:
+                await client.connect()
+            yield client
+        finally:
+            self._idle.put_nowait(client)
+
+    async def send(self, message: EmailMessage) -> None:
+        """
+        Send an email on a pooled connection, reconnecting once if the server dropped it.
+
+        Args:
+            message (EmailMessage): The email to send.
+        """
+        async with self.connection() as client:
+            try:
+                await client.send_message(message)
+            except aiosmtplib.SMTPServerDisconnected:
+                client.close()
+                await client.connect()
+                await client.send_message(message)
+
+    async def close(self) -> None:
+        """
+        Close every connection of the pool.
+        """
+        for client in self._clients:
+            if client.is_connected:
+                try:
+                    await client.quit()
+                except aiosmtplib.SMTPException:
+                    client.close()
+        self._clients.clear()
+        self._idle = asyncio.Queue()
+
+
+smtp_pool = SMTPPool(MAIL_SERVER, MAIL_PORT, MAIL_USERNAME, MAIL_PASSWORD,
+                     use_tls=MAIL_SSL_TLS, start_tls=MAIL_STARTTLS, size=SMTP_POOL_SIZE, timeout=SMTP_TIMEOUT)
+
+
+def retry_queue_name(delay: int) -> str:
+    return f'{QUEUE}.retry.{delay}s'
+
+async def declare_queues(channel: aio_pika.abc.AbstractChannel) -> aio_pika.abc.AbstractQueue:
+    """
+    Declare the notification queue, its delayed retry queues and its dead letter queue.
+
+    A retry queue has no consumer: its messages expire after the queue's delay and are
+    dead-lettered back to the notification queue, so waiting retries never hold a
+    consumer slot.
+
+    Returns:
+        The notification queue.
+    """
+    for delay in RETRY_DELAYS:
+        await channel.declare_queue(retry_queue_name(delay), durable=True, arguments={
+            "x-message-ttl": delay * 1000,
+            "x-dead-letter-exchange": "",
+            "x-dead-letter-routing-key": QUEUE,
+        })
+    await channel.declare_queue(DEAD_LETTER_QUEUE, durable=True)
+    return await channel.declare_queue(QUEUE, durable=True)
+
+async def republish(channel: aio_pika.abc.AbstractChannel, message: aio_pika.IncomingMessage, routing_key: str,
+                    headers: dict):
+    """
+    Publish a copy of a message with updated headers and wait for the broker confirm.
+    Headers set to None are removed.
+    """
+    headers = {name: value for name, value in {**(message.headers or {}), **headers}.items() if value is not None}
+    await channel.default_exchange.publish(
+        aio_pika.Message(
+            body=message.body,
+            content_type=message.content_type,
+            headers=headers,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT
+        ),
+        routing_key=routing_key,
+    )
+
+async def retry_or_dead_letter(channel: aio_pika.abc.AbstractChannel, message: aio_pika.IncomingMessage,
+                               error: Exception, retriable: bool = True):
+    """
+    Schedule the next attempt of a failed message, or dead-letter it once the retries are exhausted.
+    """
+    attempt = int((message.headers or {}).get(ATTEMPT_HEADER, 0)) + 1
+    if retriable and attempt <= len(RETRY_DELAYS):
+        delay = RETRY_DELAYS[attempt - 1]
+        await republish(channel, message, retry_queue_name(delay), {ATTEMPT_HEADER: attempt})
+        logger.warning(f"Failed to process message, attempt {attempt} retried in {delay}s: {error}")
+    else:
+        await republish(channel, message, DEAD_LETTER_QUEUE, {ATTEMPT_HEADER: attempt, ERROR_HEADER: str(error)})
+        logger.error(f"Failed to process message, dead-lettered after attempt {attempt}: {error}")
+
+
+def build_email(message_body: dict) -> EmailMessage:
+    """
+    Build the email described by a notification message.
+    """
+    message = EmailMessage()
+    message["From"] = MAIL_FROM
+    message["To"] = ", ".join(message_body["recipients"])
+    message["Subject"] = message_body["subject"]
+    message.set_content(message_body["body"], subtype=message_body.get("subtype", "html"))
+    return message
+
+async def send_email(message: EmailMessage):
+    await smtp_pool.send(message)
+    logger.info(f"Email sent to {message['To']}")
+
+async def callback(channel: aio_pika.abc.AbstractChannel, message: aio_pika.IncomingMessage):
+    # The message is acked once it is sent or its copy is confirmed in a retry or dead letter
+    # queue; if republishing fails, it is requeued instead of being lost
+    async with message.process(requeue=True):
         try:
             raw_message = message.body.decode()
             logger.info(f"Received raw message: {raw_message}")
             message_body = json.loads(raw_message)
-            message_schema = MessageSchema(
-                subject=message_body["subject"],
-                recipients=message_body["recipients"],
-                body=message_body["body"],
-                subtype=message_body["subtype"]
-            )
-            await send_email(message_schema)
+            email = build_email(message_body)
+        except (UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError) as e:
+            # A malformed message fails the same way on every attempt
+            await retry_or_dead_letter(channel, message, e, retriable=False)
+            return
+        try:
+            await send_email(email)
             logger.info(f"Processed message: {message_body}")
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to decode message: {e}")
         except Exception as e:
-            logger.error(f"Failed to process message: {e}")
+            await retry_or_dead_letter(channel, message, e)
 
 async def main():
     while True:
@@ -57,9 +209,10 @@ async def main():
             connection = await aio_pika.connect_robust(RABBITMQ_URL)
             async with connection:
                 channel = await connection.channel()
-                await channel.set_qos(prefetch_count=1)
-                queue = await channel.declare_queue('booking_notifications', durable=True)
-                await queue.consume(callback)
+                # Up to WORKER_PREFETCH unacknowledged messages are delivered, and their callbacks run concurrently
+                await channel.set_qos(prefetch_count=WORKER_PREFETCH)
+                queue = await declare_queues(channel)
+                await queue.consume(partial(callback, channel))
 
                 logger.info("Waiting for messages. To exit press CTRL+C")
                 await asyncio.Future()  # Run forever
@@ -69,9 +222,41 @@ async def main():
         except Exception as e:
             logger.error(f"Unexpected error: {e}")
             await asyncio.sleep(5)
+        finally:
+            await smtp_pool.close()
+
+async def replay_dead_letters(limit: Optional[int] = None):
+    """
+    Move dead-lettered messages back to the notification queue with a fresh retry budget.
+
+    Args:
+        limit (Optional[int]): The maximum number of messages to replay, all of them by default.
+    """
+    connection = await aio_pika.connect_robust(RABBITMQ_URL)
+    async with connection:
+        channel = await connection.channel()
+        await declare_queues(channel)
+        dead_letter_queue = await channel.declare_queue(DEAD_LETTER_QUEUE, durable=True)
+        replayed = 0
+        while limit is None or replayed < limit:
+            message = await dead_letter_queue.get(fail=False)
+            if message is None:
+                break
+            await republish(channel, message, QUEUE, {ATTEMPT_HEADER: 0, ERROR_HEADER: None})
+            await message.ack()
+            replayed += 1
+        logger.info(f"Replayed {replayed} dead-lettered messages")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Email notification worker.")
+    subparsers = parser.add_subparsers(dest="command")
+    replay_parser = subparsers.add_parser("replay", help="Move dead-lettered messages back to the notification queue.")
+    replay_parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        if args.command == "replay":
+            asyncio.run(replay_dead_letters(args.limit))
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Worker shut down gracefully.")